@@ -0,0 +1,5 @@
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
@@ -0,0 +1,209 @@
+"""
+This module contains the synthetic Indonesian-like corpora used by the
+benchmarks.
+
+Words are Sastrawi root words with common prefixes and suffixes, drawn from a
+Zipf distribution, mixed with frequent stopwords. The same seed always gives
+the same corpus, so results can be compared across releases.
+"""
+
+from typing import Iterator
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+PREFIXES = ("di", "ber", "ter", "ke")
+SUFFIXES = ("kan", "an", "nya", "lah")
+STOPWORDS = (
+    "yang",
+    "dan",
+    "di",
+    "ke",
+    "dari",
+    "ini",
+    "itu",
+    "dengan",
+    "untuk",
+    "pada",
+    "adalah",
+    "tidak",
+    "akan",
+    "juga",
+    "saya",
+    "kami",
+    "mereka",
+    "ada",
+    "karena",
+    "sudah",
+)
+
+
+def load_roots(n_roots: int, seed: int = 0) -> list[str]:
+    """
+    Pick root words from the Sastrawi dictionary.
+
+    Parameters:
+    n_roots (int): Number of root words.
+    seed (int): Random seed.
+
+    Returns:
+    list[str]: Root words, most frequent first.
+    """
+    from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+
+    words = sorted(
+        {w for w in StemmerFactory().get_words() if w.isalpha() and len(w) > 3}
+    )
+    rng = np.random.default_rng(seed)
+    return [
+        words[i]
+        for i in rng.choice(len(words), size=min(n_roots, len(words)), replace=False)
+    ]
+
+
+class SyntheticCorpus:
+    """
+    Reproducible generator of Indonesian-like sentences and queries.
+
+    Attributes:
+    seed (int): Random seed.
+    n_roots (int): Number of distinct root words.
+    zipf (float): Exponent of the Zipf distribution of root words.
+    stopword_rate (float): Probability of a stopword at each position.
+    affix_rate (float): Probability of a prefix, and of a suffix, on each root word.
+    sentence_length (tuple[int, int]): Smallest and largest number of words in a sentence.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        n_roots: int = 20_000,
+        zipf: float = 1.1,
+        stopword_rate: float = 0.3,
+        affix_rate: float = 0.3,
+        sentence_length: tuple[int, int] = (6, 16),
+    ) -> None:
+        self.seed = seed
+        self.n_roots = n_roots
+        self.zipf = zipf
+        self.stopword_rate = stopword_rate
+        self.affix_rate = affix_rate
+        self.sentence_length = sentence_length
+        self.roots = load_roots(n_roots, seed)
+
+        ranks = np.arange(1, len(self.roots) + 1)
+        weights = ranks**-zipf
+        self._cumulative = np.cumsum(weights / weights.sum())
+
+    def sample_roots(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        position = np.searchsorted(self._cumulative, rng.random(size), side="right")
+        return np.minimum(position, len(self.roots) - 1)
+
+    def sentences(self, n_sentences: int, batch_size: int = 10_000) -> Iterator[str]:
+        """
+        Generate sentences one at a time.
+
+        Parameters:
+        n_sentences (int): Number of sentences.
+        batch_size (int): Number of sentences drawn from the random generator at once.
+
+        Returns:
+        Iterator[str]: Sentences without the final period.
+        """
+        rng = np.random.default_rng(self.seed)
+        low, high = self.sentence_length
+        roots = self.roots
+
+        for start in range(0, n_sentences, batch_size):
+            count = min(batch_size, n_sentences - start)
+            lengths = rng.integers(low, high + 1, size=count)
+            total = int(lengths.sum())
+
+            words = self.sample_roots(rng, total)
+            is_stopword = rng.random(total) < self.stopword_rate
+            stopwords = rng.integers(0, len(STOPWORDS), size=total)
+            prefixes = np.where(
+                rng.random(total) < self.affix_rate,
+                rng.integers(0, len(PREFIXES), size=total),
+                -1,
+            )
+            suffixes = np.where(
+                rng.random(total) < self.affix_rate,
+                rng.integers(0, len(SUFFIXES), size=total),
+                -1,
+            )
+
+            tokens = []
+            for i in range(total):
+                if is_stopword[i]:
+                    tokens.append(STOPWORDS[stopwords[i]])
+                    continue
+                word = roots[words[i]]
+                if prefixes[i] >= 0:
+                    word = PREFIXES[prefixes[i]] + word
+                if suffixes[i] >= 0:
+                    word = word + SUFFIXES[suffixes[i]]
+                tokens.append(word)
+
+            end = 0
+            for length in lengths.tolist():
+                yield " ".join(tokens[end : end + length])
+                end += length
+
+    def text(self, n_sentences: int) -> str:
+        """
+        Generate sentences as one text, split on "." by the models.
+
+        Parameters:
+        n_sentences (int): Number of sentences.
+
+        Returns:
+        str: Sentences separated by ". ".
+        """
+        return ". ".join(self.sentences(n_sentences)) + "."
+
+    def queries(self, n_queries: int, terms: tuple[int, int] = (1, 4)) -> list[str]:
+        """
+        Generate free text queries of frequent and rare root words.
+
+        Parameters:
+        n_queries (int): Number of queries.
+        terms (tuple[int, int]): Smallest and largest number of words in a query.
+
+        Returns:
+        list[str]: Queries.
+        """
+        rng = np.random.default_rng(self.seed + 1)
+        lengths = rng.integers(terms[0], terms[1] + 1, size=n_queries)
+        return [
+            " ".join(self.roots[i] for i in self.sample_roots(rng, n))
+            for n in lengths.tolist()
+        ]
+
+    def boolean_queries(self, n_queries: int) -> list[str]:
+        """
+        Generate boolean queries with AND, OR and NOT.
+
+        Parameters:
+        n_queries (int): Number of queries.
+
+        Returns:
+        list[str]: Queries.
+        """
+        templates = (
+            "{0} AND {1}",
+            "{0} OR {1}",
+            "{0} AND NOT {1}",
+            "({0} OR {1}) AND {2}",
+        )
+        rng = np.random.default_rng(self.seed + 2)
+        queries = []
+        for i in range(n_queries):
+            words = [self.roots[w] for w in self.sample_roots(rng, 3)]
+            queries.append(templates[i % len(templates)].format(*words))
+        return queries
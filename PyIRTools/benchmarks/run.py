@@ -0,0 +1,345 @@
+"""
+This module runs the benchmarks and writes the results as JSON.
+
+For each corpus size it measures index build throughput and peak memory,
+latency of boolean and ranked queries, and stemming and preprocessing
+throughput. The dense models are only measured on small corpora.
+
+The peak resident memory of a process only ever grows, so each size is
+measured in a fresh process by default. Otherwise the reported peak is
+that of the whole run up to that size.
+
+Usage:
+python -m PyIRTools.benchmarks [--sizes N [N ...]] [--queries Q] [--output FILE] [--no-memory] [--no-isolate]
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Callable
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from benchmarks.corpus import SyntheticCorpus
+from model.boolean import BooleanModel
+from model.sparse_vector import SparseVectorModel
+from utils.preprocess import Preprocess
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def latency(function: Callable[[str], Any], queries: list[str]) -> dict[str, float]:
+    """
+    Measure the latency of each query after one warmup pass.
+
+    Parameters:
+    function (Callable[[str], Any]): Function answering one query.
+    queries (list[str]): Queries.
+
+    Returns:
+    dict[str, float]: "p50_ms", "p99_ms" and "mean_ms" of the query latency, and "qps".
+    """
+    for query in queries:
+        function(query)
+
+    times = np.empty(len(queries))
+    for i, query in enumerate(queries):
+        start = perf_counter()
+        function(query)
+        times[i] = perf_counter() - start
+
+    return {
+        "p50_ms": float(np.percentile(times, 50) * 1000),
+        "p99_ms": float(np.percentile(times, 99) * 1000),
+        "mean_ms": float(times.mean() * 1000),
+        "qps": float(len(times) / times.sum()) if times.sum() else 0.0,
+    }
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Get the peak resident memory of the process since it started, None
+    where unavailable.
+
+    Returns:
+    float | None: Megabytes.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def bench_build(
+    corpus: SyntheticCorpus, n_sentences: int, memory: bool, isolate: bool
+) -> tuple[SparseVectorModel, dict[str, Any]]:
+    model = SparseVectorModel("indonesian")
+    start = perf_counter()
+    model.insert_stream(corpus.sentences(n_sentences))
+    seconds = perf_counter() - start
+
+    index = model.index
+    n_tokens = int(index.doc_lengths.sum())
+    result: dict[str, Any] = {
+        "seconds": seconds,
+        "docs_per_second": index.n_docs / seconds,
+        "tokens_per_second": n_tokens / seconds,
+        "n_docs": index.n_docs,
+        "n_terms": index.n_terms,
+        "n_postings": index.nnz,
+        "n_tokens": n_tokens,
+    }
+
+    if memory:
+        # second pass, tracemalloc slows the build down several times
+        tracemalloc.start()
+        SparseVectorModel("indonesian").insert_stream(corpus.sentences(n_sentences))
+        result["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / (1 << 20)
+        tracemalloc.stop()
+    # the peak of this size alone only in a fresh process
+    result["peak_rss_mb" if isolate else "process_peak_rss_mb"] = peak_rss_mb()
+    return model, result
+
+
+def bench_stemming(
+    corpus: SyntheticCorpus, n_sentences: int, max_words: int
+) -> dict[str, Any]:
+    words = []
+    for sentence in corpus.sentences(n_sentences):
+        words.extend(sentence.split())
+        if len(words) >= max_words:
+            break
+    words = words[:max_words]
+
+    result: dict[str, Any] = {"n_words": len(words)}
+    for name, cache_size in (("uncached", 0), ("cached", 100_000)):
+        preprocess = Preprocess("indonesian", cache_size=cache_size)
+        start = perf_counter()
+        for word in words:
+            preprocess.stem(word)
+        seconds = perf_counter() - start
+        result[f"{name}_words_per_second"] = len(words) / seconds if seconds else 0.0
+
+    text = ". ".join(corpus.sentences(min(n_sentences, 10_000)))
+    preprocess = Preprocess("indonesian")
+    start = perf_counter()
+    documents = preprocess.preprocess_text(text)
+    seconds = perf_counter() - start
+    result["preprocess_docs_per_second"] = len(documents) / seconds if seconds else 0.0
+    return result
+
+
+def bench_dense(
+    corpus: SyntheticCorpus,
+    n_sentences: int,
+    queries: list[str],
+    boolean_queries: list[str],
+) -> dict[str, Any]:
+    from model.space_vector import SpaceVectorModel
+
+    text = corpus.text(n_sentences)
+    result: dict[str, Any] = {}
+
+    space = SpaceVectorModel("indonesian")
+    start = perf_counter()
+    space.insert_documents(text)
+    result["space_vector_build_seconds"] = perf_counter() - start
+
+    def space_search(query: str) -> None:
+        space.insert_documents(text)
+        space.set_query(query)
+        space.calculate_cosine_similarity(space.calculate_tf_idf())
+
+    # each dense query rebuilds the whole table, a couple is enough
+    result["space_vector_query"] = latency(space_search, queries[:2])
+
+    boolean = BooleanModel("indonesian")
+    boolean.insert_documents(text)
+    start = perf_counter()
+    inverted_list = boolean.create_inverted_list()
+    result["inverted_list_seconds"] = perf_counter() - start
+
+    def dense_boolean(query: str) -> None:
+        boolean._query = query.lower()
+        boolean.boolean_model(inverted_list)
+
+    result["boolean_dense_query"] = latency(dense_boolean, boolean_queries)
+    return result
+
+
+def bench_size(
+    n_sentences: int,
+    n_queries: int,
+    seed: int,
+    memory: bool,
+    dense_limit: int,
+    stem_words: int,
+    isolate: bool,
+) -> dict[str, Any]:
+    """
+    Run the benchmarks on one synthetic corpus.
+
+    Parameters:
+    n_sentences (int): Number of sentences of the corpus.
+    n_queries (int): Number of ranked and of boolean queries.
+    seed (int): Random seed of the corpus and queries.
+    memory (bool): If True, measure the peak memory of the build with tracemalloc.
+    dense_limit (int): Largest corpus measured with the dense models.
+    stem_words (int): Number of words stemmed to measure stemming throughput.
+    isolate (bool): True if the process runs this size only, see bench_build.
+
+    Returns:
+    dict[str, Any]: Measurements of the corpus.
+    """
+    corpus = SyntheticCorpus(seed)
+    queries = corpus.queries(n_queries)
+    boolean_queries = corpus.boolean_queries(n_queries)
+
+    model, build = bench_build(corpus, n_sentences, memory, isolate)
+
+    boolean = BooleanModel("indonesian")
+    boolean.insert_documents("")
+    boolean.index = model.index
+
+    result = {
+        "n_sentences": n_sentences,
+        "build": build,
+        "vector_query": latency(lambda query: model.search(query, 10), queries),
+        "boolean_query": latency(boolean.evaluate, boolean_queries),
+        "stemming": bench_stemming(corpus, n_sentences, stem_words),
+    }
+    if n_sentences <= dense_limit:
+        result["dense"] = bench_dense(corpus, n_sentences, queries, boolean_queries)
+    return result
+
+
+def run(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    n_queries: int = 200,
+    seed: int = 0,
+    memory: bool = True,
+    dense_limit: int = 1_000,
+    stem_words: int = 20_000,
+    log: Callable[[str], None] | None = None,
+    isolate: bool = False,
+) -> dict[str, Any]:
+    """
+    Run the benchmarks on synthetic corpora of each size.
+
+    Parameters:
+    sizes (tuple[int, ...]): Number of sentences of each corpus.
+    n_queries (int): Number of ranked and of boolean queries.
+    seed (int): Random seed of the corpora and queries.
+    memory (bool): If True, measure the peak memory of the build with tracemalloc.
+    dense_limit (int): Largest corpus measured with the dense models.
+    stem_words (int): Number of words stemmed to measure stemming throughput.
+    log (Callable[[str], None] | None): Called with a progress message before each size.
+    isolate (bool): If True, run each size in a fresh process, so "build" reports "peak_rss_mb" of that size alone. Otherwise it reports "process_peak_rss_mb", the peak of the run so far.
+
+    Returns:
+    dict[str, Any]: "meta" with the environment and settings, "results" with one dict per size.
+    """
+    results = []
+    for n_sentences in sizes:
+        if log is not None:
+            log(f"{n_sentences} sentences")
+
+        args = (n_sentences, n_queries, seed, memory, dense_limit, stem_words, isolate)
+        if isolate:
+            # spawn, a forked process inherits the memory of this one
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                results.append(executor.submit(bench_size, *args).result())
+        else:
+            results.append(bench_size(*args))
+
+    return {"meta": metadata(seed, n_queries), "results": results}
+
+
+def metadata(seed: int, n_queries: int) -> dict[str, Any]:
+    try:
+        from importlib.metadata import version
+
+        package_version = version("PyIRTools")
+    except Exception:
+        package_version = "unknown"
+
+    return {
+        "package_version": package_version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "seed": seed,
+        "n_queries": n_queries,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m PyIRTools.benchmarks",
+        description="Benchmark indexing and search on synthetic corpora.",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="number of sentences of each corpus",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=200, help="number of queries of each kind"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--dense-limit",
+        type=int,
+        default=1_000,
+        help="largest corpus measured with the dense models",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true", help="skip the tracemalloc pass"
+    )
+    parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="run every size in this process, peak memory is then cumulative",
+    )
+    parser.add_argument("--output", help="JSON file, default is stdout")
+    args = parser.parse_args(argv)
+
+    report = run(
+        tuple(args.sizes),
+        args.queries,
+        args.seed,
+        memory=not args.no_memory,
+        dense_limit=args.dense_limit,
+        log=lambda message: print(message, file=sys.stderr),
+        isolate=not args.no_isolate,
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+        return
+    with open(args.output, "w", encoding="utf-8") as file:
+        file.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,23 @@
-from . import boolean, space_vector
+import argparse
+import importlib
 
-boolean.main()
-space_vector.main()
+DEMOS = ("boolean", "space_vector", "sparse_vector")
+
+parser = argparse.ArgumentParser(
+    prog="python -m PyIRTools.model", description="Run model demos."
+)
+parser.add_argument(
+    "demos",
+    nargs="*",
+    metavar="demo",
+    help=f"one of {', '.join(DEMOS)}, default boolean and space_vector",
+)
+args = parser.parse_args()
+
+for demo in args.demos:
+    if demo not in DEMOS:
+        parser.error(f"invalid demo: {demo!r} (choose from {', '.join(DEMOS)})")
+
+# import only the models that run, each pulls its own dependencies
+for demo in args.demos or ("boolean", "space_vector"):
+    importlib.import_module(f"{__package__}.{demo}").main()
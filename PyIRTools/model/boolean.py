@@ -3,9 +3,10 @@ This module contains the boolean model class for information retrieval system.
 """
 
 import re
-from typing import Any, LiteralString
-from pandas.core.frame import DataFrame
-import inflect
+import threading
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+import numpy as np
 import sys
 import os
 
@@ -13,38 +14,273 @@ dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.append(dir_path)
 
 from utils.preprocess import Preprocess
+from utils.inverted_index import InvertedIndex
+from utils.metrics import current_metrics
+from utils.segments import SegmentedIndex
+from utils.storage import save_index, load_index
+from utils.parallel import build_index_parallel
+from utils.boolean_query import (
+    Near,
+    Node,
+    Phrase,
+    parse_query,
+    evaluate,
+    needs_positions,
+    normalize,
+    universe_mask,
+    to_bitmask,
+    from_bitmask,
+)
+from utils.formatting import format_boolean
+from utils.results import BooleanResult
+from utils.result_cache import ResultCache
+from utils.wildcard import WildcardIndex, is_wildcard
+from utils.postings import (
+    CompressedPostings,
+    Postings,
+    PostingsEvaluator,
+    choose_strategy,
+    to_array,
+)
+
+if TYPE_CHECKING:
+    import inflect
+    from pandas.core.frame import DataFrame
 
 
 class BooleanModel:
-    def __init__(self, stopword_lang: str) -> None:
+    """
+    Boolean Model class for Information Retrieval System.
+
+    Attributes:
+    stopword_lang (str): Stopword language.
+    strategy (str): How queries are evaluated. "bitset" uses a bitmask per term, "postings" intersects sorted postings lists rarest first, "auto" picks "postings" for selective queries.
+    positional (bool): If True, the index keeps word positions, needed for phrase and NEAR queries. Off by default, positions take memory and build time.
+    segments (SegmentedIndex | None): Segmented inverted index of the documents, None until first use.
+    cache (ResultCache | None): Cache of query results, keyed by the stemmed query and emptied when the documents change. None disables it.
+
+    Documents can be added, deleted and updated without rebuilding the
+    index. Bit i of a result is the document with id i, deleted ids stay
+    unset.
+
+    Query terms with "*" are wildcards, e.g. "sekol*" or "*bola", matching
+    every indexed (stemmed) term they fit. Quoted phrases, e.g. '"sepak
+    bola"', and "sepak NEAR/3 bola" are matched on the word positions.
+
+    retrieve and search_many keep no query state on the model, so threads
+    may call them at once while the documents do not change.
+    """
+
+    OUTPUT_PATH = "./out"
+    STRATEGIES = ("auto", "bitset", "postings")
+
+    def __init__(
+        self,
+        stopword_lang: str,
+        strategy: str = "auto",
+        positional: bool = False,
+        cache: ResultCache | None = None,
+    ) -> None:
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"strategy must be one of {self.STRATEGIES}")
         self.preprocess = Preprocess(stopword_lang)
+        self.strategy = strategy
+        self.positional = positional
+        self.cache = cache
         self._text = ""
         self._query = ""
-        self.inf = inflect.engine()
+        self._inf: "inflect.engine | None" = None
+        self.segments: SegmentedIndex | None = None
+        self._inverted_list: DataFrame | None = None
+        self._compressed: list[CompressedPostings] | None = None
+        self._wildcard: tuple[SegmentedIndex, WildcardIndex] | None = None
+        self._wildcard_lock = threading.Lock()
+
+    @property
+    def inf(self) -> "inflect.engine":
+        """
+        Inflect engine joining document names, created on first use.
+        """
+        if self._inf is None:
+            import inflect
+
+            self._inf = inflect.engine()
+        return self._inf
+
+    @property
+    def index(self) -> InvertedIndex | None:
+        """
+        Inverted index of the live documents, None until first use.
+        """
+        return None if self.segments is None else self.segments.compact()
+
+    @index.setter
+    def index(self, index: InvertedIndex | None) -> None:
+        self.segments = (
+            None if index is None else SegmentedIndex.from_index(index, prefix="Id")
+        )
 
-    def create_inverted_list(self) -> DataFrame:
+    def get_segments(self) -> SegmentedIndex:
         """
-        Create inverted list from documents.
+        Get segmented inverted index of the documents. It is built on first
+        use after insert_documents.
 
         Returns:
-        DataFrame: Inverted list.
+        SegmentedIndex: Segmented inverted index.
         """
-        tokens = self.preprocess.preprocess_text(self.text)
-        word_corpus = self.preprocess.remove_duplicate(tokens)
-        list_sentences_name = [f"Id{i+1}" for i in range(len(tokens))]
+        if self.segments is None:
+            tokens = self.preprocess.preprocess_text(self.text)
+            index = InvertedIndex.from_tokens(
+                tokens, prefix="Id", positional=self.positional
+            )
+            self.segments = SegmentedIndex.from_index(index, prefix="Id")
+        return self.segments
+
+    def get_index(self) -> InvertedIndex:
+        """
+        Get inverted index of the live documents. It is built on first use
+        after insert_documents and reused until the documents change.
 
-        # create dictionary with key = word and value = 0
-        word_check = dict.fromkeys(list_sentences_name, {})
-        for keys in word_check.keys():
-            word_check[keys] = dict.fromkeys(word_corpus, 0)
+        Returns:
+        InvertedIndex: Inverted index.
+        """
+        return self.get_segments().compact()
 
-        # check if word exists in document give 1 else default 0
-        for i in range(len(tokens)):
-            for word in tokens[i]:
-                word_check[f"Id{i+1}"][word] = 1
+    def compress_postings(self) -> None:
+        """
+        Keep postings as delta and varint compressed lists with skip
+        pointers. They are dropped when the documents change.
 
-        word_check = DataFrame(word_check)
-        return word_check
+        Returns:
+        None
+        """
+        segments = self.get_segments()
+        self._compressed = [
+            CompressedPostings.from_array(segments.postings(term)[0])
+            for term in segments.vocabulary
+        ]
+
+    def get_postings(self, word: str) -> Postings:
+        """
+        Get postings of a query word.
+
+        Parameters:
+        word (str): Query word, stemmed before lookup, or a wildcard pattern.
+
+        Returns:
+        Postings: Sorted document ids containing the word.
+        """
+        if is_wildcard(word):
+            return self.wildcard_postings(word)
+
+        segments = self.get_segments()
+        term = self.preprocess.stem(word)
+        term_id = segments.term_id(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        if self._compressed is not None:
+            return self._compressed[term_id]
+        return segments.postings(term)[0]
+
+    def get_positions(
+        self, word: str, doc_ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get word positions of a query word.
+
+        Parameters:
+        word (str): Query word, stemmed before lookup.
+        doc_ids (np.ndarray | None): Sorted document ids to decode the positions of. Default is every document.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document id of each occurrence and its position among the preprocessed words of the document.
+
+        Raises:
+        ValueError: If the index is not positional.
+        """
+        return self.get_segments().term_positions(self.preprocess.stem(word), doc_ids)
+
+    def wildcard_index(self) -> WildcardIndex:
+        """
+        Get the wildcard index of the vocabulary. It is built on the first
+        wildcard query and extended with the terms added since.
+
+        Returns:
+        WildcardIndex: Wildcard index, term ids are the ids of the segments vocabulary.
+        """
+        segments = self.get_segments()
+        vocabulary = segments.vocabulary
+        with self._wildcard_lock:
+            cached = self._wildcard
+            if cached is None or cached[0] is not segments:
+                base = vocabulary.base
+                n_base = 0 if base is None else len(base)
+                index = WildcardIndex(
+                    (vocabulary.term(t) for t in range(n_base, len(vocabulary))), base
+                )
+                cached = self._wildcard = (segments, index)
+            index = cached[1]
+            if index.n_terms < len(vocabulary):
+                index.extend(
+                    vocabulary.term(t) for t in range(index.n_terms, len(vocabulary))
+                )
+            return index
+
+    def expand_wildcard(self, pattern: str) -> list[str]:
+        """
+        Get the indexed terms matching a wildcard pattern.
+
+        Parameters:
+        pattern (str): Pattern where "*" matches any characters, e.g. "sekol*". Matched against stemmed terms, the pattern is not stemmed.
+
+        Returns:
+        list[str]: Matching terms, in term id order.
+        """
+        vocabulary = self.get_segments().vocabulary
+        return [
+            vocabulary.term(t) for t in self.wildcard_index().expand(pattern).tolist()
+        ]
+
+    def wildcard_postings(self, pattern: str) -> np.ndarray:
+        """
+        Get postings of all terms matching a wildcard pattern.
+
+        Parameters:
+        pattern (str): Pattern where "*" matches any characters, e.g. "sekol*".
+
+        Returns:
+        np.ndarray: Sorted document ids containing any matching term.
+        """
+        segments = self.get_segments()
+        term_ids = self.wildcard_index().expand(pattern).tolist()
+        if self._compressed is not None:
+            parts = [to_array(self._compressed[t]) for t in term_ids]
+        else:
+            parts = [
+                segments.postings(segments.vocabulary.term(t))[0] for t in term_ids
+            ]
+
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.increment("boolean.expanded_terms", len(term_ids))
+
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+    def create_inverted_list(self) -> "DataFrame":
+        """
+        Create inverted list from documents. The result is cached until the
+        documents change.
+
+        Returns:
+        DataFrame: Inverted list.
+        """
+        if self._inverted_list is None:
+            self._inverted_list = self.get_index().to_dataframe(binary=True)
+        return self._inverted_list
 
     def remove_punctuation(self, sentence: str) -> str:
         """
@@ -74,17 +310,152 @@ class BooleanModel:
         sentence = " ".join(split_sentence)
         return sentence
 
-    def insert_documents(self, text: str) -> None:
+    def insert_documents(self, text: str, workers: int = 1) -> None:
         """
         Insert documents.
 
         Parameters:
         text (str): Documents to be inserted.
+        workers (int): Number of processes used to preprocess and index the documents. With 1, the index is built on first use.
 
         Returns:
         None
         """
         self.text = text
+        self.index = None
+        self._inverted_list = None
+        self._compressed = None
+
+        if workers > 1:
+            self.index = build_index_parallel(
+                text.split("."),
+                self.preprocess,
+                workers,
+                prefix="Id",
+                positional=self.positional,
+            )
+
+    def insert_stream(self, source: str | Iterable[str], workers: int = 1) -> None:
+        """
+        Insert documents one at a time from a file or an iterable, without
+        holding the whole text in memory.
+
+        Parameters:
+        source (str | Iterable[str]): path of a text file, split into sentences like insert_documents, or an iterable with one document per item.
+        workers (int): Number of processes used to preprocess and index the documents.
+
+        Returns:
+        None
+        """
+        self.insert_documents("")
+
+        if workers > 1:
+            if isinstance(source, str):
+                source = self.preprocess.read_sentences(source)
+            self.index = build_index_parallel(
+                source,
+                self.preprocess,
+                workers,
+                prefix="Id",
+                positional=self.positional,
+            )
+            return
+
+        tokens = self.preprocess.preprocess_stream(source)
+        self.index = InvertedIndex.from_tokens(
+            tokens, prefix="Id", positional=self.positional
+        )
+
+    def build_index(self, text: str, path: str | None = None) -> str:
+        """
+        Insert documents and save their inverted index to disk.
+
+        Parameters:
+        text (str): Documents to be inserted.
+        path (str | None): Directory of the index. Default is "index" in OUTPUT_PATH.
+
+        Returns:
+        str: Directory of the index.
+        """
+        self.insert_documents(text)
+        return save_index(
+            self.get_index(), path or os.path.join(self.OUTPUT_PATH, "index")
+        )
+
+    def load_index(self, path: str) -> None:
+        """
+        Load a prebuilt inverted index instead of inserting documents.
+
+        Parameters:
+        path (str): Directory of the index created by build_index.
+
+        Returns:
+        None
+        """
+        self.insert_documents("")
+        self.index = load_index(path)
+
+    def _documents_changed(self) -> None:
+        self._inverted_list = None
+        self._compressed = None
+
+    def add_documents(self, text: str) -> list[str]:
+        """
+        Add documents to the inserted ones without rebuilding the index.
+
+        Parameters:
+        text (str): Documents to be added.
+
+        Returns:
+        list[str]: Names of the added documents.
+        """
+        segments = self.get_segments()
+        doc_ids = segments.add_documents(self.preprocess.preprocess_text(text))
+        self._documents_changed()
+        return [segments.doc_names[i] for i in doc_ids]
+
+    def delete_documents(self, names: list[str]) -> None:
+        """
+        Delete documents. Their names are not reused.
+
+        Parameters:
+        names (list[str]): Names of the documents, e.g. ["Id2"].
+
+        Returns:
+        None
+        """
+        segments = self.get_segments()
+        segments.delete_documents([segments.doc_id(name) for name in names])
+        self._documents_changed()
+
+    def update_document(self, name: str, text: str) -> None:
+        """
+        Replace the text of a document, keeping its name.
+
+        Parameters:
+        name (str): Name of the document.
+        text (str): New text of the document.
+
+        Returns:
+        None
+        """
+        segments = self.get_segments()
+        segments.update_document(
+            segments.doc_id(name), self.preprocess.preprocess_document(text)
+        )
+        self._documents_changed()
+
+    def merge_segments(self, background: bool = False) -> threading.Thread | None:
+        """
+        Merge the segments created by add, delete and update into one.
+
+        Parameters:
+        background (bool): If True, merge in a background thread and return it.
+
+        Returns:
+        threading.Thread | None: The merging thread if background is True, to be joined.
+        """
+        return self.get_segments().merge_segments(background)
 
     def get_query(self) -> str:
         """
@@ -97,7 +468,8 @@ class BooleanModel:
 
     def search(self, query: str) -> None:
         """
-        Search query in the documents.
+        Search query in the documents and print the result. Use retrieve to
+        get the result without printing.
 
         Parameters:
         query (str): Query to be searched.
@@ -106,92 +478,220 @@ class BooleanModel:
         None
         """
         self._query = query.lower()
+        print(format_boolean(self.retrieve(self._query)))
 
-        inverted_list = self.create_inverted_list()
+    def retrieve(self, query: str) -> BooleanResult:
+        """
+        Get the documents matching a boolean query.
 
-        boolean_expression, result = self.boolean_model(inverted_list)
-        
-        print(f"Your query: {self._query}")
-        print(f"Boolean Expression: {boolean_expression}")
-        print(f"Result: {result}")
-        if result != None:
-            print(f"Result Query: {self.get_document_index(result, inverted_list)}")
-        else:
-            print(f"Result Query: {result}")
+        Parameters:
+        query (str): Boolean query, e.g. "sekolah OR (makan AND NOT ayam)".
 
-    def boolean_model(self, inverted_list: DataFrame) -> tuple[LiteralString, Any | None]:
+        Returns:
+        BooleanResult: Expression and sorted ids of the matching documents. Not valid if the query cannot be parsed, or has a phrase or NEAR and the index is not positional.
         """
-        Boolean model for information retrieval system.
+        query = query.lower()
+        expression, doc_ids = self.evaluate_ids(query)
+        doc_names = self.get_segments().doc_names
+        if doc_ids is None:
+            return BooleanResult(
+                query, expression, np.zeros(0, dtype=np.int64), doc_names, valid=False
+            )
+        return BooleanResult(query, expression, doc_ids, doc_names)
+
+    def search_many(self, queries: list[str]) -> list[dict[str, Any]]:
+        """
+        Search many queries against the same inverted index.
 
         Parameters:
-        inverted_list (DataFrame): Inverted list.
+        queries (list[str]): Queries to be searched.
 
         Returns:
-        tuple[str, Any]: Boolean expression and result of boolean model.
+        list[dict[str, Any]]: One dict per query with keys "query", "expression" and "documents" (list of document names, empty if the query is invalid).
+        """
+        results = []
+        for query in queries:
+            result = self.retrieve(query)
+            results.append(
+                {
+                    "query": result.query,
+                    "expression": result.expression,
+                    "documents": result.names(),
+                }
+            )
+        return results
+
+    def evaluate(self, query: str) -> tuple[str, int | None]:
         """
-        query = self._query
-        regex = re.compile(r"(\band\b|\bor\b|\bnot\b)")
+        Evaluate boolean query over the postings of the inverted index.
+
+        Parameters:
+        query (str): Boolean query.
 
-        # get boolean operator
-        query_operator = regex.findall(query)
+        Returns:
+        tuple[str, int | None]: Boolean expression and bitmask of the matching documents (bit i is document i), or None if the query is invalid.
+        """
+        expression, doc_ids = self._evaluate_segments(query)
+        if doc_ids is None:
+            return expression, None
+        return expression, to_bitmask(doc_ids, self.get_segments().n_ids)
 
-        queries = self.split_punctuation(query).split()
+    def evaluate_ids(self, query: str) -> tuple[str, np.ndarray | None]:
+        """
+        Evaluate boolean query over the postings of the inverted index.
 
-        corpus = inverted_list.index.tolist()
+        Parameters:
+        query (str): Boolean query.
 
-        tf_biner = {}
+        Returns:
+        tuple[str, np.ndarray | None]: Boolean expression and sorted ids of the matching documents, or None if the query is invalid.
+        """
+        return self._evaluate_segments(query)
 
-        for word in queries:
-            if word in corpus:
-                index = corpus.index(word)
-                biner = inverted_list.iloc[index].tolist()
-                biner = "".join(str(i) for i in biner)
-                tf_biner[word] = biner
+    def _evaluate_segments(self, query: str) -> tuple[str, np.ndarray | None]:
+        # sorted document ids whatever the strategy, also in the cache
+        metrics = current_metrics()
+        start = perf_counter()
+        try:
+            node = parse_query(query)
+        except ValueError:
+            return query, None
+
+        segments = self.get_segments()
+        if not segments.positional and needs_positions(node):
+            # phrases and NEAR need positions, the index has none
+            return str(node), None
+        cache = self.cache
+        if cache is not None:
+            key = str(normalize(node, self.preprocess.stem, self.preprocess.stopwords))
+            version = (segments, segments.version)
+            cached = cache.get(key, version)
+            if cached is not None:
+                return str(node), cached
+
+        live_ids = segments.live_ids()
+        n_ids = segments.n_ids
+        evaluator = PostingsEvaluator(
+            self.get_postings,
+            segments.n_docs,
+            live_ids,
+            get_positions=self.get_positions,
+            stopwords=self.preprocess.stopwords,
+        )
+
+        strategy = self.strategy
+        if strategy == "auto":
+            strategy = choose_strategy(evaluator, node)
+
+        if strategy == "postings":
+            doc_ids = evaluator.evaluate(node)
+        else:
 
-        boolean_operator = []
+            def lookup(word: str) -> int:
+                return to_bitmask(to_array(evaluator.postings(word)), n_ids)
 
-        boolean_symbol = {"and": "&", "or": "|", "not": "~"}
+            def positional(node: Phrase | Near) -> int:
+                return to_bitmask(evaluator.evaluate_positional(node), n_ids)
 
-        for word in queries:
-            if word in tf_biner.keys():
-                boolean_operator.append(tf_biner[word])
-            elif word in query_operator:
-                boolean_operator.append(boolean_symbol[word.lower()])
+            if len(live_ids) == n_ids:
+                universe = universe_mask(n_ids)
             else:
-                boolean_operator.append(word)
+                universe = to_bitmask(live_ids, n_ids)
+            doc_ids = from_bitmask(evaluate(node, lookup, universe, positional), n_ids)
+
+        if metrics is not None:
+            metrics.add_time(f"boolean.{strategy}", perf_counter() - start)
+            metrics.increment("boolean.queries")
+            metrics.increment("boolean.postings", evaluator.n_postings())
+            metrics.increment("boolean.positions", evaluator.n_positions)
+        if cache is not None:
+            cache.put(key, doc_ids, version)
+        return str(node), doc_ids
+
+    def boolean_model(self, inverted_list: "DataFrame") -> tuple[str, int | None]:
+        """
+        Boolean model for information retrieval system.
+
+        Parameters:
+        inverted_list (DataFrame): Inverted list.
+
+        Returns:
+        tuple[str, int | None]: Boolean expression and bitmask of the matching documents (bit i is document i), or None if the query is invalid.
+        """
+        n_docs = len(inverted_list.columns)
+        wildcard: list[WildcardIndex] = []
+
+        def lookup(word: str) -> int:
+            if is_wildcard(word):
+                if not wildcard:
+                    wildcard.append(WildcardIndex(inverted_list.index))
+                rows = inverted_list.to_numpy()[wildcard[0].expand(word)]
+                return to_bitmask(np.flatnonzero(rows.any(axis=0)), n_docs)
+
+            word = self.preprocess.stem(word)
+            if word not in inverted_list.index:
+                return 0
+            return to_bitmask(
+                np.flatnonzero(inverted_list.loc[word].to_numpy()), n_docs
+            )
+
+        return self._evaluate(self._query, lookup, n_docs)
+
+    def _evaluate(
+        self, query: str, lookup: Callable[[str], int], n_docs: int
+    ) -> tuple[str, int | None]:
+        try:
+            node = parse_query(query)
+        except ValueError:
+            return query, None
+
+        # a term may appear more than once in the query
+        bitmasks: dict[str, int] = {}
 
-        # check if there is leading by zeros, give prefix 0o
-        for i in boolean_operator:
-            if i[0] == "0":
-                boolean_operator[boolean_operator.index(i)] = "0o" + i
+        def cached_lookup(word: str) -> int:
+            if word not in bitmasks:
+                bitmasks[word] = lookup(word)
+            return bitmasks[word]
 
-        boolean_operator = " ".join(boolean_operator)
         try:
-            eval_boolean = eval(boolean_operator)
-        except:
-            eval_boolean = None
-        return boolean_operator, eval_boolean
+            return str(node), evaluate(node, cached_lookup, universe_mask(n_docs))
+        except ValueError:
+            # phrases and NEAR need positions, the inverted list has none
+            return str(node), None
+
+    def get_document_names(
+        self, binary: int, inverted_list: "DataFrame | None" = None
+    ) -> list[str]:
+        """
+        Get document names based on binary result.
+
+        Parameters:
+        binary (int): Bitmask result from boolean model.
+        inverted_list (DataFrame | None): Inverted list. Default is the inverted index of the documents.
 
-    def get_document_index(self, binary, inverted_list: DataFrame) -> str:
+        Returns:
+        list[str]: Names of the documents in the result.
+        """
+        if inverted_list is None:
+            doc_names = self.get_segments().doc_names
+        else:
+            doc_names = inverted_list.columns.tolist()
+
+        return [doc_names[i] for i in from_bitmask(binary, len(doc_names))]
+
+    def get_document_index(self, binary: int, inverted_list: "DataFrame") -> str:
         """
         Get document index based on binary result.
 
         Parameters:
-        binary (int): Binary result from boolean model.
+        binary (int): Bitmask result from boolean model.
         inverted_list (DataFrame): Inverted list.
 
         Returns:
         str: Document index based on binary result.
         """
-        columms_list = inverted_list.columns.tolist()
-        binary_list = [int(i) for i in str(binary)]
-
-        index = []
-        for i in range(len(binary_list)):
-            if binary_list[i] == 1:
-                index.append(columms_list[i])
+        return self.inf.join(self.get_document_names(binary, inverted_list))
 
-        return self.inf.join(index)
 
 def main():
     model = BooleanModel("indonesian")
@@ -0,0 +1,206 @@
+"""
+This module contains the query-only entry point: it loads an index saved by
+build_index and answers ranked and boolean queries, without importing pandas
+or inflect and without preprocessing any document.
+
+Usage:
+python -m PyIRTools.model.searcher INDEX QUERY [QUERY ...] [-k K] [--boolean] [--weighting NAME]
+"""
+
+import argparse
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from model.boolean import BooleanModel
+from model.sparse_vector import SparseVectorModel
+from utils.inverted_index import InvertedIndex
+from utils.result_cache import ResultCache
+from utils.storage import load_index
+from utils.weighting import WEIGHTINGS, Weighting
+
+
+class Searcher:
+    """
+    Search a prebuilt index.
+
+    The index is memory-mapped, and the ranked and boolean models are only
+    created when first used.
+
+    The loaded index is read-only and every query is answered from per-call
+    state, so one Searcher can serve many threads at once: search_many runs
+    queries on a thread pool and asearch and asearch_boolean await them from
+    asyncio. Scoring runs in numpy kernels that release the GIL.
+
+    Attributes:
+    path (str): Directory of the index created by build_index.
+    stopword_lang (str): Stopword language the index was built with.
+    weighting (str | Weighting): Weighting scheme of ranked search.
+    index (InvertedIndex): Loaded inverted index.
+    cache_bytes (int | None): Size bound of the result cache of each model, None for no cache.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stopword_lang: str = "indonesian",
+        weighting: str | Weighting = "tfidf",
+        mmap: bool = True,
+        cache_bytes: int | None = None,
+    ) -> None:
+        self.path = path
+        self.stopword_lang = stopword_lang
+        self.weighting = weighting
+        self.cache_bytes = cache_bytes
+        self.index: InvertedIndex = load_index(path, mmap).freeze()
+        self._ranked: SparseVectorModel | None = None
+        self._boolean: BooleanModel | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def ranked(self) -> SparseVectorModel:
+        if self._ranked is None:
+            with self._lock:
+                if self._ranked is None:
+                    ranked = SparseVectorModel(
+                        self.stopword_lang, self.weighting, self._cache("search.cache")
+                    )
+                    ranked.set_index(self.index)
+                    self._ranked = ranked
+        return self._ranked
+
+    @property
+    def boolean(self) -> BooleanModel:
+        if self._boolean is None:
+            with self._lock:
+                if self._boolean is None:
+                    boolean = BooleanModel(
+                        self.stopword_lang, cache=self._cache("boolean.cache")
+                    )
+                    boolean.insert_documents("")
+                    boolean.index = self.index
+                    self._boolean = boolean
+        return self._boolean
+
+    def _cache(self, name: str) -> ResultCache | None:
+        if self.cache_bytes is None:
+            return None
+        return ResultCache(maxsize=None, max_bytes=self.cache_bytes, name=name)
+
+    def search(self, query: str, k: int = 10) -> list[tuple[str, float]]:
+        """
+        Get the k most relevant documents for a query.
+
+        Parameters:
+        query (str): Query to be searched.
+        k (int): Number of documents to return.
+
+        Returns:
+        list[tuple[str, float]]: Document names and scores, most relevant first.
+        """
+        return self.ranked.search(query, k)
+
+    def search_boolean(self, query: str) -> list[str]:
+        """
+        Get the documents matching a boolean query.
+
+        Parameters:
+        query (str): Boolean query, e.g. "sekolah OR (makan AND NOT ayam)".
+
+        Returns:
+        list[str]: Names of the matching documents, empty if the query is invalid.
+        """
+        return self.boolean.retrieve(query).names()
+
+    def search_many(
+        self, queries: list[str], k: int = 10, workers: int | None = None
+    ) -> list[list[tuple[str, float]]]:
+        """
+        Search many queries concurrently on a thread pool.
+
+        Parameters:
+        queries (list[str]): Queries to be searched.
+        k (int): Number of documents per query.
+        workers (int | None): Number of threads. Default is the ThreadPoolExecutor default.
+
+        Returns:
+        list[list[tuple[str, float]]]: Result of search for each query, in order.
+        """
+        ranked = self.ranked
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda query: ranked.search(query, k), queries))
+
+    async def asearch(
+        self, query: str, k: int = 10, executor: Executor | None = None
+    ) -> list[tuple[str, float]]:
+        """
+        Search a query from asyncio without blocking the event loop.
+
+        Parameters:
+        query (str): Query to be searched.
+        k (int): Number of documents to return.
+        executor (Executor | None): Executor running the search. Default is the default executor of the loop.
+
+        Returns:
+        list[tuple[str, float]]: Document names and scores, most relevant first.
+        """
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.search, query, k
+        )
+
+    async def asearch_boolean(
+        self, query: str, executor: Executor | None = None
+    ) -> list[str]:
+        """
+        Evaluate a boolean query from asyncio without blocking the event loop.
+
+        Parameters:
+        query (str): Boolean query.
+        executor (Executor | None): Executor running the query. Default is the default executor of the loop.
+
+        Returns:
+        list[str]: Names of the matching documents, empty if the query is invalid.
+        """
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, self.search_boolean, query
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m PyIRTools.model.searcher",
+        description="Search a prebuilt index.",
+    )
+    parser.add_argument("index", help="directory of the index created by build_index")
+    parser.add_argument("queries", nargs="+", help="queries to be searched")
+    parser.add_argument(
+        "-k", type=int, default=10, help="number of documents per query"
+    )
+    parser.add_argument(
+        "--boolean", action="store_true", help="evaluate boolean queries"
+    )
+    parser.add_argument("--weighting", default="tfidf", choices=tuple(WEIGHTINGS))
+    parser.add_argument("--lang", default="indonesian", help="stopword language")
+    args = parser.parse_args(argv)
+
+    searcher = Searcher(args.index, args.lang, args.weighting)
+    for query in args.queries:
+        print(f"Query: {query}")
+        if args.boolean:
+            print(f"Result Query: {', '.join(searcher.search_boolean(query))}")
+            continue
+        for name, score in searcher.search(query, args.k):
+            print(f"{name}\t{score:.6f}")
+
+
+if __name__ == "__main__":
+    main()
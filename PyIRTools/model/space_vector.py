@@ -4,6 +4,7 @@ This module contains the space vector model class for information retrieval syst
 
 import os
 import math
+from time import perf_counter
 from typing import Any
 import numpy as np
 
@@ -14,6 +15,9 @@ dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.append(dir_path)
 
 from utils.preprocess import Preprocess
+from utils.metrics import current_metrics
+from utils.results import RankedResult
+from utils.formatting import format_ranked
 from pandas.core.frame import DataFrame
 
 
@@ -23,12 +27,18 @@ class SpaceVectorModel:
 
     Attributes:
     stopword_lang (str): Stopword language.
+
+    calculate_tf_idf does not change the inserted documents. Given the query
+    as an argument instead of set_query, it keeps no query state, so one
+    model can be called again and from several threads.
     """
+
     OUTPUT_PATH = "./out"
 
     def __init__(self, stopword_lang: str) -> None:
         self.preprocess = Preprocess(stopword_lang)
         self._df_text: str
+        self._query = ""
         self._df_query: DataFrame
 
     def insert_documents(self, text: str) -> None:
@@ -54,22 +64,42 @@ class SpaceVectorModel:
         Returns:
         None
         """
-        list_query = self.preprocess.preprocess_query(query)
-        self.df_query = self.preprocess.count_query(list_query)
+        self._query = query
+        self.df_query = self.query_counts(query)
+
+    def query_counts(self, query: str) -> DataFrame:
+        """
+        Count the words of a query, without setting it.
+
+        Parameters:
+        query (str): Query to be processed.
+
+        Returns:
+        DataFrame: DataFrame contain word count in query.
+        """
+        return self.preprocess.count_query(self.preprocess.preprocess_query(query))
 
-    def calculate_tf_idf(self) -> DataFrame:
+    def calculate_tf_idf(self, query: str | None = None) -> DataFrame:
         """
         Calculate TF-IDF from documents and query.
 
+        Parameters:
+        query (str | None): Query to be processed. Default is the query set by set_query.
+
         Returns:
-        DataFrame: DataFrame contain TF-IDF.
+        DataFrame: DataFrame contain TF-IDF. The query is kept in its attrs["query"].
         """
+        if query is None:
+            query, df_query = self._query, self.df_query
+        else:
+            df_query = self.query_counts(query)
 
-        df_tf = self.df_text
-        df_tf.sort_index(inplace=True)
+        # sorted copy, the inserted documents stay as they are
+        df_tf = self.df_text.sort_index()
+        df_tf.attrs["query"] = query
 
         # preprocess df
-        df_tf.insert(0, "Query", self.df_query["Query"])
+        df_tf.insert(0, "Query", df_query["Query"])
         df_tf.index.name = "Term"
         df_tf = df_tf.fillna(0)  # fill NaN with 0
 
@@ -79,10 +109,12 @@ class SpaceVectorModel:
         # calculate tf
         term_list = df_tf.columns.to_list()  # get column name
 
-        df_tf["DF"] = df_tf.sum(axis=1)
+        # N and DF count documents only, so the query does not change the IDF
+        n_documents = len(term_list) - 1
+        df_tf["DF"] = (df_tf[term_list[1:]] > 0).sum(axis=1)
 
         df_tf["IDF"] = df_tf["DF"].apply(
-            lambda x: round(math.log10(len(term_list) / x), 5)
+            lambda x: round(math.log10(n_documents / x), 5) if x else 0.0
         )
 
         for term in term_list:
@@ -96,12 +128,15 @@ class SpaceVectorModel:
 
         return df_tf
 
-    def calculate_cosine_similarity(self, df: DataFrame) -> dict[Any, Any]:
+    def calculate_cosine_similarity(
+        self, df: DataFrame, decimals: int | None = 6
+    ) -> dict[Any, Any]:
         """
         Calculate cosine similarity between query and documents.
 
         Parameters:
         df (DataFrame): DataFrame contain TF-IDF.
+        decimals (int | None): Number of decimals to round to. If None, keep full precision.
 
         Returns:
         dict[Any, Any]: Cosine similarity between query and documents.
@@ -115,7 +150,8 @@ class SpaceVectorModel:
         # get Square Root of query
         query_norm = df_similarity.loc["Square Root", "Norm Query"]
 
-        query_norm = np.round(query_norm, 6)  # type: ignore
+        if decimals is not None:
+            query_norm = np.round(query_norm, decimals)  # type: ignore
 
         # get index of Norm Query column
         index_query = df_similarity.columns.get_loc("Norm Query")
@@ -130,42 +166,64 @@ class SpaceVectorModel:
             sum_value = 0
             for index in query_index:
                 index_value = df_similarity.loc[index, column]
-                sum_value += np.round(index_value, 6)  # type: ignore
+                if decimals is not None:
+                    index_value = np.round(index_value, decimals)  # type: ignore
+                sum_value += index_value
 
             cosine = sum_value / (query_norm * df_similarity.loc["Square Root", column])
-            result_cosine[column] = round(cosine, 6)
-        
+            result_cosine[column] = (
+                cosine if decimals is None else round(cosine, decimals)
+            )
+
         return result_cosine
 
-    def get_relevant_document_index(self, df: DataFrame, verbose: bool = False) -> None:
+    def rank(self, df: DataFrame, decimals: int | None = 6) -> RankedResult:
         """
-        Get relevant document index based on cosine similarity.
+        Rank documents by cosine similarity with the query.
 
         Parameters:
         df (DataFrame): DataFrame contain TF-IDF.
-        verbose (bool): If True, print all relevant documents in Dataframe format. If False, print one most relevant document.
+        decimals (int | None): Number of decimals to round to. If None, keep full precision.
 
         Returns:
-        None
+        RankedResult: All documents, most similar first. Ties keep the column order. Names are the "Norm" columns of df.
         """
+        query = df.attrs.get("query", self._query)
+        metrics = current_metrics()
+        start = perf_counter()
+        cosine = self.calculate_cosine_similarity(df, decimals)
+        scored = perf_counter()
+
+        scores = np.fromiter(cosine.values(), dtype=np.float64, count=len(cosine))
+        order = np.argsort(-scores, kind="stable")
+        result = RankedResult(query, order, scores[order], list(cosine))
+
+        if metrics is not None:
+            metrics.add_time("rank.cosine", scored - start)
+            metrics.add_time("rank.sort", perf_counter() - scored)
+            metrics.increment("rank.documents", len(cosine))
+        return result
 
-        cosine = self.calculate_cosine_similarity(df)
-
-        # sort cosine similarity
-        cosine = dict(sorted(cosine.items(), key=lambda item: item[1], reverse=True))
+    def get_relevant_document_index(self, df: DataFrame, verbose: bool = False) -> None:
+        """
+        Get relevant document index based on cosine similarity. Use rank
+        to get the result without printing.
 
-        if verbose: 
-            print("Relevant Document:")
-            result = DataFrame(cosine.items(), columns=["Document", "Cosine Similarity"])
-            print(result)
-        else:
-            print(f"Most Relevant Document: {list(cosine.keys())[0]}")
-        
+        Parameters:
+        df (DataFrame): DataFrame contain TF-IDF.
+        verbose (bool): If True, print all relevant documents in Dataframe format. If False, print one most relevant document.
 
+        Returns:
+        None
+        """
+        print(format_ranked(self.rank(df), verbose))
 
     def save_to_excel(self, df: DataFrame, filename: str) -> None:
         """
-        Save DataFrame to Excel file.
+        Save DataFrame to Excel file. Meant for small inputs: the whole
+        DataFrame is written at once and a sheet holds at most 16,384
+        columns. SparseVectorModel.export_terms, export_vectors and
+        export_results stream any size to Parquet, CSV or JSON Lines.
 
         Parameters:
         df (DataFrame): DataFrame to be saved.
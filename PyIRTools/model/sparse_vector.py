@@ -0,0 +1,908 @@
+"""
+This module contains the sparse space vector model class for information retrieval system.
+"""
+
+import math
+import threading
+from collections import Counter
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, Iterator, Literal, overload
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.preprocess import Preprocess
+from utils.inverted_index import InvertedIndex
+from utils.metrics import Metrics, current_metrics
+from utils.results import RankedResult
+from utils.result_cache import ResultCache
+from utils.formatting import format_ranked
+from utils.segments import SegmentedIndex
+from utils.weighting import TfIdf, Weighting, get_weighting
+from utils.storage import save_index, load_index
+from utils.parallel import build_index_parallel
+from utils.export import CHUNK_SIZE, Chunk, ranked_chunks, write_chunks
+
+if TYPE_CHECKING:
+    from pandas.core.frame import DataFrame
+
+
+class SparseVectorModel:
+    """
+    Space Vector Model backed by a sparse term-document matrix.
+
+    Same weighting as SpaceVectorModel, but term frequencies are kept in an
+    InvertedIndex and IDF, TF-IDF and L2 norms are vectors, so memory grows
+    with the number of non-zero entries. The dense DataFrame is only built
+    on request with to_dataframe.
+
+    Documents can be added, deleted and updated without rebuilding the
+    index, search keeps its IDF and document norms up to date incrementally.
+
+    retrieve, search and score_batch keep no query state on the model, so
+    threads may call them at once while the documents do not change.
+    set_query, calculate_tf_idf and rank keep the query on the model.
+
+    Attributes:
+    stopword_lang (str): Stopword language.
+    weighting (Weighting): Weighting scheme of search and score_batch, see utils.weighting.
+    segments (SegmentedIndex): Segmented inverted index of the documents.
+    cache (ResultCache | None): Cache of retrieve results, keyed by the stemmed query terms and emptied when the documents change. None disables it.
+    """
+
+    OUTPUT_PATH = "./out"
+
+    def __init__(
+        self,
+        stopword_lang: str,
+        weighting: str | Weighting = "tfidf",
+        cache: ResultCache | None = None,
+    ) -> None:
+        self.preprocess = Preprocess(stopword_lang)
+        self.weighting = get_weighting(weighting)
+        self.cache = cache
+        self.segments: SegmentedIndex
+        self._idf: tuple[SegmentedIndex, int, Weighting, np.ndarray] | None = None
+        self._max_weights: (
+            tuple[SegmentedIndex, int, Weighting, dict[int, float]] | None
+        ) = None
+        self.query_counts: dict[int, int] = {}
+        self.idf: np.ndarray
+        self.tf_idf: np.ndarray
+        self.norms: np.ndarray
+        self.query_weights: dict[int, float] = {}
+        self.query_norm = 0.0
+        self._query = ""
+
+    @property
+    def index(self) -> InvertedIndex:
+        """
+        Inverted index of the live documents, compacted from the segments.
+        """
+        return self.segments.compact()
+
+    def insert_documents(self, text: str, workers: int = 1) -> None:
+        """
+        Insert documents to be processed.
+
+        Parameters:
+        text (str): Text documents.
+        workers (int): Number of processes used to preprocess and index the documents.
+
+        Returns:
+        None
+        """
+        if workers > 1:
+            self.insert_stream(text.split("."), workers)
+            return
+
+        list_text = self.preprocess.preprocess_text(text)
+        self.set_index(InvertedIndex.from_tokens(list_text))
+
+    def insert_stream(self, source: str | Iterable[str], workers: int = 1) -> None:
+        """
+        Insert documents one at a time from a file or an iterable, without
+        holding the whole text in memory.
+
+        Parameters:
+        source (str | Iterable[str]): path of a text file, split into sentences like insert_documents, or an iterable with one document per item.
+        workers (int): Number of processes used to preprocess and index the documents.
+
+        Returns:
+        None
+        """
+        if workers > 1:
+            if isinstance(source, str):
+                source = self.preprocess.read_sentences(source)
+            self.set_index(build_index_parallel(source, self.preprocess, workers))
+            return
+
+        self.set_index(
+            InvertedIndex.from_tokens(self.preprocess.preprocess_stream(source))
+        )
+
+    def set_index(self, index: InvertedIndex) -> None:
+        """
+        Use an inverted index as the documents.
+
+        Parameters:
+        index (InvertedIndex): Inverted index of the documents.
+
+        Returns:
+        None
+        """
+        self.segments = SegmentedIndex.from_index(index)
+
+    def build_index(self, text: str, path: str | None = None) -> str:
+        """
+        Insert documents and save their inverted index to disk.
+
+        Parameters:
+        text (str): Text documents.
+        path (str | None): Directory of the index. Default is "index" in OUTPUT_PATH.
+
+        Returns:
+        str: Directory of the index.
+        """
+        self.insert_documents(text)
+        return save_index(self.index, path or os.path.join(self.OUTPUT_PATH, "index"))
+
+    def load_index(self, path: str) -> None:
+        """
+        Load a prebuilt inverted index instead of inserting documents.
+
+        Parameters:
+        path (str): Directory of the index created by build_index.
+
+        Returns:
+        None
+        """
+        self.set_index(load_index(path))
+
+    def add_documents(self, text: str) -> list[str]:
+        """
+        Add documents to the inserted ones without rebuilding the index.
+
+        Parameters:
+        text (str): Text documents.
+
+        Returns:
+        list[str]: Names of the added documents.
+        """
+        doc_ids = self.segments.add_documents(self.preprocess.preprocess_text(text))
+        return [self.segments.doc_names[i] for i in doc_ids]
+
+    def delete_documents(self, names: list[str]) -> None:
+        """
+        Delete documents. Their names are not reused.
+
+        Parameters:
+        names (list[str]): Names of the documents, e.g. ["D2"].
+
+        Returns:
+        None
+        """
+        self.segments.delete_documents([self.segments.doc_id(name) for name in names])
+
+    def update_document(self, name: str, text: str) -> None:
+        """
+        Replace the text of a document, keeping its name.
+
+        Parameters:
+        name (str): Name of the document.
+        text (str): New text of the document.
+
+        Returns:
+        None
+        """
+        words = self.preprocess.preprocess_document(text)
+        self.segments.update_document(self.segments.doc_id(name), words)
+
+    def merge_segments(self, background: bool = False) -> threading.Thread | None:
+        """
+        Merge the segments created by add, delete and update into one.
+
+        Parameters:
+        background (bool): If True, merge in a background thread and return it.
+
+        Returns:
+        threading.Thread | None: The merging thread if background is True, to be joined.
+        """
+        return self.segments.merge_segments(background)
+
+    def set_weighting(self, weighting: str | Weighting) -> None:
+        """
+        Change the weighting scheme of search and score_batch. The index is
+        not rebuilt.
+
+        Parameters:
+        weighting (str | Weighting): Name in utils.weighting.WEIGHTINGS, e.g. "bm25", or a weighting scheme.
+
+        Returns:
+        None
+        """
+        self.weighting = get_weighting(weighting)
+
+    def set_query(self, query: str) -> None:
+        """
+        Set query to be processed. Words not in the documents are ignored.
+
+        Parameters:
+        query (str): Query to be processed.
+
+        Returns:
+        None
+        """
+        self._query = query
+        list_query = self.preprocess.preprocess_query(query)
+        self.query_counts = {}
+        for word, count in Counter(list_query).items():
+            term_id = self.index.term_id(word)
+            if term_id is not None:
+                self.query_counts[term_id] = count
+
+    def calculate_tf_idf(self) -> None:
+        """
+        Calculate IDF, TF-IDF and L2 norms from documents and query.
+
+        Like SpaceVectorModel, IDF is log10(N / DF) with N the number of
+        documents and DF the number of documents containing the term, so
+        the query does not change the IDF.
+
+        Returns:
+        None
+        """
+        index = self.index
+        self.idf = np.round(np.log10(index.n_docs / index.document_frequency()), 5)
+        self.tf_idf = index.data * self.idf[index.row_ids()]
+        self.norms = np.sqrt(
+            np.bincount(index.indices, weights=self.tf_idf**2, minlength=index.n_docs)
+        )
+
+        self.query_weights = {
+            term_id: count * self.idf[term_id]
+            for term_id, count in self.query_counts.items()
+        }
+        self.query_norm = math.sqrt(sum(w**2 for w in self.query_weights.values()))
+
+    def calculate_cosine_similarity(self) -> dict[str, float]:
+        """
+        Calculate cosine similarity between query and documents.
+
+        Returns:
+        dict[str, float]: Cosine similarity of each document.
+        """
+        return dict(zip(self.index.doc_names, self._cosine().tolist()))
+
+    def _cosine(self) -> np.ndarray:
+        index = self.index
+        dot = np.zeros(index.n_docs)
+        for term_id, weight in self.query_weights.items():
+            start, end = index.indptr[term_id], index.indptr[term_id + 1]
+            dot[index.indices[start:end]] += weight * self.tf_idf[start:end]
+
+        denominator = self.norms * self.query_norm
+        return np.divide(
+            dot, denominator, out=np.zeros_like(dot), where=denominator > 0
+        )
+
+    def rank(self) -> RankedResult:
+        """
+        Rank documents by cosine similarity with the query set by set_query.
+
+        Returns:
+        RankedResult: All documents, most similar first. Ties keep the document order.
+
+        Note:
+        calculate_tf_idf must be called first.
+        """
+        metrics = current_metrics()
+        start = perf_counter()
+        cosine = self._cosine()
+        scored = perf_counter()
+
+        order = np.argsort(-cosine, kind="stable")
+        result = RankedResult(self._query, order, cosine[order], self.index.doc_names)
+
+        if metrics is not None:
+            metrics.add_time("rank.cosine", scored - start)
+            metrics.add_time("rank.sort", perf_counter() - scored)
+            metrics.increment("rank.documents", len(cosine))
+        return result
+
+    def search_idf(self) -> np.ndarray:
+        """
+        Get IDF of every term for the weighting scheme, over the live
+        documents only. Computed once per index version and weighting.
+
+        Returns:
+        np.ndarray: IDF of each term id of the segments vocabulary.
+        """
+        segments = self.segments
+        cached = self._idf
+        if (
+            cached is None
+            or cached[0] is not segments
+            or cached[1] != segments.version
+            or cached[2] is not self.weighting
+        ):
+            stored = segments.stored_index()
+            if (
+                stored is not None
+                and stored.idf is not None
+                and type(self.weighting).idf is TfIdf.idf
+            ):
+                # memory-mapped with the loaded index
+                idf = stored.idf
+            else:
+                idf = self.weighting.idf(segments.document_frequency(), segments.n_docs)
+            cached = self._idf = (segments, segments.version, self.weighting, idf)
+        return cached[3]
+
+    def max_weights(self) -> dict[int, float]:
+        """
+        Get the largest weight of each term over the live documents, the
+        upper bounds of MaxScore. Filled in as terms are searched, once
+        per index version and weighting.
+
+        Returns:
+        dict[int, float]: Largest weight of each term id searched so far.
+        """
+        segments = self.segments
+        cached = self._max_weights
+        if (
+            cached is None
+            or cached[0] is not segments
+            or cached[1] != segments.version
+            or cached[2] is not self.weighting
+        ):
+            cached = self._max_weights = (
+                segments,
+                segments.version,
+                self.weighting,
+                {},
+            )
+        return cached[3]
+
+    def query_vector(self, query: str) -> dict[int, float]:
+        """
+        Get the weight of each query term. With a cosine weighting scheme,
+        the vector is L2 normalized.
+
+        Parameters:
+        query (str): Query to be processed.
+
+        Returns:
+        dict[int, float]: Weight of each query term id. Words not in the documents are ignored.
+        """
+        return self._query_vector(Counter(self.preprocess.preprocess_query(query)))
+
+    def _query_vector(self, words: Counter[str]) -> dict[int, float]:
+        idf = self.search_idf()
+        counts = {}
+        for word, count in words.items():
+            term_id = self.segments.term_id(word)
+            if term_id is not None and idf[term_id] > 0:
+                counts[term_id] = count
+        if not counts:
+            return {}
+
+        term_ids = list(counts)
+        weights = self.weighting.query_weights(
+            np.array(list(counts.values())), idf[term_ids]
+        )
+        if self.weighting.cosine:
+            weights = weights / math.sqrt(np.sum(weights**2))
+        return dict(zip(term_ids, weights.tolist()))
+
+    def term_weights(
+        self, term_id: int, doc_ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the weight of a term in each document containing it. With a
+        cosine weighting scheme, weights are divided by the L2 norm of the
+        document.
+
+        Parameters:
+        term_id (int): Term id in the segments vocabulary.
+        doc_ids (np.ndarray | None): Sorted document ids to weigh, the other postings are skipped. Default is every document.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Sorted document ids and their weights.
+        """
+        segments = self.segments
+        weighting = self.weighting
+        postings, tfs = segments.postings(segments.vocabulary.term(term_id))
+        if doc_ids is None:
+            doc_ids = postings
+        else:
+            position = np.searchsorted(postings, doc_ids)
+            found = position < len(postings)
+            found[found] = postings[position[found]] == doc_ids[found]
+            doc_ids, tfs = doc_ids[found], tfs[position[found]]
+        weights = weighting.document_weights(
+            tfs,
+            segments.doc_lengths[doc_ids],
+            segments.max_tfs[doc_ids],
+            segments.avg_doc_length,
+            self.search_idf()[term_id],
+        )
+        if not weighting.cosine:
+            return doc_ids, weights
+
+        norms = segments.tfidf_norms(doc_ids, weighting.tf)
+        return doc_ids, np.divide(
+            weights, norms, out=np.zeros_like(weights), where=norms > 0
+        )
+
+    def search(
+        self, query: str, k: int = 10, early_termination: bool = False
+    ) -> list[tuple[str, float]]:
+        """
+        Get the k documents with the highest score for the query, the
+        cosine similarity with the default weighting. Same as retrieve,
+        with document names.
+
+        Parameters:
+        query (str): Query to be searched.
+        k (int): Number of documents to return.
+        early_termination (bool): If True, skip the postings of documents that cannot reach the top k.
+
+        Returns:
+        list[tuple[str, float]]: Document names and scores, most relevant first. Documents with zero score are left out.
+        """
+        return self.retrieve(query, k, early_termination).items()
+
+    def retrieve(
+        self, query: str, k: int = 10, early_termination: bool = False
+    ) -> RankedResult:
+        """
+        Get the k documents with the highest score for the query.
+
+        Only the postings of the query terms are read. Scores are
+        accumulated term at a time, terms with the highest upper bound
+        first. With early_termination, once the remaining terms can no
+        longer lift an unseen document above the current k-th score
+        (MaxScore), documents that cannot reach it any more are dropped
+        and the remaining terms are only weighed for the documents left.
+        The upper bounds are the largest weights of max_weights, so the
+        postings of a term are only all weighed the first time it is
+        searched. The top k is the same either way.
+
+        With a cache, a query with the same stemmed terms, k and weighting
+        as an earlier one on the same documents is answered from it.
+
+        Parameters:
+        query (str): Query to be searched.
+        k (int): Number of documents to return.
+        early_termination (bool): If True, skip the postings of documents that cannot reach the top k.
+
+        Returns:
+        RankedResult: Document ids and scores, most relevant first. Documents with zero score are left out.
+        """
+        metrics = current_metrics()
+        start = perf_counter()
+        segments = self.segments
+        doc_names = segments.doc_names
+        words = Counter(self.preprocess.preprocess_query(query))
+
+        cache = self.cache
+        if cache is not None:
+            key = (tuple(sorted(words.items())), k, early_termination, self.weighting)
+            version = (segments, segments.version)
+            cached = cache.get(key, version)
+            if cached is not None:
+                cached_ids, cached_scores = cached
+                return RankedResult(query, cached_ids, cached_scores, doc_names)
+
+        result = self._retrieve(query, words, k, early_termination, metrics, start)
+        if cache is not None:
+            cache.put(key, (result.doc_ids, result.scores), version)
+        return result
+
+    def _retrieve(
+        self,
+        query: str,
+        words: Counter[str],
+        k: int,
+        early_termination: bool,
+        metrics: Metrics | None,
+        start: float,
+    ) -> RankedResult:
+        doc_names = self.segments.doc_names
+        query_weights = self._query_vector(words)
+        if not query_weights or k <= 0:
+            return RankedResult(
+                query, np.zeros(0, dtype=np.int64), np.zeros(0), doc_names
+            )
+
+        queried = perf_counter()
+        postings: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        max_weights = self.max_weights() if early_termination else {}
+        for term_id in query_weights:
+            if term_id not in max_weights:
+                postings[term_id] = self.term_weights(term_id)
+                max_weights[term_id] = float(postings[term_id][1].max(initial=0))
+        upper_bounds = {t: w * max_weights[t] for t, w in query_weights.items()}
+        remaining = sum(upper_bounds.values())
+        fetched = perf_counter()
+
+        n_postings = n_scored = selections = 0
+        acc_docs = np.zeros(0, dtype=np.int64)
+        acc_scores: np.ndarray = np.zeros(0)
+        threshold = 0.0
+
+        for term_id in sorted(upper_bounds, key=upper_bounds.__getitem__, reverse=True):
+            if early_termination and len(acc_docs) >= k and remaining < threshold:
+                # no unseen document can reach the top k, and neither can
+                # seen ones below the threshold with every remaining term
+                alive = acc_scores + remaining >= threshold
+                acc_docs, acc_scores = acc_docs[alive], acc_scores[alive]
+                if term_id in postings:
+                    docs, weights = postings[term_id]
+                else:
+                    docs, weights = self.term_weights(term_id, acc_docs)
+                position = np.searchsorted(acc_docs, docs)
+                found = position < len(acc_docs)
+                found[found] = acc_docs[position[found]] == docs[found]
+                acc_scores[position[found]] += weights[found] * query_weights[term_id]
+            else:
+                docs, weights = postings.get(term_id) or self.term_weights(term_id)
+                acc_docs, inverse = np.unique(
+                    np.concatenate((acc_docs, docs)), return_inverse=True
+                )
+                acc_scores = np.bincount(
+                    inverse,
+                    weights=np.concatenate(
+                        (acc_scores, weights * query_weights[term_id])
+                    ),
+                    minlength=len(acc_docs),
+                )
+                n_scored = len(acc_docs)
+            n_postings += len(docs)
+
+            remaining -= upper_bounds[term_id]
+            if early_termination and len(acc_docs) >= k:
+                threshold = np.partition(acc_scores, -k)[-k]
+                selections += 1
+
+        if metrics is None:
+            return RankedResult(
+                query, *top_k(acc_docs, acc_scores, k, as_arrays=True), doc_names
+            )
+
+        scored = perf_counter()
+        selected = top_k(acc_docs, acc_scores, k, as_arrays=True)
+        end = perf_counter()
+        metrics.add_time("search.query", queried - start)
+        metrics.add_time("search.fetch", fetched - queried)
+        metrics.add_time("search.score", scored - fetched)
+        metrics.add_time("search.top_k", end - scored)
+        metrics.add_time("search", end - start)
+        metrics.increment("search.queries")
+        metrics.increment("search.postings", n_postings)
+        metrics.increment("search.documents_scored", n_scored)
+        metrics.increment("search.selections", selections + (len(acc_docs) > k))
+
+        return RankedResult(query, *selected, doc_names)
+
+    def score_batch(
+        self, queries: list[str], k: int | None = None
+    ) -> np.ndarray | list[list[tuple[str, float]]]:
+        """
+        Calculate scores of many queries at once.
+
+        The queries form a sparse (queries x terms) matrix that is
+        multiplied with the weighted (terms x documents) matrix. The
+        product is accumulated one query term at a time: every query
+        containing the term gets the outer product of its weights with the
+        postings of the term, so each posting is read once per batch.
+
+        Parameters:
+        queries (list[str]): Queries to be scored.
+        k (int | None): If None, return all scores. Else return the k most relevant documents of each query.
+
+        Returns:
+        np.ndarray | list[list[tuple[str, float]]]: Full precision (queries x documents) scores, or the top k of each query like search.
+        """
+        metrics = current_metrics()
+        start = perf_counter()
+        segments = self.segments
+        doc_ids = segments.live_ids()
+
+        # column of the sparse query matrix: query rows and weights of each term
+        rows: dict[int, list[int]] = {}
+        weights: dict[int, list[float]] = {}
+        for row, query in enumerate(queries):
+            for term_id, weight in self.query_vector(query).items():
+                rows.setdefault(term_id, []).append(row)
+                weights.setdefault(term_id, []).append(weight)
+
+        # one column per live document, in document id order
+        scores = np.zeros((len(queries), len(doc_ids)))
+        n_postings = 0
+        for term_id, term_rows in rows.items():
+            docs, term_weights = self.term_weights(term_id)
+            columns = np.searchsorted(doc_ids, docs)
+            scores[np.ix_(np.array(term_rows, dtype=np.int64), columns)] += np.outer(
+                weights[term_id], term_weights
+            )
+            n_postings += len(docs)
+
+        if metrics is not None:
+            metrics.add_time("score_batch", perf_counter() - start)
+            metrics.increment("score_batch.queries", len(queries))
+            metrics.increment("score_batch.postings", n_postings)
+
+        if k is None:
+            return scores
+
+        results = []
+        for query_scores in scores:
+            selected, selected_scores = top_k(doc_ids, query_scores, k)
+            results.append(
+                [(segments.doc_names[d], s) for d, s in zip(selected, selected_scores)]
+            )
+        return results
+
+    def get_relevant_document_index(self, verbose: bool = False) -> None:
+        """
+        Get relevant document index based on cosine similarity. Use rank
+        to get the result without printing.
+
+        Parameters:
+        verbose (bool): If True, print all relevant documents in Dataframe format. If False, print one most relevant document.
+
+        Returns:
+        None
+        """
+        print(format_ranked(self.rank(), verbose))
+
+    def iter_term_statistics(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Chunk]:
+        """
+        Get DF, collection frequency and IDF of the terms of the live
+        documents, chunk_size terms at a time.
+
+        Parameters:
+        chunk_size (int): Maximum number of terms per chunk.
+
+        Returns:
+        Iterator[Chunk]: Chunks with columns "term", "df", "cf" and "idf", the IDF of the weighting scheme. At least one, maybe empty.
+        """
+        index = self.index
+        segments = self.segments
+        idf = self.search_idf()
+        for start in range(0, max(index.n_terms, 1), chunk_size):
+            stop = min(start + chunk_size, index.n_terms)
+            terms = [index.vocabulary.term(t) for t in range(start, stop)]
+            term_ids = np.array(
+                [segments.term_id(term) for term in terms], dtype=np.int64
+            )
+
+            bounds = index.indptr[start : stop + 1]
+            df = np.diff(bounds)
+            cf = np.zeros(stop - start, dtype=np.int64)
+            non_empty = df > 0
+            if non_empty.any():
+                postings = index.data[bounds[0] : bounds[-1]]
+                cf[non_empty] = np.add.reduceat(
+                    postings, (bounds[:-1] - bounds[0])[non_empty], dtype=np.int64
+                )
+            yield {"term": terms, "df": df, "cf": cf, "idf": idf[term_ids]}
+
+    def iter_vectors(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Chunk]:
+        """
+        Get the weight of each term in each live document, as search scores
+        it, chunk_size postings at a time. With a cosine weighting scheme,
+        weights are divided by the document norm, so the weights of a
+        document form a unit vector.
+
+        Parameters:
+        chunk_size (int): Maximum number of rows per chunk.
+
+        Returns:
+        Iterator[Chunk]: Chunks with columns "term", "document", "tf" and "weight", one row per term and document pair, term by term. At least one, maybe empty.
+        """
+        index = self.index
+        segments = self.segments
+        weighting = self.weighting
+        idf = self.search_idf()
+        doc_ids = segments.live_ids()
+        for start in range(0, max(index.nnz, 1), chunk_size):
+            stop = min(start + chunk_size, index.nnz)
+            rows = (
+                np.searchsorted(index.indptr, np.arange(start, stop), side="right") - 1
+            )
+            first = int(rows[0]) if len(rows) else 0
+            rows -= first
+            terms = [
+                index.vocabulary.term(t)
+                for t in range(first, first + int(rows.max(initial=-1)) + 1)
+            ]
+            term_ids = np.array(
+                [segments.term_id(term) for term in terms], dtype=np.int64
+            )
+
+            docs = doc_ids[index.indices[start:stop]]
+            tfs = np.asarray(index.data[start:stop])
+            weights = weighting.document_weights(
+                tfs,
+                segments.doc_lengths[docs],
+                segments.max_tfs[docs],
+                segments.avg_doc_length,
+                idf[term_ids][rows],  # type: ignore
+            )
+            if weighting.cosine:
+                norms = segments.tfidf_norms(docs, weighting.tf)
+                weights = np.divide(
+                    weights, norms, out=np.zeros_like(weights), where=norms > 0
+                )
+            yield {
+                "term": [terms[row] for row in rows.tolist()],
+                "document": [segments.doc_names[doc] for doc in docs.tolist()],
+                "tf": tfs,
+                "weight": weights,
+            }
+
+    def export_terms(
+        self, path: str, format: str | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> str:
+        """
+        Write the statistics of every term, see iter_term_statistics, chunk by chunk.
+
+        Parameters:
+        path (str): Output file.
+        format (str | None): "parquet", "arrow", "csv" or "jsonl". Default is the one of the file extension, see utils.export.resolve_format.
+        chunk_size (int): Maximum number of rows held in memory.
+
+        Returns:
+        str: Path of the written file.
+        """
+        write_chunks(self.iter_term_statistics(chunk_size), path, format)
+        return path
+
+    def export_vectors(
+        self, path: str, format: str | None = None, chunk_size: int = CHUNK_SIZE
+    ) -> str:
+        """
+        Write the weight of every term in every document, see iter_vectors,
+        chunk by chunk. Unlike to_dataframe, there is one row per non-zero
+        weight instead of one column per document.
+
+        Parameters:
+        path (str): Output file.
+        format (str | None): "parquet", "arrow", "csv" or "jsonl". Default is the one of the file extension, see utils.export.resolve_format.
+        chunk_size (int): Maximum number of rows held in memory.
+
+        Returns:
+        str: Path of the written file.
+        """
+        write_chunks(self.iter_vectors(chunk_size), path, format)
+        return path
+
+    def export_results(
+        self,
+        queries: Iterable[str],
+        path: str,
+        k: int = 10,
+        format: str | None = None,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> str:
+        """
+        Search queries and write the ranked documents of each, chunk by chunk.
+
+        Parameters:
+        queries (Iterable[str]): Queries to be searched, e.g. the lines of a file.
+        path (str): Output file, with columns "query", "rank", "document" and "score".
+        k (int): Number of documents per query.
+        format (str | None): "parquet", "arrow", "csv" or "jsonl". Default is the one of the file extension, see utils.export.resolve_format.
+        chunk_size (int): Maximum number of rows held in memory.
+
+        Returns:
+        str: Path of the written file.
+        """
+        results = (self.retrieve(query, k) for query in queries)
+        write_chunks(ranked_chunks(results, chunk_size), path, format)
+        return path
+
+    def to_dataframe(self) -> "DataFrame":
+        """
+        Export TF-IDF in the same layout as SpaceVectorModel.calculate_tf_idf.
+
+        Returns:
+        DataFrame: Dense DataFrame contain TF-IDF. Only use it for small corpora, export_vectors streams any size.
+
+        Note:
+        calculate_tf_idf must be called first.
+        """
+        from pandas.core.frame import DataFrame
+
+        index = self.index
+        columns = ["Query"] + index.doc_names
+
+        tf = np.zeros((index.n_terms, len(columns)))
+        tf[index.row_ids(), index.indices + 1] = index.data
+        for term_id, count in self.query_counts.items():
+            tf[term_id, 0] = count
+
+        df_tf = DataFrame(tf, index=index.terms, columns=columns)
+        df_tf["DF"] = (tf[:, 1:] > 0).sum(axis=1)
+        df_tf["IDF"] = self.idf
+
+        tf_idf = tf * self.idf[:, None]
+        for i, column in enumerate(columns):
+            df_tf[f"TF-IDF {column}"] = tf_idf[:, i]
+        for i, column in enumerate(columns):
+            df_tf[f"Norm {column}"] = tf_idf[:, i] ** 2
+
+        df_tf.sort_index(inplace=True)
+        df_tf.index.name = "Term"
+        df_tf.loc["Total"] = df_tf.sum()
+        df_tf.loc["Square Root"] = df_tf.loc["Total"] ** 0.5
+
+        return df_tf
+
+
+@overload
+def top_k(
+    doc_ids: np.ndarray, scores: np.ndarray, k: int, as_arrays: Literal[False] = False
+) -> tuple[list[int], list[float]]: ...
+
+
+@overload
+def top_k(
+    doc_ids: np.ndarray, scores: np.ndarray, k: int, as_arrays: Literal[True]
+) -> tuple[np.ndarray, np.ndarray]: ...
+
+
+def top_k(
+    doc_ids: np.ndarray, scores: np.ndarray, k: int, as_arrays: bool = False
+) -> tuple[list[int], list[float]] | tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k highest positive scores, ties broken by lower document id.
+
+    Parameters:
+    doc_ids (np.ndarray): Sorted document ids.
+    scores (np.ndarray): Score of each document.
+    k (int): Number of documents to select.
+    as_arrays (bool): If True, return numpy arrays instead of lists.
+
+    Returns:
+    tuple[list[int], list[float]] | tuple[np.ndarray, np.ndarray]: Selected document ids and scores, highest score first.
+    """
+    positive = scores > 0
+    doc_ids, scores = doc_ids[positive], scores[positive]
+
+    selected = np.arange(len(scores))
+    if len(scores) > k:
+        # partial selection instead of sorting every candidate
+        kth = np.partition(scores, -k)[-k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[: k - len(above)]
+        selected = np.concatenate((above, ties))
+
+    order = selected[np.lexsort((doc_ids[selected], -scores[selected]))]
+    if as_arrays:
+        return doc_ids[order], scores[order]
+    return doc_ids[order].tolist(), scores[order].tolist()
+
+
+def main():
+    svm = SparseVectorModel("indonesian")
+    query = "Stadion Lapangan Populer"
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+
+    svm.insert_documents(text)
+    svm.set_query(query)
+    svm.calculate_tf_idf()
+
+    # get relevant document
+    svm.get_relevant_document_index(verbose=True)
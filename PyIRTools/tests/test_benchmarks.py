@@ -0,0 +1,77 @@
+"""
+Test the benchmark suite.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from benchmarks.corpus import STOPWORDS, SyntheticCorpus
+from benchmarks.run import run
+
+
+class TestCorpus:
+    def test_deterministic(self):
+        """
+        Test the same seed gives the same sentences and queries.
+        """
+        first, second = SyntheticCorpus(seed=3), SyntheticCorpus(seed=3)
+
+        assert list(first.sentences(50)) == list(second.sentences(50))
+        assert first.queries(10) == second.queries(10)
+        assert first.boolean_queries(10) == second.boolean_queries(10)
+        assert list(first.sentences(50)) != list(SyntheticCorpus(seed=4).sentences(50))
+
+    def test_sentences(self):
+        """
+        Test sentence lengths, stopwords and batching.
+        """
+        corpus = SyntheticCorpus(sentence_length=(4, 8))
+        sentences = list(corpus.sentences(25, batch_size=10))
+
+        assert len(sentences) == 25
+        assert all(4 <= len(sentence.split()) <= 8 for sentence in sentences)
+        assert any(
+            word in STOPWORDS for sentence in sentences for word in sentence.split()
+        )
+        assert corpus.text(3).count(".") == 3
+
+
+class TestRun:
+    def test_run(self):
+        """
+        Test a small run reports every measurement.
+        """
+        report = run(
+            sizes=(200,), n_queries=10, memory=False, dense_limit=0, stem_words=500
+        )
+
+        assert set(report["meta"]) >= {"package_version", "python", "numpy", "seed"}
+        [result] = report["results"]
+        assert result["n_sentences"] == 200
+        assert result["build"]["n_docs"] == 200
+        assert result["build"]["docs_per_second"] > 0
+        for kind in ("vector_query", "boolean_query"):
+            assert set(result[kind]) == {"p50_ms", "p99_ms", "mean_ms", "qps"}
+            assert result[kind]["p50_ms"] <= result[kind]["p99_ms"]
+        assert result["stemming"]["n_words"] == 500
+        assert "dense" not in result
+        assert "process_peak_rss_mb" in result["build"]
+
+    def test_isolate(self):
+        """
+        Test each size runs in its own process, reporting its own peak memory.
+        """
+        report = run(
+            sizes=(50, 100),
+            n_queries=5,
+            memory=False,
+            dense_limit=0,
+            stem_words=100,
+            isolate=True,
+        )
+
+        assert [result["build"]["n_docs"] for result in report["results"]] == [50, 100]
+        assert all("peak_rss_mb" in result["build"] for result in report["results"])
@@ -5,10 +5,13 @@ Test the boolean module.
 import sys
 import os
 
+import pytest
+
 dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.append(dir_path)
 
 from model.boolean import BooleanModel
+from utils.result_cache import ResultCache
 from pandas.core.frame import DataFrame
 
 
@@ -47,8 +50,8 @@ class TestBoolean:
         inverted_list = self.model.create_inverted_list()
         boolean_expression, result = self.model.boolean_model(inverted_list)
 
-        assert isinstance(boolean_expression, str)
-        assert result == 110
+        assert boolean_expression == "sekolah | (makan & ~ayam)"
+        assert result == 0b011
         assert isinstance(result, int)
 
     def test_boolean_get_document_index(self):
@@ -57,13 +60,250 @@ class TestBoolean:
         """
         self.model.insert_documents(self.documents)
 
-
         self.model.search(self.query)
 
         inverted_list = self.model.create_inverted_list()
         _, result = self.model.boolean_model(inverted_list)
 
         result = self.model.get_document_index(result, inverted_list)
-        
+
         assert isinstance(result, str)
         assert result == "Id1 and Id2"
+
+    def test_build_load_index(self, tmp_path):
+        """
+        Test the build_index and load_index methods.
+        """
+        path = self.model.build_index(self.documents, str(tmp_path / "index"))
+        expected = self.model.create_inverted_list()
+
+        model = BooleanModel("indonesian")
+        model.load_index(path)
+        inverted_list = model.create_inverted_list()
+
+        assert inverted_list.equals(expected)
+        # the wildcard index answers prefixes from the saved term dictionary
+        assert model.wildcard_index().base is not None
+        assert model.retrieve("seko*").names() == ["Id1", "Id2"]
+        model.add_documents("Sekolah dasar negeri.")
+        assert model.retrieve("seko*").names() == ["Id1", "Id2", "Id4"]
+
+    def test_inverted_list_cache(self):
+        """
+        Test the inverted list is reused until the documents change.
+        """
+        self.model.insert_documents(self.documents)
+        inverted_list = self.model.create_inverted_list()
+
+        assert self.model.create_inverted_list() is inverted_list
+
+        self.model.insert_documents(self.documents)
+
+        assert self.model.create_inverted_list() is not inverted_list
+
+    def test_retrieve(self):
+        """
+        Test the retrieve method returns document ids without printing.
+        """
+        self.model.insert_documents(self.documents)
+        result = self.model.retrieve(self.query)
+
+        assert result.valid
+        assert result.expression == "sekolah | (makan & ~ayam)"
+        assert result.doc_ids.tolist() == [0, 1]
+        assert result.names() == ["Id1", "Id2"]
+        assert self.model.evaluate_ids(self.query.lower())[1].tolist() == [0, 1]
+
+        invalid = self.model.retrieve("sekolah AND (")
+        assert not invalid.valid
+        assert len(invalid) == 0
+
+    def test_search_output(self, capsys):
+        """
+        Test the search method prints the formatted result.
+        """
+        self.model.insert_documents(self.documents)
+        self.model.search(self.query)
+
+        assert capsys.readouterr().out.splitlines() == [
+            "Your query: sekolah or (makan and not ayam)",
+            "Boolean Expression: sekolah | (makan & ~ayam)",
+            "Result: 3",
+            "Result Query: Id1 and Id2",
+        ]
+
+    def test_wildcard(self):
+        """
+        Test wildcard terms with both strategies and the dense inverted list.
+        """
+        for strategy in ("bitset", "postings"):
+            model = BooleanModel("indonesian", strategy=strategy)
+            model.insert_documents(self.documents)
+
+            assert model.expand_wildcard("sekol*") == ["sekolah"]
+            assert model.retrieve("sek*").names() == ["Id1", "Id2"]
+            assert model.retrieve("*an AND NOT ayam").names() == ["Id2"]
+            assert model.retrieve("*a* AND NOT sekol*").names() == ["Id3"]
+            assert model.retrieve("zz*").names() == []
+
+        model = BooleanModel("indonesian")
+        model.insert_documents(self.documents)
+        model._query = "sek* OR *oreng"
+        _, result = model.boolean_model(model.create_inverted_list())
+        assert result == 0b111
+
+    def test_wildcard_new_terms(self):
+        """
+        Test the wildcard index follows added documents.
+        """
+        model = BooleanModel("indonesian")
+        model.insert_documents(self.documents)
+        assert model.retrieve("seko*").names() == ["Id1", "Id2"]
+
+        model.add_documents("Sekolah dasar negeri.")
+        model.compress_postings()
+        assert model.retrieve("seko*").names() == ["Id1", "Id2", "Id4"]
+        assert model.retrieve("neg*").names() == ["Id4"]
+        index = model.wildcard_index()
+        model.add_documents("Bola negeri.")
+        assert model.wildcard_index() is index
+        assert model.retrieve("*ri").names() == ["Id4", "Id5"]
+
+    def test_phrase_near(self):
+        """
+        Test phrase and NEAR queries with both strategies, after changes and a merge.
+        """
+        documents = "Saya main sepak bola di lapangan. Bola sepak itu bulat. Ayam goreng di rumah makan."
+        for strategy in ("bitset", "postings"):
+            model = BooleanModel("indonesian", strategy=strategy, positional=True)
+            model.insert_documents(documents)
+
+            assert model.retrieve('"sepak bola"').names() == ["Id1"]
+            assert model.retrieve('"bola sepak"').names() == ["Id2"]
+            assert model.retrieve("sepak NEAR/1 bola").names() == ["Id1", "Id2"]
+            assert model.retrieve('"main sepak" NEAR/2 lapang').names() == ["Id1"]
+            assert model.retrieve('"main sepak" NEAR/1 lapang').names() == []
+            # stopwords are dropped from phrases and positions like from the documents
+            assert model.retrieve('"sepak bola" NEAR/1 lapang').names() == ["Id1"]
+            assert model.retrieve('"goreng di rumah" OR "sepak bola"').names() == [
+                "Id1",
+                "Id3",
+            ]
+            assert model.retrieve('bola AND NOT "sepak bola"').names() == ["Id2"]
+
+            model.add_documents("Sepak bola lagi.")
+            model.delete_documents(["Id1"])
+            assert model.retrieve('"sepak bola"').names() == ["Id4"]
+            model.merge_segments()
+            assert model.retrieve('"sepak bola"').names() == ["Id4"]
+
+        model = BooleanModel("indonesian")
+        model.insert_documents(documents)
+        for query in ('"sepak bola"', "sepak NEAR/1 bola", 'bola AND NOT "sepak bola"'):
+            result = model.retrieve(query)
+            assert not result.valid and result.names() == []
+        assert model.retrieve("sepak AND bola").names() == ["Id1", "Id2"]
+
+    def test_search_many(self):
+        """
+        Test the search_many method.
+        """
+        self.model.insert_documents(self.documents)
+        results = self.model.search_many(
+            [self.query, "ayam", "sekolah AND ayam", "NOT sekolah"]
+        )
+
+        assert [result["documents"] for result in results] == [
+            ["Id1", "Id2"],
+            ["Id3"],
+            [],
+            ["Id3"],
+        ]
+        assert results[0]["query"] == self.query.lower()
+
+    def test_strategy(self):
+        """
+        Test all strategies give the same result.
+        """
+        results = []
+        for strategy in BooleanModel.STRATEGIES:
+            model = BooleanModel("indonesian", strategy=strategy)
+            model.insert_documents(self.documents)
+            results.append(model.search_many([self.query, "ayam", "NOT sekolah"]))
+            model.compress_postings()
+            results.append(model.search_many([self.query, "ayam", "NOT sekolah"]))
+
+        assert all(result == results[0] for result in results)
+
+    def test_insert_stream(self):
+        """
+        Test the insert_stream method gives the same result as insert_documents.
+        """
+        model = BooleanModel("indonesian")
+        model.insert_stream(self.documents.split("."))
+
+        self.model.insert_documents(self.documents)
+
+        assert model.search_many([self.query]) == self.model.search_many([self.query])
+
+    def test_add_delete_update(self):
+        """
+        Test adding, deleting and updating documents without rebuilding.
+        """
+        model = BooleanModel("indonesian")
+        model.insert_documents(self.documents)
+
+        assert model.add_documents("Sekolah baru dekat rumah.") == ["Id4"]
+        assert model.search_many(["sekolah"])[0]["documents"] == ["Id1", "Id2", "Id4"]
+
+        model.delete_documents(["Id2"])
+        model.update_document("Id1", "Makanan enak.")
+        assert model.search_many(["sekolah"])[0]["documents"] == ["Id4"]
+        assert model.search_many(["not sekolah"])[0]["documents"] == ["Id1", "Id3"]
+
+        model.merge_segments(background=True).join()
+        assert model.search_many(["makan"])[0]["documents"] == ["Id1", "Id3"]
+
+    def test_delete_documents_failing_batch(self):
+        """
+        Test deleting a document twice in one call fails without deleting it.
+        """
+        model = BooleanModel("indonesian", cache=ResultCache())
+        model.insert_documents(self.documents)
+        assert model.retrieve("sekolah").names() == ["Id1", "Id2"]
+
+        with pytest.raises(KeyError):
+            model.delete_documents(["Id1", "Id1"])
+        assert model.retrieve("sekolah").names() == ["Id1", "Id2"]
+        assert model.get_index().doc_names == ["Id1", "Id2", "Id3"]
+
+        model.delete_documents(["Id1"])
+        assert model.retrieve("sekolah").names() == ["Id2"]
+        assert model.get_index().doc_names == ["Id2", "Id3"]
+
+    def test_cache(self):
+        """
+        Test queries with the same stemmed terms share a cached result until the documents change.
+        """
+        model = BooleanModel("indonesian", positional=True, cache=ResultCache())
+        model.insert_documents(self.documents)
+
+        assert model.retrieve("sekolah and not ayam").names() == ["Id1", "Id2"]
+        result = model.retrieve("Bersekolah  AND NOT ayam")
+        assert result.names() == ["Id1", "Id2"]
+        assert result.expression == "bersekolah & ~ayam"
+        assert model.retrieve('"makanan favorit"').names() == ["Id3"]
+        assert model.retrieve("lapang AND (").valid is False
+        assert (model.cache.hits, model.cache.misses) == (1, 2)
+
+        model.add_documents("Sekolah baru dekat rumah.")
+        assert model.retrieve("sekolah AND NOT ayam").names() == ["Id1", "Id2", "Id4"]
+        assert len(model.cache) == 1
+
+        # results are cached as document ids whatever the strategy
+        for strategy in ("bitset", "postings"):
+            model.strategy = strategy
+            _, doc_ids = model.evaluate_ids("sekolah AND NOT ayam")
+            assert doc_ids.tolist() == [0, 1, 3]
+            assert model.evaluate("sekolah AND NOT ayam")[1] == 0b1011
+        assert len(model.cache) == 1
@@ -0,0 +1,136 @@
+"""
+Test the boolean_query module.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.boolean_query import (
+    And,
+    Near,
+    Not,
+    Or,
+    Phrase,
+    Term,
+    Wildcard,
+    evaluate,
+    from_bitmask,
+    parse_query,
+    to_bitmask,
+    universe_mask,
+)
+
+
+class TestBooleanQuery:
+    postings = {"sekolah": [0, 1], "makan": [2], "ayam": [2], "sakit": [0]}
+    n_docs = 70
+
+    def lookup(self, word):
+        return to_bitmask(np.array(self.postings.get(word, []), dtype=int), self.n_docs)
+
+    def test_parse_query(self):
+        """
+        Test the parse_query function.
+        """
+        node = parse_query("Sekolah OR (makan AND NOT ayam)")
+
+        assert node == Or([Term("sekolah"), And([Term("makan"), Not(Term("ayam"))])])
+        assert str(node) == "sekolah | (makan & ~ayam)"
+        assert node.terms() == ["sekolah", "makan", "ayam"]
+
+    def test_parse_wildcard(self):
+        """
+        Test terms with "*" are parsed as wildcards.
+        """
+        node = parse_query("Sekol* AND NOT *bola")
+
+        assert node == And([Wildcard("sekol*"), Not(Wildcard("*bola"))])
+        assert str(node) == "sekol* & ~*bola"
+
+    def test_parse_phrase_near(self):
+        """
+        Test quoted phrases and NEAR/k.
+        """
+        node = parse_query('"Sepak Bola" NEAR/3 stadion AND NOT "bola"')
+
+        assert node == And(
+            [Near(Phrase(["sepak", "bola"]), Term("stadion"), 3), Not(Term("bola"))]
+        )
+        assert str(node) == '"sepak bola" NEAR/3 stadion & ~bola'
+        assert node.terms() == ["sepak", "bola", "stadion", "bola"]
+        assert parse_query("nearby near") == And([Term("nearby"), Term("near")])
+
+    def test_operator_precedence(self):
+        """
+        Test NOT binds tighter than AND and AND tighter than OR.
+        """
+        assert parse_query("a or b and not c") == Or(
+            [Term("a"), And([Term("b"), Not(Term("c"))])]
+        )
+        assert parse_query("a b") == And([Term("a"), Term("b")])
+
+    def test_invalid_query(self):
+        """
+        Test invalid queries raise ValueError.
+        """
+        for query in [
+            "",
+            "sekolah AND",
+            "(sekolah",
+            "sekolah )",
+            "OR ayam",
+            '"sepak bola',
+            '""',
+            "sepak NEAR/0 bola",
+            "sepak NEAR/2 (bola OR lapang)",
+            "sepak* NEAR/2 bola",
+            "NEAR/2 bola",
+        ]:
+            with pytest.raises(ValueError):
+                parse_query(query)
+
+    def test_evaluate(self):
+        """
+        Test the evaluate function.
+        """
+        universe = universe_mask(self.n_docs)
+
+        assert (
+            evaluate(
+                parse_query("sekolah OR (makan AND NOT ayam)"), self.lookup, universe
+            )
+            == 0b011
+        )
+        assert evaluate(parse_query("makan"), self.lookup, universe) == 0b100
+        assert (
+            evaluate(parse_query("sekolah AND NOT sakit"), self.lookup, universe)
+            == 0b010
+        )
+        assert evaluate(parse_query("gol"), self.lookup, universe) == 0
+
+    def test_not_universe(self):
+        """
+        Test NOT stays inside the universe of documents.
+        """
+        result = evaluate(
+            parse_query("NOT sekolah"), self.lookup, universe_mask(self.n_docs)
+        )
+
+        assert result > 0
+        assert from_bitmask(result, self.n_docs).tolist() == list(range(2, self.n_docs))
+
+    def test_bitmask(self):
+        """
+        Test the to_bitmask and from_bitmask functions.
+        """
+        doc_ids = np.array([0, 9, 64, 69])
+        mask = to_bitmask(doc_ids, self.n_docs)
+
+        assert mask == (1 << 0) | (1 << 9) | (1 << 64) | (1 << 69)
+        assert from_bitmask(mask, self.n_docs).tolist() == doc_ids.tolist()
@@ -0,0 +1,171 @@
+"""
+Test the export module.
+"""
+
+import csv
+import json
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from model.sparse_vector import SparseVectorModel
+from utils.export import has_pyarrow, ranked_chunks, resolve_format, write_chunks
+from utils.results import RankedResult
+
+
+class TestExport:
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+    query = "Stadion Lapangan Populer"
+
+    def model(self) -> SparseVectorModel:
+        model = SparseVectorModel("indonesian")
+        model.insert_documents(self.text)
+        model.delete_documents(["D2"])
+        model.add_documents("Stadion baru di kota.")
+        return model
+
+    def test_resolve_format(self):
+        """
+        Test the format is taken from the argument, then the extension.
+        """
+        assert resolve_format("out/terms.csv") == "csv"
+        assert resolve_format("out/terms.JSONL") == "jsonl"
+        assert resolve_format("out/terms.csv", "jsonl") == "jsonl"
+        assert resolve_format("out/terms") == ("parquet" if has_pyarrow() else "csv")
+        with pytest.raises(ValueError):
+            resolve_format("out/terms", "xlsx")
+
+    def test_write_chunks(self, tmp_path):
+        """
+        Test chunks are written as one CSV and JSON Lines table.
+        """
+        chunks = [
+            {"term": ["bola", "sepak"], "df": np.array([4, 4])},
+            {"term": ["kota"], "df": np.array([1])},
+        ]
+        path = str(tmp_path / "out" / "terms.csv")
+        assert write_chunks(chunks, path) == 3
+        with open(path, encoding="utf-8") as file:
+            assert list(csv.reader(file)) == [
+                ["term", "df"],
+                ["bola", "4"],
+                ["sepak", "4"],
+                ["kota", "1"],
+            ]
+
+        path = str(tmp_path / "terms.jsonl")
+        assert write_chunks(chunks, path) == 3
+        with open(path, encoding="utf-8") as file:
+            assert json.loads(file.readlines()[2]) == {"term": "kota", "df": 1}
+        assert not os.path.exists(f"{path}.tmp")
+
+    def test_term_statistics(self, tmp_path):
+        """
+        Test the exported term statistics match the index, in any chunk size.
+        """
+        model = self.model()
+        index = model.index
+        chunks = list(model.iter_term_statistics(chunk_size=4))
+
+        assert all(len(chunk["term"]) <= 4 for chunk in chunks)
+        assert sum((chunk["term"] for chunk in chunks), []) == index.terms
+        assert (
+            np.concatenate([chunk["df"] for chunk in chunks]).tolist()
+            == index.document_frequency().tolist()
+        )
+        assert (
+            np.concatenate([chunk["cf"] for chunk in chunks]).tolist()
+            == index.collection_frequency().tolist()
+        )
+
+        path = model.export_terms(str(tmp_path / "terms.jsonl"), chunk_size=4)
+        with open(path, encoding="utf-8") as file:
+            rows = [json.loads(line) for line in file]
+        bola = next(row for row in rows if row["term"] == "bola")
+        assert bola["df"] == 4 and bola["idf"] == np.log10(5 / 4)
+
+    def test_vectors(self, tmp_path):
+        """
+        Test the exported weights are the ones search scores with.
+        """
+        model = self.model()
+        chunks = list(model.iter_vectors(chunk_size=5))
+        assert all(len(chunk["term"]) <= 5 for chunk in chunks)
+        assert sum(len(chunk["term"]) for chunk in chunks) == model.index.nnz
+
+        rows = [
+            row
+            for chunk in chunks
+            for row in zip(chunk["term"], chunk["document"], chunk["weight"].tolist())
+        ]
+        for term in ("stadion", "lapang"):
+            doc_ids, weights = model.term_weights(model.segments.term_id(term))
+            expected = [
+                (term, model.segments.doc_names[d], w)
+                for d, w in zip(doc_ids.tolist(), weights.tolist())
+            ]
+            assert [row for row in rows if row[0] == term] == expected
+
+        path = model.export_vectors(str(tmp_path / "vectors.csv"), chunk_size=5)
+        with open(path, encoding="utf-8") as file:
+            assert sum(1 for _ in file) == model.index.nnz + 1
+
+    def test_results(self, tmp_path):
+        """
+        Test ranked results are exported in order, split across chunks.
+        """
+        model = self.model()
+        queries = [self.query, "sepak bola", "gawang"]
+        chunks = list(
+            ranked_chunks(
+                (model.retrieve(query, k=3) for query in queries), chunk_size=2
+            )
+        )
+        assert [len(chunk["rank"]) for chunk in chunks] == [2, 2, 2]
+        assert list(ranked_chunks([])) == [
+            {"query": [], "rank": [], "document": [], "score": []}
+        ]
+
+        path = model.export_results(
+            queries, str(tmp_path / "results.csv"), k=3, chunk_size=2
+        )
+        with open(path, encoding="utf-8") as file:
+            rows = list(csv.DictReader(file))
+        expected = model.search(self.query, k=3)
+        assert [(row["document"], float(row["score"])) for row in rows[:3]] == expected
+        assert [row["rank"] for row in rows] == ["1", "2", "3", "1", "2", "3"]
+
+    def test_results_long(self):
+        """
+        Test one result longer than several chunks is split in order.
+        """
+        names = [f"D{i}" for i in range(1, 12)]
+        result = RankedResult("bola", np.arange(11), np.linspace(1, 0, 11), names)
+        chunks = list(ranked_chunks([result, result], chunk_size=3))
+
+        assert [len(chunk["rank"]) for chunk in chunks] == [3] * 7 + [1]
+        ranks = [rank for chunk in chunks for rank in chunk["rank"]]
+        assert ranks == list(range(1, 12)) * 2
+        documents = [name for chunk in chunks for name in chunk["document"]]
+        assert documents == names * 2
+
+    def test_parquet(self, tmp_path):
+        """
+        Test Parquet export when pyarrow is installed.
+        """
+        pq = pytest.importorskip("pyarrow.parquet")
+        model = self.model()
+        path = model.export_vectors(str(tmp_path / "vectors.parquet"), chunk_size=5)
+        table = pq.read_table(path)
+        assert table.num_rows == model.index.nnz
+        assert table.column_names == ["term", "document", "tf", "weight"]
@@ -0,0 +1,76 @@
+"""
+Test the inverted_index module.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.inverted_index import IndexBuilder, InvertedIndex
+from pandas.core.frame import DataFrame
+
+
+class TestInvertedIndex:
+    tokens = [
+        ["sepak", "bola", "stadion"],
+        ["main", "sepak", "bola", "bola"],
+        ["lapang"],
+    ]
+    index = InvertedIndex.from_tokens(tokens)
+
+    def test_vocabulary(self):
+        """
+        Test the vocabulary is in first-seen order.
+        """
+        assert self.index.terms == ["sepak", "bola", "stadion", "main", "lapang"]
+        assert self.index.term_id("bola") == 1
+        assert self.index.term_id("gol") is None
+        assert self.index.n_docs == 3
+        assert self.index.nnz == 7
+
+    def test_postings(self):
+        """
+        Test the postings method.
+        """
+        doc_ids, tfs = self.index.postings("bola")
+
+        assert doc_ids.tolist() == [0, 1]
+        assert tfs.tolist() == [1, 2]
+        assert self.index.postings("gol")[0].tolist() == []
+
+    def test_frequency(self):
+        """
+        Test the document_frequency and collection_frequency methods.
+        """
+        assert self.index.document_frequency().tolist() == [2, 2, 1, 1, 1]
+        assert self.index.collection_frequency().tolist() == [2, 3, 1, 1, 1]
+        assert self.index.doc_lengths.tolist() == [3, 4, 1]
+
+    def test_to_dataframe(self):
+        """
+        Test the to_dataframe method.
+        """
+        df = self.index.to_dataframe()
+
+        assert isinstance(df, DataFrame)
+        assert df.loc["bola"].tolist() == [1, 2, 0]
+        assert self.index.to_dataframe(binary=True).loc["bola"].tolist() == [1, 1, 0]
+
+    def test_index_builder(self):
+        """
+        Test the IndexBuilder class gives the same index as from_tokens.
+        """
+        builder = IndexBuilder()
+        doc_ids = [builder.add_document(sentence) for sentence in self.tokens]
+        index = builder.build()
+
+        assert doc_ids == [0, 1, 2]
+        assert index.terms == self.index.terms
+        assert index.indices.tolist() == self.index.indices.tolist()
+        assert index.data.tolist() == self.index.data.tolist()
+        assert (
+            InvertedIndex.from_tokens(iter(self.tokens)).indptr.tolist()
+            == self.index.indptr.tolist()
+        )
@@ -0,0 +1,117 @@
+"""
+Test the metrics module.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from model.boolean import BooleanModel
+from model.sparse_vector import SparseVectorModel
+from utils.metrics import Metrics, collect, current_metrics
+
+
+class TestMetrics:
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+    query = "Stadion Lapangan Populer"
+
+    def test_collect(self):
+        """
+        Test collect activates metrics only inside the with block, and nests.
+        """
+        assert current_metrics() is None
+        with collect() as outer:
+            assert current_metrics() is outer
+            with collect() as inner:
+                assert current_metrics() is inner
+            assert current_metrics() is outer
+        assert current_metrics() is None
+
+    def test_record(self):
+        """
+        Test timers, counters, callbacks and reset.
+        """
+        events = []
+        metrics = Metrics(
+            [lambda kind, name, value: events.append((kind, name, value))]
+        )
+        metrics.add_time("a", 0.5)
+        metrics.add_time("a", 0.25)
+        metrics.add_time("b", 1.0)
+        metrics.increment("n", 3)
+
+        report = metrics.report()
+        assert list(report["timers"]) == ["b", "a"]
+        assert report["timers"]["a"] == {"seconds": 0.75, "calls": 2}
+        assert report["counters"] == {"n": 3}
+        assert events[-1] == ("counter", "n", 3)
+
+        metrics.reset()
+        assert metrics.report() == {"timers": {}, "counters": {}}
+
+    def test_pipeline(self):
+        """
+        Test indexing and searching report each stage, with the same results.
+        """
+        model = SparseVectorModel("indonesian")
+        model.insert_documents(self.text)
+        expected = model.search(self.query, k=3)
+
+        with collect() as metrics:
+            model = SparseVectorModel("indonesian")
+            model.insert_documents(self.text)
+            assert model.search(self.query, k=3) == expected
+
+        timers, counters = metrics.timers, metrics.counters
+        for name in (
+            "preprocess",
+            "preprocess.tokenizer",
+            "preprocess.stemmer",
+            "index.build",
+            "search",
+            "search.top_k",
+        ):
+            assert name in timers
+        # 5 sentences, the empty text after the last "." and the query
+        assert counters["preprocess.documents"] == 7
+        assert counters["index.documents"] == 5
+        assert counters["search.queries"] == 1
+        assert counters["search.documents_scored"] == 4
+        assert counters["search.postings"] == 4
+        # words stemmed to "" (punctuation) are looked up but not kept
+        assert (
+            counters["stem_cache.hits"] + counters["stem_cache.misses"]
+            >= counters["preprocess.words"]
+        )
+
+    def test_boolean(self):
+        """
+        Test boolean queries count the postings they read.
+        """
+        model = BooleanModel("indonesian")
+        model.insert_documents(self.text)
+
+        with collect() as metrics:
+            model.search_many(["lapangan AND NOT stadion"])
+
+        assert metrics.counters["boolean.queries"] == 1
+        assert metrics.counters["boolean.postings"] == 3
+
+    def test_disabled(self):
+        """
+        Test the timed pipeline is only created while collecting.
+        """
+        model = SparseVectorModel("indonesian")
+        model.insert_documents(self.text)
+        model.search(self.query)
+        assert model.preprocess._timed_pipeline is None
+
+        with collect():
+            model.search(self.query)
+        assert model.preprocess._timed_pipeline is not None
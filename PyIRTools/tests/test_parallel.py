@@ -0,0 +1,47 @@
+"""
+Test the parallel module.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.preprocess import Preprocess
+from utils.inverted_index import InvertedIndex
+from utils.parallel import build_index_parallel, iter_shards
+
+
+class TestParallel:
+    preprocess = Preprocess("indonesian")
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+
+    def test_iter_shards(self):
+        """
+        Test the iter_shards function.
+        """
+        assert list(iter_shards(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    def test_build_index_parallel(self):
+        """
+        Test the parallel build gives the same index as a single process.
+        """
+        expected = InvertedIndex.from_tokens(self.preprocess.preprocess_text(self.text))
+        index = build_index_parallel(
+            self.text.split(".") * 3, self.preprocess, workers=2, shard_size=2
+        )
+        single = InvertedIndex.from_tokens(
+            self.preprocess.preprocess_text(self.text * 3)
+        )
+
+        assert index.terms == expected.terms
+        assert index.doc_names == single.doc_names
+        assert index.indptr.tolist() == single.indptr.tolist()
+        assert index.indices.tolist() == single.indices.tolist()
+        assert index.data.tolist() == single.data.tolist()
+        assert index.doc_lengths.tolist() == single.doc_lengths.tolist()
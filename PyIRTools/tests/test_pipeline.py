@@ -0,0 +1,73 @@
+"""
+Test the pipeline module.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.pipeline import Pipeline, expand_ngrams
+
+
+class TestPipeline:
+    stems = {"bermain": "main", "bolanya": "bola", "x": ""}
+
+    def make(self, **kwargs) -> Pipeline:
+        return Pipeline(
+            tokenizer=str.split,
+            stopwords={"saya", "di"},
+            stemmer=lambda token: self.stems.get(token, token),
+            **kwargs,
+        )
+
+    def test_pipeline(self):
+        """
+        Test tokens are normalized, filtered and stemmed in order.
+        """
+        pipeline = self.make()
+
+        assert pipeline("Saya BERMAIN bolanya di lapangan x") == [
+            "main",
+            "bola",
+            "lapangan",
+        ]
+        assert Pipeline(str.split, normalizer=None)("Saya Main") == ["Saya", "Main"]
+
+    def test_ngrams(self):
+        """
+        Test n-gram expansion.
+        """
+        words = ["a", "b", "c"]
+
+        assert expand_ngrams(words, (1, 2)) == ["a", "b", "c", "a b", "b c"]
+        assert expand_ngrams(words, (2, 3), "_") == ["a_b", "b_c", "a_b_c"]
+        assert self.make(ngram_range=(1, 2))("saya bermain bola") == [
+            "main",
+            "bola",
+            "main bola",
+        ]
+
+        try:
+            Pipeline(str.split, ngram_range=(2, 1))
+            assert False
+        except ValueError:
+            pass
+
+    def test_timed(self):
+        """
+        Test the timed pipeline gives the same tokens and counts each stage.
+        """
+        timed = self.make(timed=True, ngram_range=(1, 2))
+        text = "Saya BERMAIN bolanya di lapangan x"
+
+        assert timed(text) == self.make(ngram_range=(1, 2))(text)
+        report = timed.report()
+        assert report["tokenizer"]["calls"] == 1
+        assert report["stopwords"]["calls"] == 6
+        assert report["stemmer"]["calls"] == 4
+        assert report["ngrams"]["calls"] == 3
+
+        timed.reset_timings()
+        assert timed.report()["stemmer"] == {"seconds": 0.0, "calls": 0, "share": 0.0}
@@ -0,0 +1,147 @@
+"""
+Test the positions module.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.boolean_query import parse_query
+from utils.inverted_index import IndexBuilder, InvertedIndex
+from utils.positions import PositionalPostings, ranges
+from utils.postings import PostingsEvaluator
+from utils.segments import SegmentedIndex
+
+
+class TestPositions:
+    tokens = [
+        ["main", "sepak", "bola", "lapang"],
+        ["bola", "sepak", "bulat", "bola"],
+        ["sepak", "bola", "sepak", "bola", "stadion"],
+        ["lapang"],
+    ]
+
+    def test_ranges(self):
+        """
+        Test the ranges function.
+        """
+        assert ranges(np.array([5, 0, 9]), np.array([2, 0, 3])).tolist() == [
+            5,
+            6,
+            9,
+            10,
+            11,
+        ]
+        assert ranges(np.array([]), np.array([])).tolist() == []
+
+    def test_positional_postings(self):
+        """
+        Test PositionalPostings decodes any postings back to their positions.
+        """
+        groups = [[0, 3, 200], [7], [1, 2], [100_000, 100_001]]
+        counts = np.array([len(group) for group in groups])
+        positions = PositionalPostings.from_groups(np.concatenate(groups), counts)
+
+        assert len(positions) == 4
+        assert positions.offsets.dtype == np.uint32
+        assert positions.take(np.arange(4), counts).tolist() == sum(groups, [])
+        assert positions.take(np.array([3, 1]), counts[[3, 1]]).tolist() == [
+            100_000,
+            100_001,
+            7,
+        ]
+
+    def test_term_positions(self):
+        """
+        Test the term_positions method of a positional index.
+        """
+        index = InvertedIndex.from_tokens(self.tokens, positional=True)
+
+        docs, positions = index.term_positions("bola")
+        assert docs.tolist() == [0, 1, 1, 2, 2]
+        assert positions.tolist() == [2, 0, 3, 1, 3]
+
+        docs, positions = index.term_positions(
+            "bola", mask=np.array([False, True, False])
+        )
+        assert docs.tolist() == [1, 1] and positions.tolist() == [0, 3]
+        assert index.term_positions("gawang")[0].tolist() == []
+        assert index.postings("bola")[1].tolist() == [1, 2, 2]
+
+        with pytest.raises(ValueError):
+            InvertedIndex.from_tokens(self.tokens).term_positions("bola")
+
+    def test_builder_merge(self):
+        """
+        Test merging positional builders gives the same positions as one builder.
+        """
+        first, second = IndexBuilder(positional=True), IndexBuilder(positional=True)
+        for words in self.tokens[:2]:
+            first.add_document(words)
+        for words in self.tokens[2:]:
+            second.add_document(words)
+        first.merge(second)
+
+        merged = first.build()
+        single = InvertedIndex.from_tokens(self.tokens, positional=True)
+        for term in single.terms:
+            assert (
+                merged.term_positions(term)[1].tolist()
+                == single.term_positions(term)[1].tolist()
+            )
+
+        with pytest.raises(ValueError):
+            IndexBuilder().merge(IndexBuilder(positional=True))
+
+    def test_evaluate_phrase_near(self):
+        """
+        Test phrase and NEAR queries against a scan of the documents.
+        """
+        rng = np.random.default_rng(0)
+        words = ["sepak", "bola", "lapang", "stadion", "main"]
+        tokens = [rng.choice(words, rng.integers(1, 12)).tolist() for _ in range(200)]
+
+        segments = SegmentedIndex.from_index(
+            InvertedIndex.from_tokens(tokens[:150], positional=True)
+        )
+        segments.add_documents(tokens[150:])
+        segments.delete_documents([4, 160])
+        live = {i: doc for i, doc in enumerate(tokens) if i not in (4, 160)}
+
+        def occurrences(doc, phrase):
+            return [i for i in range(len(doc)) if doc[i : i + len(phrase)] == phrase]
+
+        for merged in (False, True):
+            if merged:
+                segments.merge_segments()
+            evaluator = PostingsEvaluator(
+                lambda word: segments.postings(word)[0],
+                segments.n_docs,
+                segments.live_ids(),
+                get_positions=segments.term_positions,
+            )
+            for a, b, c in rng.choice(words, (30, 3)).tolist():
+                expected = [i for i, doc in live.items() if occurrences(doc, [a, b, c])]
+                assert (
+                    evaluator.evaluate(parse_query(f'"{a} {b} {c}"')).tolist()
+                    == expected
+                )
+
+                expected = [
+                    i
+                    for i, doc in live.items()
+                    if any(
+                        max(t - s - 1, s - t) <= 2
+                        for s in occurrences(doc, [a, b])
+                        for t in occurrences(doc, [c])
+                    )
+                ]
+                assert (
+                    evaluator.evaluate(parse_query(f'"{a} {b}" NEAR/2 {c}')).tolist()
+                    == expected
+                )
@@ -0,0 +1,122 @@
+"""
+Test the postings module.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.boolean_query import parse_query
+from utils.postings import (
+    BLOCK_SIZE,
+    CompressedPostings,
+    PostingsEvaluator,
+    choose_strategy,
+    decode_varint,
+    encode_varint,
+    intersect_sorted,
+    union,
+)
+
+
+class TestPostings:
+    rng = np.random.default_rng(0)
+    n_docs = 100_000
+    postings = {
+        "bola": np.sort(rng.choice(n_docs, 20_000, replace=False)),
+        "sepak": np.sort(rng.choice(n_docs, 30_000, replace=False)),
+        "stadion": np.array([5, 17, 250, 99_999]),
+    }
+
+    def test_varint(self):
+        """
+        Test the encode_varint and decode_varint functions.
+        """
+        values = np.array([0, 1, 127, 128, 300, 2**31, 2**40])
+        encoded = encode_varint(values)
+
+        assert encoded.dtype == np.uint8
+        assert len(encode_varint(np.array([127]))) == 1
+        assert len(encode_varint(np.array([128]))) == 2
+        assert decode_varint(encoded).tolist() == values.tolist()
+
+    def test_compressed_postings(self):
+        """
+        Test CompressedPostings decodes to the original ids and is smaller.
+        """
+        doc_ids = self.postings["bola"]
+        compressed = CompressedPostings.from_array(doc_ids)
+
+        assert len(compressed) == len(doc_ids)
+        assert len(compressed.block_first) == -(-len(doc_ids) // BLOCK_SIZE)
+        assert compressed.to_array().tolist() == doc_ids.tolist()
+        assert compressed.nbytes < doc_ids.astype(np.int32).nbytes
+
+    def test_intersect(self):
+        """
+        Test intersections with arrays and compressed postings.
+        """
+        expected = np.intersect1d(self.postings["bola"], self.postings["sepak"])
+        compressed = CompressedPostings.from_array(self.postings["sepak"])
+
+        assert (
+            intersect_sorted(self.postings["bola"], self.postings["sepak"]).tolist()
+            == expected.tolist()
+        )
+        assert compressed.intersect(self.postings["bola"]).tolist() == expected.tolist()
+        assert compressed.intersect(np.array([], dtype=int)).tolist() == []
+
+    def test_union(self):
+        """
+        Test the union function.
+        """
+        result = union(
+            [np.array([1, 5, 9]), np.array([2, 5, 10]), np.array([], dtype=int)]
+        )
+
+        assert result.tolist() == [1, 2, 5, 9, 10]
+
+    def test_evaluator(self):
+        """
+        Test PostingsEvaluator against set operations.
+        """
+        evaluator = PostingsEvaluator(
+            lambda word: self.postings.get(word, np.array([], dtype=int)), self.n_docs
+        )
+        bola, sepak = set(self.postings["bola"].tolist()), set(
+            self.postings["sepak"].tolist()
+        )
+        everything = set(range(self.n_docs))
+
+        assert (
+            set(evaluator.evaluate(parse_query("bola AND sepak")).tolist())
+            == bola & sepak
+        )
+        assert (
+            set(evaluator.evaluate(parse_query("bola AND NOT sepak")).tolist())
+            == bola - sepak
+        )
+        assert set(
+            evaluator.evaluate(parse_query("bola OR stadion")).tolist()
+        ) == bola | {5, 17, 250, 99_999}
+        assert (
+            set(evaluator.evaluate(parse_query("NOT bola")).tolist())
+            == everything - bola
+        )
+        assert evaluator.evaluate(parse_query("gol AND bola")).tolist() == []
+
+    def test_choose_strategy(self):
+        """
+        Test selective queries use postings and broad queries use bitsets.
+        """
+        evaluator = PostingsEvaluator(
+            lambda word: self.postings.get(word, np.array([], dtype=int)), self.n_docs
+        )
+
+        assert choose_strategy(evaluator, parse_query("stadion AND bola")) == "postings"
+        assert choose_strategy(evaluator, parse_query("bola OR sepak")) == "bitset"
+        assert choose_strategy(evaluator, parse_query("NOT stadion")) == "bitset"
@@ -60,3 +60,105 @@ class TestPreprocess:
         count_word = self.preprocess.count_word(tokens)
 
         assert isinstance(count_word, DataFrame)
+
+    def test_stem_cache(self):
+        """
+        Test the stem cache gives the same result as the stemmer.
+        """
+        preprocess = Preprocess("indonesian", cache_size=10)
+        words = ["pemrosesan", "belajar", "pemrosesan", "makanan"]
+
+        assert [preprocess.stem(word) for word in words] == [
+            preprocess.stemmer.stem(word) for word in words
+        ]
+        assert preprocess.stem_cache.hits == 1
+        assert preprocess.stem_cache.misses == 3
+
+    def test_stemmer(self):
+        """
+        Test the shared stemmer stems like the one of Sastrawi's StemmerFactory.
+        """
+        from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+
+        reference = StemmerFactory().create_stemmer()
+        words = self.text.lower().replace(".", "").split() + [
+            "makanan",
+            "mempermainkan",
+            "sepatunya",
+        ]
+
+        assert [self.preprocess.stemmer.stem(word) for word in words] == [
+            reference.stem(word) for word in words
+        ]
+
+    def test_preprocess_stream(self, tmp_path):
+        """
+        Test the preprocess_stream method gives the same tokens as preprocess_text.
+        """
+        path = tmp_path / "text.txt"
+        path.write_text(self.text, encoding="utf-8")
+        expected = self.preprocess.preprocess_text(self.text)
+
+        assert list(self.preprocess.preprocess_stream(str(path))) == expected
+        assert list(self.preprocess.preprocess_stream(self.text.split("."))) == expected
+
+    def test_read_sentences(self, tmp_path):
+        """
+        Test sentences split across chunks are read whole.
+        """
+        path = tmp_path / "text.txt"
+        path.write_text(self.text, encoding="utf-8")
+
+        assert list(
+            self.preprocess.read_sentences(str(path), chunk_size=7)
+        ) == self.text.split(".")
+
+    def test_count_word_values(self):
+        """
+        Test the count_word, count_query and remove_duplicate values.
+        """
+        tokens = [["bola", "sepak", "bola"], ["lapang"]]
+        count_word = self.preprocess.count_word(tokens)
+
+        assert self.preprocess.remove_duplicate(tokens) == ["bola", "sepak", "lapang"]
+        assert count_word.index.tolist() == ["bola", "sepak", "lapang"]
+        assert count_word.columns.tolist() == ["D1", "D2"]
+        assert count_word.loc["bola"].tolist() == [2, 0]
+        assert self.preprocess.count_query(["bola", "sepak", "bola"])[
+            "Query"
+        ].tolist() == [2, 1]
+
+    def test_shared_resources(self):
+        """
+        Test instances share stopwords and stemmer but not the stem cache.
+        """
+        other = Preprocess("indonesian")
+
+        assert other.stopwords is self.preprocess.stopwords
+        assert other.stemmer is self.preprocess.stemmer
+        assert other.stem_cache is not self.preprocess.stem_cache
+        assert other.stem("bermain") == "main"
+
+    def test_ngram_range(self):
+        """
+        Test n-grams are added after stopword removal and stemming.
+        """
+        preprocess = Preprocess("indonesian", ngram_range=(1, 2))
+        words = preprocess.preprocess_query(self.query)
+
+        assert words[:4] == self.preprocess.preprocess_query(self.query)
+        assert words[4:] == [" ".join(pair) for pair in zip(words[:3], words[1:4])]
+
+    def test_timings(self):
+        """
+        Test the timed pipeline reports every stage.
+        """
+        preprocess = Preprocess("indonesian", timed=True)
+
+        assert preprocess.preprocess_text(self.text) == self.preprocess.preprocess_text(
+            self.text
+        )
+        timings = preprocess.timings()
+        assert timings["tokenizer"]["calls"] == 3
+        assert timings["stemmer"]["calls"] > 0
+        assert abs(sum(stage["share"] for stage in timings.values()) - 1) < 1e-9
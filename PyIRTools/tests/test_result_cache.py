@@ -0,0 +1,109 @@
+"""
+Test the result_cache module.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.metrics import collect
+from utils.result_cache import ResultCache, estimate_size
+
+
+class TestResultCache:
+    def test_lru(self):
+        """
+        Test the least recently used entry is evicted first.
+        """
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats() == {
+            "hits": 3,
+            "misses": 1,
+            "hit_rate": 0.75,
+            "evictions": 1,
+            "entries": 2,
+            "nbytes": cache.nbytes,
+        }
+
+    def test_max_bytes(self):
+        """
+        Test entries are evicted to stay within max_bytes, and a result
+        larger than max_bytes is not cached.
+        """
+        value = np.zeros(100)
+        size = estimate_size("a") + estimate_size(value)
+        cache = ResultCache(maxsize=None, max_bytes=2 * size)
+        for key in "abc":
+            cache.put(key, np.zeros(100))
+
+        assert len(cache) == 2 and cache.nbytes == 2 * size
+        assert cache.get("a") is None and cache.get("c") is not None
+
+        cache.put("d", np.zeros(1000))
+        assert cache.get("d") is None and len(cache) == 2
+
+    def test_ttl(self):
+        """
+        Test entries expire after ttl seconds.
+        """
+        now = [0.0]
+        cache = ResultCache(ttl=10, clock=lambda: now[0])
+        cache.put("a", 1)
+        now[0] = 9.5
+        assert cache.get("a") == 1
+        now[0] = 10
+        assert cache.get("a") is None
+        assert len(cache) == 0 and cache.nbytes == 0
+
+    def test_version(self):
+        """
+        Test a lookup for another index version empties the cache.
+        """
+        cache = ResultCache()
+        cache.put("a", 1, version=1)
+        assert cache.get("a", version=1) == 1
+        assert cache.get("a", version=2) is None
+        assert len(cache) == 0
+        cache.put("a", 2, version=2)
+        assert cache.get("a", version=2) == 2
+
+    def test_read_only(self):
+        """
+        Test cached arrays cannot be changed through a result.
+        """
+        cache = ResultCache()
+        cache.put("a", (np.arange(3), np.ones(3)))
+        doc_ids, _ = cache.get("a")
+        with pytest.raises(ValueError):
+            doc_ids[0] = 5
+
+    def test_metrics(self):
+        """
+        Test hits, misses and evictions are counted in the active metrics.
+        """
+        cache = ResultCache(maxsize=1, name="search.cache")
+        with collect() as metrics:
+            cache.get("a")
+            cache.put("a", 1)
+            cache.put("b", 2)
+            cache.get("b")
+
+        assert metrics.counters == {
+            "search.cache.hits": 1,
+            "search.cache.misses": 1,
+            "search.cache.evictions": 1,
+        }
+        cache.clear()
+        assert len(cache) == 0 and cache.hit_rate == 0.0
@@ -0,0 +1,85 @@
+"""
+Test the results and formatting modules.
+"""
+
+import numpy as np
+import pytest
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.formatting import (
+    format_boolean,
+    format_ranked,
+    join_names,
+    ranked_to_dataframe,
+)
+from utils.results import BooleanResult, RankedResult
+
+
+class TestResults:
+    doc_names = ["D1", "D2", "D3"]
+
+    def test_ranked(self):
+        """
+        Test names and items of a ranked result.
+        """
+        result = RankedResult(
+            "bola", np.array([2, 0]), np.array([0.9, 0.1]), self.doc_names
+        )
+
+        assert len(result) == 2
+        assert result.names() == ["D3", "D1"]
+        assert result.items() == [("D3", 0.9), ("D1", 0.1)]
+        assert repr(result) == "RankedResult(query='bola', documents=2)"
+
+    def test_slots(self):
+        """
+        Test results have no instance dict.
+        """
+        result = BooleanResult("bola", "bola", np.array([1]), self.doc_names)
+
+        assert not hasattr(result, "__dict__")
+        with pytest.raises(AttributeError):
+            result.extra = 1
+
+    def test_format_ranked(self):
+        """
+        Test a ranked result formats like get_relevant_document_index prints.
+        """
+        result = RankedResult(
+            "bola", np.array([1, 0]), np.array([0.5, 0.25]), self.doc_names
+        )
+
+        assert format_ranked(result) == "Most Relevant Document: D2"
+        assert format_ranked(result, verbose=True).startswith("Relevant Document:\n")
+        assert ranked_to_dataframe(result)["Document"].tolist() == ["D2", "D1"]
+
+    def test_format_boolean(self):
+        """
+        Test a boolean result formats like BooleanModel.search prints.
+        """
+        result = BooleanResult("a or b", "a | b", np.array([0, 1]), self.doc_names)
+
+        assert format_boolean(result).splitlines() == [
+            "Your query: a or b",
+            "Boolean Expression: a | b",
+            "Result: 3",
+            "Result Query: D1 and D2",
+        ]
+
+        invalid = BooleanResult(
+            "a and (",
+            "a and (",
+            np.zeros(0, dtype=np.int64),
+            self.doc_names,
+            valid=False,
+        )
+        assert format_boolean(invalid).splitlines()[2:] == [
+            "Result: None",
+            "Result Query: None",
+        ]
+        assert join_names(["D1", "D2", "D3"]) == "D1, D2, and D3"
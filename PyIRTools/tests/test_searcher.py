@@ -0,0 +1,101 @@
+"""
+Test the searcher module.
+"""
+
+import asyncio
+import subprocess
+
+import pytest
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from model.searcher import Searcher, main
+from model.sparse_vector import SparseVectorModel
+
+
+class TestSearcher:
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+    query = "Stadion Lapangan Populer"
+
+    def test_search(self, tmp_path):
+        """
+        Test the searcher gives the same results as the model that built the index.
+        """
+        model = SparseVectorModel("indonesian")
+        path = model.build_index(self.text, str(tmp_path / "index"))
+        searcher = Searcher(path)
+
+        assert searcher.search(self.query, k=3) == model.search(self.query, k=3)
+        assert searcher.search_boolean("lapangan AND NOT stadion") == ["D2", "D3"]
+        assert searcher.search_boolean("lapangan AND (") == []
+        # the index of a SparseVectorModel has no positions
+        assert searcher.search_boolean('"sepak bola"') == []
+        assert searcher.search_boolean("sepak NEAR/1 bola") == []
+
+        cached = Searcher(path, cache_bytes=1 << 20)
+        for _ in range(2):
+            assert cached.search(self.query, k=3) == model.search(self.query, k=3)
+            assert cached.search_boolean("lapangan AND NOT stadion") == ["D2", "D3"]
+        assert cached.ranked.cache.hits == cached.boolean.cache.hits == 1
+
+    def test_concurrent(self, tmp_path):
+        """
+        Test thread pool and asyncio searches over one shared index.
+        """
+        path = SparseVectorModel("indonesian").build_index(
+            self.text, str(tmp_path / "index")
+        )
+        searcher = Searcher(path, mmap=False)
+        queries = [self.query, "sepak bola", "lapangan", "dunia populer"] * 10
+        expected = [searcher.search(query, k=3) for query in queries]
+
+        assert searcher.search_many(queries, k=3, workers=4) == expected
+
+        async def serve():
+            ranked = asyncio.gather(
+                *(searcher.asearch(query, k=3) for query in queries)
+            )
+            boolean = searcher.asearch_boolean("lapangan AND NOT stadion")
+            return await ranked, await boolean
+
+        assert asyncio.run(serve()) == (expected, ["D2", "D3"])
+
+        with pytest.raises(ValueError):
+            searcher.index.data[0] = 0
+
+    def test_main(self, tmp_path, capsys):
+        """
+        Test the command line entry point.
+        """
+        path = SparseVectorModel("indonesian").build_index(
+            self.text, str(tmp_path / "index")
+        )
+        main([path, self.query, "-k", "2", "--weighting", "bm25"])
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == f"Query: {self.query}"
+        assert len(lines) == 3
+
+    def test_lazy_imports(self):
+        """
+        Test importing the searcher does not import pandas, inflect, NLTK or asyncio.
+        """
+        code = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import model.searcher; "
+            "print(sorted({'pandas', 'inflect', 'nltk', 'Sastrawi', 'asyncio'} & set(sys.modules)))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code, dir_path],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert output.strip() == "[]"
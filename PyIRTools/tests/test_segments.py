@@ -0,0 +1,142 @@
+"""
+Test the segments module.
+"""
+
+import numpy as np
+import pytest
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.inverted_index import InvertedIndex
+from utils.segments import SegmentedIndex
+
+
+def rebuilt_norms(index: InvertedIndex) -> np.ndarray:
+    idf = np.log10(index.n_docs / index.document_frequency())
+    tf_idf = index.to_dataframe().to_numpy() * idf[:, None]
+    return np.sqrt((tf_idf**2).sum(axis=0))
+
+
+class TestSegmentedIndex:
+    tokens = [["sepak", "bola", "sepak"], ["bola", "stadion"], ["lapang", "bola"]]
+
+    def setup_method(self):
+        self.segments = SegmentedIndex.from_index(
+            InvertedIndex.from_tokens(self.tokens)
+        )
+
+    def test_add_documents(self):
+        """
+        Test added documents get new ids and names.
+        """
+        assert self.segments.add_documents([["gol"], ["sepak", "gol"]]) == [3, 4]
+        assert self.segments.doc_names == ["D1", "D2", "D3", "D4", "D5"]
+        assert len(self.segments.segments) == 2
+        assert self.segments.postings("sepak")[0].tolist() == [0, 4]
+        assert self.segments.document_frequency()[self.segments.term_id("gol")] == 2
+
+    def test_delete_documents(self):
+        """
+        Test deleted documents leave postings, DF and the compacted index.
+        """
+        self.segments.delete_documents([1])
+
+        assert self.segments.n_docs == 2
+        assert self.segments.postings("bola")[0].tolist() == [0, 2]
+        assert self.segments.postings("stadion")[0].tolist() == []
+        assert self.segments.compact().doc_names == ["D1", "D3"]
+        assert "stadion" not in self.segments.compact().terms
+
+        try:
+            self.segments.delete_documents([1])
+            assert False
+        except KeyError:
+            pass
+
+    def test_delete_documents_failing_batch(self):
+        """
+        Test a batch with a repeated or unknown id deletes nothing.
+        """
+        compacted = self.segments.compact()
+        version = self.segments.version
+        for doc_ids in ([0, 0], [0, 7], [0, 1, 1]):
+            try:
+                self.segments.delete_documents(doc_ids)
+                assert False
+            except KeyError:
+                pass
+
+        assert self.segments.version == version and self.segments.n_docs == 3
+        assert self.segments.compact() is compacted
+        assert self.segments.postings("bola")[0].tolist() == [0, 1, 2]
+        assert self.segments.document_frequency()[self.segments.term_id("bola")] == 3
+
+        self.segments.delete_documents([0])
+        assert self.segments.version == version + 1
+        assert self.segments.compact().doc_names == ["D2", "D3"]
+
+    def test_update_document(self):
+        """
+        Test an updated document keeps its id and name.
+        """
+        self.segments.update_document(self.segments.doc_id("D1"), ["gol", "gol"])
+
+        assert self.segments.postings("sepak")[0].tolist() == []
+        assert self.segments.postings("gol")[1].tolist() == [2]
+        assert self.segments.compact().doc_names == ["D1", "D2", "D3"]
+
+    def test_tfidf_norms(self):
+        """
+        Test incrementally updated norms match a rebuilt index.
+        """
+        segments = self.segments
+        segments.add_documents([["bola", "gol"], ["stadion", "stadion"]])
+        segments.delete_documents([2])
+        segments.update_document(0, ["gol", "bola", "bola"])
+
+        expected = rebuilt_norms(segments.compact())
+        assert np.allclose(segments.tfidf_norms(segments.live_ids()), expected)
+
+    def test_merge_segments(self):
+        """
+        Test merging keeps the documents and drops the tombstones.
+        """
+        segments = self.segments
+        segments.add_documents([["gol"], ["sepak", "gol"]])
+        segments.delete_documents([1])
+        before = segments.compact().to_dataframe()
+
+        segments.merge_segments(background=True).join()
+
+        assert len(segments.segments) == 1
+        assert segments.segments[0].n_live == 4
+        assert segments.compact().to_dataframe().equals(before)
+        assert segments.postings("sepak")[0].tolist() == [0, 4]
+        assert np.allclose(
+            segments.tfidf_norms(segments.live_ids()), rebuilt_norms(segments.compact())
+        )
+
+    def test_merge_segments_error(self, monkeypatch):
+        """
+        Test an error of a background merge is raised by the next call, once.
+        """
+        segments = self.segments
+        segments.add_documents([["gol"]])
+
+        def fail(*args):
+            raise MemoryError("no memory left")
+
+        with monkeypatch.context() as patch:
+            patch.setattr(segments, "_merge", fail)
+            segments.merge_segments(background=True).join()
+        assert len(segments.segments) == 2
+
+        with pytest.raises(RuntimeError) as error:
+            segments.compact()
+        assert isinstance(error.value.__cause__, MemoryError)
+        segments.merge_segments()
+        assert len(segments.segments) == 1
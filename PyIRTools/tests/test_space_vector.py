@@ -4,6 +4,7 @@ Test the space_vector module.
 
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.append(dir_path)
@@ -41,6 +42,47 @@ class TestSpaceVector:
 
         assert isinstance(df_tf, DataFrame)
 
+    def test_idf_ignores_query(self):
+        """
+        Test the query does not change the IDF of the documents terms.
+        """
+        idf = []
+        for query in ("Stadion", "Sepak bola sepak bola lapangan"):
+            self.model.insert_documents(self.text)
+            self.model.set_query(query)
+            df_tf = self.model.calculate_tf_idf()
+            idf.append(df_tf["IDF"].drop(["Total", "Square Root"]))
+
+        assert idf[0].equals(idf[1])
+        assert idf[0]["bola"] == 0
+
+    def test_calculate_tf_idf_again(self):
+        """
+        Test calculate_tf_idf can be called again, with per-call queries from threads.
+        """
+        model = SpaceVectorModel("indonesian")
+        model.insert_documents(self.text)
+        df_text = model.df_text.copy()
+        model.set_query(self.query)
+        first = model.calculate_tf_idf()
+
+        assert model.calculate_tf_idf().equals(first)
+        assert model.df_text.equals(df_text)
+
+        queries = [self.query, "sepak bola lapangan", "dunia"] * 4
+        expected = [
+            model.rank(model.calculate_tf_idf(query)).items() for query in queries[:3]
+        ] * 4
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda query: model.rank(model.calculate_tf_idf(query)), queries
+                )
+            )
+
+        assert [result.items() for result in results] == expected
+        assert [result.query for result in results] == queries
+
     def test_cosine_similarity(self):
         """
         Test the calculate_cosine_similarity method.
@@ -53,6 +95,22 @@ class TestSpaceVector:
 
         assert isinstance(df_similarity, dict)
 
+    def test_rank(self):
+        """
+        Test the rank method orders calculate_cosine_similarity.
+        """
+        self.model.insert_documents(self.text)
+        self.model.set_query(self.query)
+
+        df_tf = self.model.calculate_tf_idf()
+        cosine = self.model.calculate_cosine_similarity(df_tf)
+        result = self.model.rank(df_tf)
+
+        assert result.items() == sorted(
+            cosine.items(), key=lambda item: item[1], reverse=True
+        )
+        assert result.names()[0] == "Norm D4"
+
     def test_save_to_excel(self):
         """
         Test the save_to_excel method.
@@ -68,3 +126,17 @@ class TestSpaceVector:
         output_path = os.path.join(self.model.OUTPUT_PATH, "test.xlsx")
 
         assert os.path.exists(output_path)
+
+    def test_cosine_similarity_precision(self):
+        """
+        Test the calculate_cosine_similarity method without rounding.
+        """
+        self.model.insert_documents(self.text)
+        self.model.set_query(self.query)
+
+        df_tf = self.model.calculate_tf_idf()
+        rounded = self.model.calculate_cosine_similarity(df_tf)
+        exact = self.model.calculate_cosine_similarity(df_tf, decimals=None)
+
+        assert rounded.keys() == exact.keys()
+        assert all(abs(rounded[key] - exact[key]) < 1e-5 for key in rounded)
@@ -0,0 +1,304 @@
+"""
+Test the sparse_vector module.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from model.sparse_vector import SparseVectorModel, top_k
+from model.space_vector import SpaceVectorModel
+from utils.metrics import collect
+from utils.result_cache import ResultCache
+from pandas.core.frame import DataFrame
+
+
+class TestSparseVector:
+    model = SparseVectorModel("indonesian")
+    query = "Stadion Lapangan Populer"
+    text = """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+    Saya suka bermain sepak bola di lapangan dekat rumah saya.
+    Lapangan sepak bola di kota ini sangat luas.
+    Sepak bola merupakan olahraga yang sangat populer di dunia.
+    Pemain sepak bola idola saya adalah Cristiano Ronaldo."""
+
+    def test_sparse_vector(self):
+        """
+        Test the sparse_vector module.
+        """
+        assert isinstance(self.model, SparseVectorModel)
+        assert self.model.__module__ == "model.sparse_vector"
+
+    def test_to_dataframe(self):
+        """
+        Test the to_dataframe method matches SpaceVectorModel.calculate_tf_idf.
+        """
+        self.model.insert_documents(self.text)
+        self.model.set_query(self.query)
+        self.model.calculate_tf_idf()
+        df_sparse = self.model.to_dataframe()
+
+        dense = SpaceVectorModel("indonesian")
+        dense.insert_documents(self.text)
+        dense.set_query(self.query)
+        df_dense = dense.calculate_tf_idf()
+
+        assert isinstance(df_sparse, DataFrame)
+        assert df_sparse.columns.tolist() == df_dense.columns.tolist()
+        assert df_sparse.index.tolist() == df_dense.index.tolist()
+        assert np.allclose(
+            df_sparse.to_numpy(dtype=float), df_dense.to_numpy(dtype=float)
+        )
+
+    def test_cosine_similarity(self):
+        """
+        Test the calculate_cosine_similarity method.
+        """
+        self.model.insert_documents(self.text)
+        self.model.set_query(self.query)
+        self.model.calculate_tf_idf()
+        cosine = self.model.calculate_cosine_similarity()
+
+        assert isinstance(cosine, dict)
+        assert list(cosine) == ["D1", "D2", "D3", "D4", "D5"]
+        assert cosine["D5"] == 0
+        assert all(0 <= value <= 1 for value in cosine.values())
+
+    def test_build_load_index(self, tmp_path):
+        """
+        Test the build_index and load_index methods.
+        """
+        path = self.model.build_index(self.text, str(tmp_path / "index"))
+
+        model = SparseVectorModel("indonesian")
+        model.load_index(path)
+        model.set_query(self.query)
+        model.calculate_tf_idf()
+
+        self.model.set_query(self.query)
+        self.model.calculate_tf_idf()
+
+        assert (
+            model.calculate_cosine_similarity()
+            == self.model.calculate_cosine_similarity()
+        )
+
+    def test_search(self):
+        """
+        Test the search method.
+        """
+        self.model.insert_documents(self.text)
+        results = self.model.search(self.query, k=2)
+
+        assert len(results) == 2
+        assert all(
+            isinstance(name, str) and isinstance(score, float)
+            for name, score in results
+        )
+        assert results[0][1] >= results[1][1]
+        assert [name for name, _ in self.model.search(self.query)] == [
+            "D4",
+            "D1",
+            "D3",
+            "D2",
+        ]
+        assert self.model.search("tidak ada") == []
+
+    def test_search_early_termination(self):
+        """
+        Test early termination gives the same top k.
+        """
+        self.model.insert_documents(self.text)
+
+        for k in range(1, 6):
+            expected = self.model.search("sepak bola lapangan stadion populer", k=k)
+            assert (
+                self.model.search(
+                    "sepak bola lapangan stadion populer", k=k, early_termination=True
+                )
+                == expected
+            )
+
+        # with the upper bounds known, postings of documents out of reach are skipped
+        query = "sepak bola lapangan stadion populer"
+        with collect() as metrics:
+            self.model.retrieve(query, k=1)
+        with collect() as pruned:
+            self.model.retrieve(query, k=1, early_termination=True)
+        assert pruned.counters["search.postings"] < metrics.counters["search.postings"]
+
+    def test_score_batch(self):
+        """
+        Test the score_batch method matches search.
+        """
+        self.model.insert_documents(self.text)
+        queries = [self.query, "sepak bola", "tidak ada", "lapangan lapangan stadion"]
+        scores = self.model.score_batch(queries)
+
+        assert isinstance(scores, np.ndarray)
+        assert scores.shape == (4, 5)
+        assert not scores[2].any()
+        for row, query in zip(scores, queries):
+            expected = dict(self.model.search(query, k=5))
+            assert np.allclose(
+                [row[int(name[1:]) - 1] for name in expected], list(expected.values())
+            )
+
+        top = self.model.score_batch(queries, k=2)
+        assert top == [self.model.search(query, k=2) for query in queries]
+
+    def test_insert_documents_workers(self):
+        """
+        Test inserting documents with worker processes gives the same result.
+        """
+        model = SparseVectorModel("indonesian")
+        model.insert_documents(self.text, workers=2)
+        self.model.insert_documents(self.text)
+
+        assert model.index.terms == self.model.index.terms
+        assert model.search(self.query) == self.model.search(self.query)
+
+    def test_add_delete_update(self):
+        """
+        Test search after changes matches a model built from scratch.
+        """
+        self.model.insert_documents(self.text)
+        self.model.delete_documents(["D5"])
+        assert self.model.add_documents("Stadion baru di kota.") == ["D6"]
+        self.model.update_document("D2", "Lapangan populer.")
+
+        rebuilt = SparseVectorModel("indonesian")
+        rebuilt.insert_documents(
+            """Setiap akhir pekan, saya sering menonton sepak bola di stadion.
+            Lapangan populer.
+            Lapangan sepak bola di kota ini sangat luas.
+            Sepak bola merupakan olahraga yang sangat populer di dunia.
+            Stadion baru di kota."""
+        )
+        names = {"D1": "D1", "D2": "D2", "D3": "D3", "D4": "D4", "D5": "D6"}
+        expected = [(names[name], score) for name, score in rebuilt.search(self.query)]
+
+        results = self.model.search(self.query)
+        assert [name for name, _ in results] == [name for name, _ in expected]
+        assert np.allclose([s for _, s in results], [s for _, s in expected])
+        assert self.model.score_batch([self.query]).shape == (1, 5)
+
+        assert self.model.merge_segments() is None
+        assert self.model.search(self.query) == results
+        self.model.add_documents("Stadion lain.")
+        self.model.merge_segments(background=True).join()
+        assert len(self.model.segments.segments) == 1
+
+    def test_weighting(self):
+        """
+        Test BM25 scores and switching weighting schemes without reindexing.
+        """
+        self.model.insert_documents(self.text)
+        tf_idf = self.model.search(self.query)
+
+        self.model.set_weighting("bm25")
+        index = self.model.index
+        df = index.document_frequency()
+        avg_length = index.doc_lengths.mean()
+        expected = np.zeros(index.n_docs)
+        for word in self.model.preprocess.preprocess_query(self.query):
+            term_id = index.term_id(word)
+            idf = np.log(1 + (index.n_docs - df[term_id] + 0.5) / (df[term_id] + 0.5))
+            docs, tfs = index.postings(word)
+            lengths = index.doc_lengths[docs]
+            expected[docs] += (
+                idf * tfs * 2.2 / (tfs + 1.2 * (0.25 + 0.75 * lengths / avg_length))
+            )
+
+        scores = self.model.score_batch([self.query])[0]
+        assert np.allclose(scores, expected)
+        assert [name for name, _ in self.model.search(self.query, k=2)] == [
+            index.doc_names[i] for i in np.argsort(-expected, kind="stable")[:2]
+        ]
+        for name in ("bm25+", "logtf", "augmented", "pivoted"):
+            self.model.set_weighting(name)
+            assert self.model.search(
+                self.query, k=3, early_termination=True
+            ) == self.model.search(self.query, k=3)
+
+        self.model.set_weighting("tfidf")
+        assert self.model.search(self.query) == tf_idf
+
+    def test_cache(self):
+        """
+        Test repeated queries are answered from the cache until the documents change.
+        """
+        model = SparseVectorModel("indonesian", cache=ResultCache())
+        model.insert_documents(self.text)
+        uncached = SparseVectorModel("indonesian")
+        uncached.insert_documents(self.text)
+
+        with collect() as metrics:
+            first = model.retrieve(self.query, k=3)
+            second = model.retrieve("populer LAPANGAN stadion", k=3)
+            top_2 = model.retrieve(self.query, k=2)
+        assert top_2.items() == uncached.search(self.query, k=2)
+        assert (
+            metrics.counters["cache.hits"] == 1
+            and metrics.counters["cache.misses"] == 2
+        )
+        assert metrics.calls["search"] == 2
+        assert second.query == "populer LAPANGAN stadion"
+        assert second.items() == first.items() == uncached.search(self.query, k=3)
+
+        model.set_weighting("bm25")
+        assert model.search(self.query) != first.items()
+        model.set_weighting("tfidf")
+
+        model.delete_documents(["D3"])
+        uncached.delete_documents(["D3"])
+        assert model.search(self.query, k=3) == uncached.search(self.query, k=3)
+        assert model.cache.hit_rate == 0.2
+
+
+class TestRankedResults:
+    model = SparseVectorModel("indonesian")
+    query = TestSparseVector.query
+    text = TestSparseVector.text
+
+    def test_retrieve(self):
+        """
+        Test the retrieve method gives the search results as arrays.
+        """
+        self.model.insert_documents(self.text)
+        result = self.model.retrieve(self.query, k=3)
+
+        assert isinstance(result.doc_ids, np.ndarray)
+        assert result.items() == self.model.search(self.query, k=3)
+        assert len(self.model.retrieve("tidak ada")) == 0
+
+    def test_rank(self):
+        """
+        Test the rank method orders calculate_cosine_similarity.
+        """
+        self.model.insert_documents(self.text)
+        self.model.set_query(self.query)
+        self.model.calculate_tf_idf()
+        cosine = self.model.calculate_cosine_similarity()
+        result = self.model.rank()
+
+        assert result.query == self.query
+        assert result.items() == sorted(
+            cosine.items(), key=lambda item: item[1], reverse=True
+        )
+
+
+def test_top_k():
+    """
+    Test the top_k function.
+    """
+    doc_ids = np.array([0, 1, 2, 3, 4, 5])
+    scores = np.array([0.1, 0.5, 0.0, 0.5, 0.9, 0.2])
+
+    assert top_k(doc_ids, scores, 3) == ([4, 1, 3], [0.9, 0.5, 0.5])
+    assert top_k(doc_ids, scores, 2) == ([4, 1], [0.9, 0.5])
+    assert top_k(doc_ids, scores, 10)[0] == [4, 1, 3, 5, 0]
@@ -0,0 +1,76 @@
+"""
+Test the stem_cache module.
+"""
+
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.stem_cache import StemCache
+
+
+class TestStemCache:
+    def stem_function(self, word):
+        self.calls.append(word)
+        return word.rstrip("an")
+
+    def setup_method(self):
+        self.calls = []
+
+    def test_stem(self):
+        """
+        Test the stem method only calls the stemmer on misses.
+        """
+        cache = StemCache(self.stem_function)
+
+        assert [cache.stem(word) for word in ["makan", "makan", "minum", "makan"]] == [
+            "mak",
+            "mak",
+            "minum",
+            "mak",
+        ]
+        assert self.calls == ["makan", "minum"]
+        assert (cache.hits, cache.misses) == (2, 2)
+        assert cache.hit_rate == 0.5
+
+    def test_lru(self):
+        """
+        Test the least recently used word is evicted.
+        """
+        cache = StemCache(self.stem_function, maxsize=2)
+        for word in ["a", "b", "a", "c"]:
+            cache.stem(word)
+
+        assert len(cache) == 2
+        assert "a" in cache and "c" in cache and "b" not in cache
+
+    def test_threads(self):
+        """
+        Test threads can share a small cache.
+        """
+        cache = StemCache(str.upper, maxsize=8)
+        words = [f"kata{i % 50}" for i in range(20_000)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            stems = list(executor.map(cache.stem, words, chunksize=100))
+
+        assert stems == [word.upper() for word in words]
+        assert len(cache) <= 8
+
+    def test_save_load(self, tmp_path):
+        """
+        Test the cache is loaded back from disk.
+        """
+        path = str(tmp_path / "stem_cache.json")
+        cache = StemCache(self.stem_function, path=path)
+        cache.stem("makanan")
+        cache.save()
+
+        self.calls = []
+        warm = StemCache(self.stem_function, path=path)
+
+        assert warm.stem("makanan") == "makanan".rstrip("an")
+        assert self.calls == []
+        assert warm.hits == 1
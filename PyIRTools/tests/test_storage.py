@@ -0,0 +1,133 @@
+"""
+Test the storage module.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.inverted_index import InvertedIndex
+from utils.segments import SegmentedIndex
+from utils.storage import (
+    FORMAT_VERSION,
+    HEADER_FILE,
+    save_index,
+    load_index,
+    load_array,
+)
+from utils.term_dictionary import TermDictionary
+
+
+class TestStorage:
+    tokens = [
+        ["sepak", "bola", "stadion"],
+        ["main", "sepak", "bola", "bola"],
+        ["lapang"],
+    ]
+    index = InvertedIndex.from_tokens(tokens)
+
+    def test_save_load_index(self, tmp_path):
+        """
+        Test the save_index and load_index functions.
+        """
+        path = save_index(self.index, str(tmp_path / "index"))
+        loaded = load_index(path)
+
+        assert loaded.terms == self.index.terms
+        assert loaded.doc_names == self.index.doc_names
+        assert isinstance(loaded.indices, np.memmap)
+        assert loaded.postings("bola")[1].tolist() == [1, 2]
+        assert loaded.doc_lengths.tolist() == [3, 4, 1]
+        assert isinstance(loaded.vocabulary, TermDictionary)
+        assert isinstance(loaded.vocabulary.data, np.memmap)
+
+    def test_load_unsupported_version(self, tmp_path):
+        """
+        Test loading an index of another format version raises an error.
+        """
+        path = save_index(self.index, str(tmp_path / "index"))
+        with open(os.path.join(path, HEADER_FILE), encoding="utf-8") as file:
+            header = file.read().replace(f'"version": {FORMAT_VERSION}', '"version": 2')
+        with open(os.path.join(path, HEADER_FILE), "w", encoding="utf-8") as file:
+            file.write(header)
+
+        with pytest.raises(ValueError):
+            load_index(path)
+
+    def test_segments_keep_dictionary(self, tmp_path):
+        """
+        Test a loaded index keeps its dictionary when new terms are added.
+        """
+        loaded = load_index(save_index(self.index, str(tmp_path / "index")))
+        segments = SegmentedIndex.from_index(loaded)
+
+        assert segments.vocabulary.base is loaded.vocabulary
+        segments.add_documents([["bola", "gawang"]])
+        assert segments.term_id("gawang") == self.index.n_terms
+        assert segments.postings("bola")[0].tolist() == [0, 1, 3]
+
+        path = save_index(segments.compact(), str(tmp_path / "again"))
+        assert load_index(path).terms == segments.compact().terms
+
+    def test_positions(self, tmp_path):
+        """
+        Test the positions of a positional index are saved and memory-mapped.
+        """
+        index = InvertedIndex.from_tokens(self.tokens, positional=True)
+        loaded = load_index(save_index(index, str(tmp_path / "index")))
+
+        assert isinstance(loaded.positions.buffer, np.memmap)
+        assert loaded.term_positions("bola")[1].tolist() == [1, 2, 3]
+        assert (
+            load_index(save_index(self.index, str(tmp_path / "plain"))).positions
+            is None
+        )
+
+    def test_idf(self, tmp_path):
+        """
+        Test the stored IDF.
+        """
+        path = save_index(self.index, str(tmp_path / "index"))
+        idf = load_array(path, "idf")
+
+        assert np.allclose(idf, np.log10(3 / np.array([2, 2, 1, 1, 1])))
+
+    def test_document_statistics(self, tmp_path):
+        """
+        Test the stored norms and IDF are memory-mapped little-endian arrays
+        giving the same scores as norms built from the postings, without
+        building a forward index.
+        """
+        tokens = self.tokens + [["bola", "stadion", "stadion", "main"], []]
+        path = save_index(InvertedIndex.from_tokens(tokens), str(tmp_path / "index"))
+        loaded = load_index(path)
+        segments = SegmentedIndex.from_index(loaded)
+        built = SegmentedIndex.from_index(InvertedIndex.from_tokens(tokens))
+
+        assert loaded.max_tfs.tolist() == [1, 2, 1, 2, 0]
+        assert (
+            isinstance(loaded.norms["raw"], np.memmap)
+            and loaded.norms["raw"].dtype.str == "<f8"
+        )
+        assert set(loaded.norms) == {"raw", "log", "augmented"}
+        assert loaded.idf[segments.term_id("bola")] == np.log10(5 / 3)
+
+        doc_ids = np.arange(5)
+        for tf in loaded.norms:
+            assert (
+                segments.tfidf_norms(doc_ids, tf).tolist()
+                == built.tfidf_norms(doc_ids, tf).tolist()
+            )
+        assert all(segment._forward is None for segment in segments.segments)
+
+        segments.add_documents([["bola", "gawang"]])
+        assert segments.stored_index() is None
+        built.add_documents([["bola", "gawang"]])
+        assert np.allclose(
+            segments.tfidf_norms(np.arange(6)), built.tfidf_norms(np.arange(6))
+        )
@@ -0,0 +1,113 @@
+"""
+Test the term_dictionary module.
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.term_dictionary import BLOCK_SIZE, TermDictionary
+from utils.vocabulary import Vocabulary
+
+
+class TestTermDictionary:
+    terms = [
+        "sepak",
+        "bola",
+        "stadion",
+        "main",
+        "lapang",
+        "sepeda",
+        "se",
+        "bolak",
+        "é",
+        "sepakbola",
+    ]
+
+    def test_lookup(self):
+        """
+        Test term id to term and back, in first-seen order.
+        """
+        dictionary = TermDictionary.from_terms(self.terms)
+
+        assert len(dictionary) == len(self.terms)
+        assert dictionary.terms == self.terms
+        assert [dictionary.get(term) for term in self.terms] == list(
+            range(len(self.terms))
+        )
+        assert [dictionary.term(i) for i in range(len(self.terms))] == self.terms
+        assert dictionary.get("sepa") is None
+        assert dictionary.get("zzz") is None
+        assert dictionary.get("a") is None
+        assert "stadion" in dictionary
+        assert "stadio" not in dictionary
+
+    def test_prefix(self):
+        """
+        Test prefix enumeration in sorted order.
+        """
+        dictionary = TermDictionary.from_terms(self.terms)
+
+        assert list(dictionary.with_prefix("sep")) == [
+            ("sepak", 0),
+            ("sepakbola", 9),
+            ("sepeda", 5),
+        ]
+        assert [term for term, _ in dictionary.with_prefix("bola")] == ["bola", "bolak"]
+        assert list(dictionary.with_prefix("x")) == []
+        assert len(list(dictionary.with_prefix(""))) == len(self.terms)
+
+    def test_many_blocks(self):
+        """
+        Test lookups across many blocks.
+        """
+        rng = random.Random(0)
+        terms = list(
+            {"".join(rng.choices("abcde", k=rng.randint(1, 8))) for _ in range(2000)}
+        )
+        dictionary = TermDictionary.from_terms(terms)
+
+        assert len(dictionary.block_offsets) == -(-len(terms) // BLOCK_SIZE)
+        assert all(dictionary.get(term) == i for i, term in enumerate(terms))
+        assert dictionary.terms == terms
+        assert [term for term, _ in dictionary.with_prefix("ab")] == sorted(
+            t for t in terms if t.startswith("ab")
+        )
+
+    def test_duplicate(self):
+        """
+        Test duplicate terms are rejected.
+        """
+        with pytest.raises(ValueError):
+            TermDictionary.from_terms(["bola", "sepak", "bola"])
+
+    def test_empty(self):
+        """
+        Test an empty dictionary.
+        """
+        dictionary = TermDictionary.from_terms([])
+
+        assert len(dictionary) == 0
+        assert dictionary.get("bola") is None
+        assert list(dictionary.with_prefix("")) == []
+
+    def test_vocabulary_base(self):
+        """
+        Test a vocabulary adding terms on top of a dictionary.
+        """
+        vocabulary = Vocabulary(base=TermDictionary.from_terms(["sepak", "bola"]))
+
+        assert vocabulary.add("bola") == 1
+        assert vocabulary.add("stadion") == 2
+        assert vocabulary.get("sepak") == 0
+        assert vocabulary.term(2) == "stadion"
+        assert vocabulary.terms == ["sepak", "bola", "stadion"]
+        assert list(vocabulary) == ["sepak", "bola", "stadion"]
+        assert len(vocabulary) == 3
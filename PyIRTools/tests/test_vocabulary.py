@@ -0,0 +1,36 @@
+"""
+Test the vocabulary module.
+"""
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.vocabulary import Vocabulary
+
+
+class TestVocabulary:
+    def test_add(self):
+        """
+        Test terms get ids in first-seen order.
+        """
+        vocabulary = Vocabulary(["sepak", "bola"])
+
+        assert vocabulary.add("stadion") == 2
+        assert vocabulary.add("sepak") == 0
+        assert vocabulary.update(["bola", "gol"]) == [1, 3]
+        assert list(vocabulary) == ["sepak", "bola", "stadion", "gol"]
+        assert len(vocabulary) == 4
+
+    def test_lookup(self):
+        """
+        Test the get and term methods.
+        """
+        vocabulary = Vocabulary(["sepak", "bola", "sepak"])
+
+        assert vocabulary.get("bola") == 1
+        assert vocabulary.get("gol") is None
+        assert vocabulary.term(0) == "sepak"
+        assert "bola" in vocabulary and "gol" not in vocabulary
@@ -0,0 +1,106 @@
+"""
+Test the weighting module.
+"""
+
+import math
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.weighting import (
+    BM25,
+    BM25Plus,
+    LogTfIdf,
+    PivotedNormalization,
+    TfIdf,
+    WEIGHTINGS,
+    Weighting,
+    get_weighting,
+)
+
+
+class TestWeighting:
+    df = np.array([1, 2, 4, 0])
+
+    def test_idf(self):
+        """
+        Test IDF of each scheme, 0 for terms in no document.
+        """
+        assert np.allclose(
+            TfIdf().idf(self.df, 4), [math.log10(4), math.log10(2), 0, 0]
+        )
+        assert np.allclose(
+            BM25().idf(self.df, 4)[:2],
+            [math.log(1 + 3.5 / 1.5), math.log(1 + 2.5 / 2.5)],
+        )
+        assert np.all(BM25().idf(self.df, 4)[:3] > 0)
+        assert np.allclose(
+            BM25Plus().idf(self.df, 4), [math.log(5), math.log(2.5), math.log(1.25), 0]
+        )
+
+    def test_bm25(self):
+        """
+        Test BM25 and BM25+ document weights.
+        """
+        tfs = np.array([1, 3])
+        lengths = np.array([4, 8])
+        weights = BM25(k1=1.2, b=0.75).document_weights(tfs, lengths, tfs, 4.0, 2.0)
+
+        expected = [
+            2.0 * t * 2.2 / (t + 1.2 * (0.25 + 0.75 * l / 4))
+            for t, l in zip(tfs, lengths)
+        ]
+        assert np.allclose(weights, expected)
+        assert np.allclose(
+            BM25Plus(delta=1.0).document_weights(tfs, lengths, tfs, 4.0, 2.0),
+            np.array(expected) + 2.0,
+        )
+
+    def test_tf_functions(self):
+        """
+        Test log TF and pivoted normalization document weights.
+        """
+        tfs = np.array([1, 10])
+        assert np.allclose(
+            LogTfIdf().document_weights(tfs, tfs, tfs, 1.0, 2.0), [2.0, 4.0]
+        )
+        assert np.allclose(LogTfIdf().query_weights(tfs, np.ones(2)), [1.0, 2.0])
+
+        weights = PivotedNormalization(slope=0.2).document_weights(
+            tfs, np.array([5, 5]), tfs, 5.0, 1.0
+        )
+        assert np.allclose(weights, 1 + np.log(1 + np.log(tfs)))
+
+    def test_get_weighting(self):
+        """
+        Test the get_weighting function.
+        """
+        assert isinstance(get_weighting("bm25"), BM25)
+        scheme = BM25Plus(delta=0.5)
+        assert get_weighting(scheme) is scheme
+        assert set(WEIGHTINGS) == {
+            "tfidf",
+            "logtf",
+            "augmented",
+            "bm25",
+            "bm25+",
+            "pivoted",
+        }
+
+        try:
+            get_weighting("unknown")
+            assert False
+        except ValueError:
+            pass
+
+        # a scheme has to define its IDF
+        try:
+            Weighting()  # type: ignore[abstract]
+            assert False
+        except TypeError:
+            pass
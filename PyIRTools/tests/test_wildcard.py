@@ -0,0 +1,129 @@
+"""
+Test the wildcard module.
+"""
+
+import random
+import re
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.term_dictionary import TermDictionary
+from utils.wildcard import WildcardIndex, is_wildcard
+
+
+class TestWildcard:
+    terms = [
+        "sekolah",
+        "sepak",
+        "bola",
+        "sepakbola",
+        "bolak",
+        "main",
+        "sekolahan",
+        "lapang",
+    ]
+    index = WildcardIndex(terms)
+
+    def expand(self, pattern: str) -> list[str]:
+        return [self.terms[t] for t in self.index.expand(pattern)]
+
+    def test_is_wildcard(self):
+        """
+        Test the is_wildcard function.
+        """
+        assert is_wildcard("sekol*")
+        assert not is_wildcard("sekolah")
+
+    def test_prefix(self):
+        """
+        Test prefix patterns.
+        """
+        assert self.expand("sekol*") == ["sekolah", "sekolahan"]
+        assert self.expand("sep*") == ["sepak", "sepakbola"]
+        assert self.expand("x*") == []
+        assert self.expand("*") == self.terms
+
+    def test_suffix(self):
+        """
+        Test suffix patterns.
+        """
+        assert self.expand("*bola") == ["bola", "sepakbola"]
+        assert self.expand("*ak") == ["sepak", "bolak"]
+
+    def test_infix(self):
+        """
+        Test infix and multiple wildcard patterns.
+        """
+        assert self.expand("*ola*") == [
+            "sekolah",
+            "bola",
+            "sepakbola",
+            "bolak",
+            "sekolahan",
+        ]
+        assert self.expand("s*h") == ["sekolah"]
+        assert self.expand("s*a*a") == ["sepakbola"]
+        assert self.expand("*a*n*") == ["main", "sekolahan", "lapang"]
+        assert self.expand("*q*") == []
+
+    def test_matches_regex(self):
+        """
+        Test expansions match a regular expression scan of the vocabulary.
+        """
+        rng = random.Random(1)
+        terms = list(
+            {"".join(rng.choices("abcd", k=rng.randint(1, 6))) for _ in range(500)}
+        )
+        index = WildcardIndex(terms)
+
+        for pattern in ("a*", "*b", "*cd*", "a*b*c", "*a*a*", "d*d", "*ab", "**c"):
+            regex = re.compile(".*".join(map(re.escape, pattern.split("*"))))
+            expected = [i for i, term in enumerate(terms) if regex.fullmatch(term)]
+            assert index.expand(pattern).tolist() == expected, pattern
+
+    def test_extend(self):
+        """
+        Test an index extended with new terms, over a TermDictionary base,
+        expands like one built from all terms at once.
+        """
+        patterns = ("sekol*", "*bola", "*ola*", "s*a*a", "bola", "*", "x*")
+        expected = {
+            pattern: self.index.expand(pattern).tolist() for pattern in patterns
+        }
+
+        index = WildcardIndex(base=TermDictionary.from_terms(self.terms[:3]))
+        # structures built before the terms are added are extended too
+        assert index.expand("*ak").tolist() == [1]
+        assert index.expand("*ola*").tolist() == [0, 2]
+        index.extend(self.terms[3:6])
+        index.extend(self.terms[6:])
+
+        assert index.n_terms == len(self.terms)
+        for pattern in patterns:
+            assert index.expand(pattern).tolist() == expected[pattern], pattern
+
+    def test_extend_sorted(self):
+        """
+        Test the sorted terms stay sorted when extended one term at a time
+        and by large batches.
+        """
+        rng = random.Random(0)
+        words = sorted(
+            {"".join(rng.choices("abkls", k=rng.randint(1, 6))) for _ in range(300)}
+        )
+        rng.shuffle(words)
+
+        index = WildcardIndex(words[:50])
+        index.expand("*a")
+        for word in words[50:60]:
+            index.extend([word])
+        index.extend(words[60:])
+
+        assert index._sorted == sorted((word, i) for i, word in enumerate(words))
+        assert index._reversed == sorted(
+            (word[::-1], i) for i, word in enumerate(words)
+        )
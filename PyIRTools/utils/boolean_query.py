@@ -0,0 +1,432 @@
+"""
+This module contains the boolean query parser and the bitset evaluator.
+
+Grammar, operators are case insensitive and adjacent terms are joined with AND:
+
+    expr     := and_expr (OR and_expr)*
+    and_expr := not_expr ([AND] not_expr)*
+    not_expr := NOT not_expr | near
+    near     := atom [NEAR/k atom]
+    atom     := TERM | PHRASE | "(" expr ")"
+
+A TERM containing "*" is a wildcard pattern, e.g. "sekol*" or "*bola",
+matching every indexed term it fits, see utils.wildcard.
+
+A PHRASE is words in double quotes, e.g. "sepak bola", matching them next to
+each other in this order. "a NEAR/k b" matches a and b in either order with
+at most k positions between their occurrences, a and b being terms or
+phrases. Both need the word positions of a positional index.
+
+A document set is a Python int used as a bitmask, bit i is document i.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r'"[^"]*"?|\(|\)|near/\d+|[\w*]+')
+WORD_PATTERN = re.compile(r"\w+")
+NEAR_PATTERN = re.compile(r"near/(\d+)")
+OPERATORS = {"and", "or", "not"}
+
+
+class Node(ABC):
+    """
+    Base class of boolean query AST nodes.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def terms(self) -> list[str]:
+        """
+        Get all terms in the expression, left to right.
+
+        Returns:
+        list[str]: Terms in the expression.
+        """
+
+
+class Term(Node):
+    __slots__ = ("word",)
+
+    def __init__(self, word: str) -> None:
+        self.word = word
+
+    def terms(self) -> list[str]:
+        return [self.word]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Term) and other.word == self.word
+
+    def __str__(self) -> str:
+        return self.word
+
+
+class Wildcard(Term):
+    """
+    Term matching a pattern, looked up like a term by its word.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Wildcard) and other.word == self.word
+
+
+class Phrase(Node):
+    """
+    Words next to each other, in order.
+    """
+
+    __slots__ = ("words",)
+
+    def __init__(self, words: list[str]) -> None:
+        self.words = words
+
+    def terms(self) -> list[str]:
+        return list(self.words)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Phrase) and other.words == self.words
+
+    def __str__(self) -> str:
+        return '"' + " ".join(self.words) + '"'
+
+
+class Near(Node):
+    """
+    Two terms or phrases at most distance positions apart, in either order.
+    """
+
+    __slots__ = ("left", "right", "distance")
+
+    def __init__(
+        self, left: Term | Phrase, right: Term | Phrase, distance: int
+    ) -> None:
+        self.left = left
+        self.right = right
+        self.distance = distance
+
+    def terms(self) -> list[str]:
+        return self.left.terms() + self.right.terms()
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Near)
+            and other.left == self.left
+            and other.right == self.right
+            and other.distance == self.distance
+        )
+
+    def __str__(self) -> str:
+        return f"{self.left} NEAR/{self.distance} {self.right}"
+
+
+class Not(Node):
+    __slots__ = ("child",)
+
+    def __init__(self, child: Node) -> None:
+        self.child = child
+
+    def terms(self) -> list[str]:
+        return self.child.terms()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Not) and other.child == self.child
+
+    def __str__(self) -> str:
+        return f"~{_wrap(self.child)}"
+
+
+class And(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: list[Node]) -> None:
+        self.children = children
+
+    def terms(self) -> list[str]:
+        return [term for child in self.children for term in child.terms()]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, And) and other.children == self.children
+
+    def __str__(self) -> str:
+        return " & ".join(_wrap(child) for child in self.children)
+
+
+class Or(Node):
+    __slots__ = ("children",)
+
+    def __init__(self, children: list[Node]) -> None:
+        self.children = children
+
+    def terms(self) -> list[str]:
+        return [term for child in self.children for term in child.terms()]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Or) and other.children == self.children
+
+    def __str__(self) -> str:
+        return " | ".join(_wrap(child) for child in self.children)
+
+
+def _wrap(node: Node) -> str:
+    return f"({node})" if isinstance(node, (And, Or)) else str(node)
+
+
+class QueryParser:
+    """
+    Recursive descent parser for boolean queries.
+    """
+
+    def __init__(self, query: str) -> None:
+        self.tokens = TOKEN_PATTERN.findall(query.lower())
+        self.position = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of query")
+        self.position += 1
+        return token
+
+    def parse(self) -> Node:
+        """
+        Parse the whole query.
+
+        Returns:
+        Node: Root of the AST.
+        """
+        if not self.tokens:
+            raise ValueError("Empty query")
+        node = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token: {self.peek()}")
+        return node
+
+    def parse_or(self) -> Node:
+        children = [self.parse_and()]
+        while self.peek() == "or":
+            self.next()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self) -> Node:
+        children = [self.parse_not()]
+        while self.peek() not in (None, "or", ")"):
+            if self.peek() == "and":
+                self.next()
+            children.append(self.parse_not())
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self) -> Node:
+        if self.peek() == "not":
+            self.next()
+            return Not(self.parse_not())
+        return self.parse_near()
+
+    def parse_near(self) -> Node:
+        node = self.parse_atom()
+        token = self.peek()
+        match = NEAR_PATTERN.fullmatch(token) if token is not None else None
+        if match is None:
+            return node
+
+        self.next()
+        right = self.parse_atom()
+        distance = int(match.group(1))
+        if not isinstance(node, (Term, Phrase)) or not isinstance(
+            right, (Term, Phrase)
+        ):
+            raise ValueError("NEAR operands must be terms or phrases")
+        if isinstance(node, Wildcard) or isinstance(right, Wildcard):
+            raise ValueError("NEAR operands must be terms or phrases")
+        if distance < 1:
+            raise ValueError("NEAR distance must be at least 1")
+        return Near(node, right, distance)
+
+    def parse_atom(self) -> Node:
+        token = self.next()
+        if token == "(":
+            node = self.parse_or()
+            if self.next() != ")":
+                raise ValueError("Missing closing parenthesis")
+            return node
+        if token == ")" or token in OPERATORS or NEAR_PATTERN.fullmatch(token):
+            raise ValueError(f"Unexpected token: {token}")
+        if token.startswith('"'):
+            if len(token) < 2 or not token.endswith('"'):
+                raise ValueError("Missing closing quote")
+            words = WORD_PATTERN.findall(token)
+            if not words:
+                raise ValueError("Empty phrase")
+            return Phrase(words) if len(words) > 1 else Term(words[0])
+        if "*" in token:
+            return Wildcard(token)
+        return Term(token)
+
+
+def parse_query(query: str) -> Node:
+    """
+    Parse boolean query into an AST.
+
+    Parameters:
+    query (str): Boolean query, e.g. "sekolah OR (makan AND NOT ayam)".
+
+    Returns:
+    Node: Root of the AST.
+
+    Raises:
+    ValueError: If the query is not a valid boolean expression.
+    """
+    return QueryParser(query).parse()
+
+
+def evaluate(
+    node: Node,
+    lookup: Callable[[str], int],
+    universe: int,
+    positional: Callable[[Phrase | Near], int] | None = None,
+) -> int:
+    """
+    Evaluate boolean query AST over bitmasks.
+
+    Parameters:
+    node (Node): Root of the AST.
+    lookup (Callable[[str], int]): Function returning the bitmask of a term.
+    universe (int): Bitmask of all documents, used for NOT.
+    positional (Callable[[Phrase | Near], int] | None): Function returning the bitmask of a Phrase or Near node.
+
+    Returns:
+    int: Bitmask of the matching documents.
+
+    Raises:
+    ValueError: If the query has a phrase or NEAR and positional is None.
+    """
+    if isinstance(node, Term):
+        return lookup(node.word)
+    if isinstance(node, (Phrase, Near)):
+        if positional is None:
+            raise ValueError("Phrase and NEAR queries need a positional index")
+        return positional(node)
+    if isinstance(node, Not):
+        return universe & ~evaluate(node.child, lookup, universe, positional)
+    if isinstance(node, And):
+        result = universe
+        for child in node.children:
+            result &= evaluate(child, lookup, universe, positional)
+            if not result:
+                break
+        return result
+    if isinstance(node, Or):
+        result = 0
+        for child in node.children:
+            result |= evaluate(child, lookup, universe, positional)
+        return result
+    raise TypeError(f"Unknown node: {node!r}")
+
+
+def needs_positions(node: Node) -> bool:
+    """
+    Check whether a query has a phrase or NEAR, needing word positions.
+
+    Parameters:
+    node (Node): Root of the AST.
+
+    Returns:
+    bool: True if any node is a Phrase or Near.
+    """
+    if isinstance(node, (Phrase, Near)):
+        return True
+    if isinstance(node, Not):
+        return needs_positions(node.child)
+    if isinstance(node, (And, Or)):
+        return any(needs_positions(child) for child in node.children)
+    return False
+
+
+def normalize(
+    node: Node, stem: Callable[[str], str], stopwords: frozenset[str] = frozenset()
+) -> Node:
+    """
+    Get a copy of the AST with words as they are looked up: terms and
+    phrase words stemmed, stopwords dropped from phrases. Wildcard patterns
+    are kept. Queries with the same normalized AST match the same documents.
+
+    Parameters:
+    node (Node): Root of the AST.
+    stem (Callable[[str], str]): Stemmer of the index.
+    stopwords (frozenset[str]): Words dropped from phrases.
+
+    Returns:
+    Node: Root of the normalized AST.
+    """
+    if isinstance(node, Wildcard):
+        return node
+    if isinstance(node, Term):
+        return Term(stem(node.word))
+    if isinstance(node, Phrase):
+        return Phrase([stem(word) for word in node.words if word not in stopwords])
+    if isinstance(node, Near):
+        return Near(
+            normalize(node.left, stem, stopwords),  # type: ignore
+            normalize(node.right, stem, stopwords),  # type: ignore
+            node.distance,
+        )
+    if isinstance(node, Not):
+        return Not(normalize(node.child, stem, stopwords))
+    if isinstance(node, (And, Or)):
+        return type(node)(
+            [normalize(child, stem, stopwords) for child in node.children]
+        )
+    raise TypeError(f"Unknown node: {node!r}")
+
+
+def universe_mask(n_docs: int) -> int:
+    """
+    Get bitmask with the first n_docs bits set.
+
+    Parameters:
+    n_docs (int): Number of documents.
+
+    Returns:
+    int: Bitmask of all documents.
+    """
+    return (1 << n_docs) - 1
+
+
+def to_bitmask(doc_ids: np.ndarray, n_docs: int) -> int:
+    """
+    Convert document ids to a bitmask.
+
+    Parameters:
+    doc_ids (np.ndarray): Document ids.
+    n_docs (int): Number of documents.
+
+    Returns:
+    int: Bitmask with bit i set for each document id i.
+    """
+    bits = np.zeros(n_docs, dtype=bool)
+    bits[doc_ids] = True
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+def from_bitmask(mask: int, n_docs: int) -> np.ndarray:
+    """
+    Convert a bitmask to document ids.
+
+    Parameters:
+    mask (int): Bitmask of documents.
+    n_docs (int): Number of documents.
+
+    Returns:
+    np.ndarray: Sorted document ids.
+    """
+    raw = np.frombuffer(mask.to_bytes((n_docs + 7) // 8, "little"), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(raw, bitorder="little")[:n_docs])
@@ -0,0 +1,199 @@
+"""
+This module contains the chunked export of tables: term statistics,
+document vectors and ranked results.
+
+A table is written chunk by chunk, each chunk a dict of equally long
+columns, so memory is bounded by the chunk size whatever the size of the
+index. There is no column limit like Excel's 16,384: document vectors are
+written in long format, one row per non-zero weight.
+
+Parquet and Arrow need pyarrow, imported on first use. CSV and JSON Lines
+need nothing beyond the standard library.
+"""
+
+import csv
+import json
+from importlib.util import find_spec
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.results import RankedResult
+
+Chunk = dict[str, np.ndarray | list[Any]]
+
+FORMATS = ("parquet", "arrow", "csv", "jsonl")
+EXTENSIONS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+}
+CHUNK_SIZE = 65_536
+
+
+def has_pyarrow() -> bool:
+    """
+    Check whether pyarrow can be imported, without importing it.
+
+    Returns:
+    bool: True if Parquet and Arrow files can be written.
+    """
+    return find_spec("pyarrow") is not None
+
+
+def resolve_format(path: str, format: str | None = None) -> str:
+    """
+    Get the format a table is written in.
+
+    Parameters:
+    path (str): Output file.
+    format (str | None): One of FORMATS. Default is the one of the file extension, else Parquet if pyarrow is installed, else CSV.
+
+    Returns:
+    str: Format name.
+    """
+    if format is None:
+        format = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if format is None:
+        return "parquet" if has_pyarrow() else "csv"
+    if format not in FORMATS:
+        raise ValueError(f"format must be one of {FORMATS}")
+    if format in ("parquet", "arrow") and not has_pyarrow():
+        raise ImportError(
+            f"Writing {format} files needs pyarrow, use csv or jsonl instead"
+        )
+    return format
+
+
+def write_chunks(chunks: Iterable[Chunk], path: str, format: str | None = None) -> int:
+    """
+    Write a table chunk by chunk. The file is written under a temporary
+    name and renamed at the end, so it is never left half written.
+
+    Parameters:
+    chunks (Iterable[Chunk]): Chunks of the table, dicts of column name to numpy array or list. Every chunk has the same columns.
+    path (str): Output file.
+    format (str | None): One of FORMATS, see resolve_format.
+
+    Returns:
+    int: Number of rows written.
+    """
+    format = resolve_format(path, format)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+
+    writer = {
+        "parquet": _write_arrow,
+        "arrow": _write_arrow,
+        "csv": _write_csv,
+        "jsonl": _write_jsonl,
+    }[format]
+    temp_path = f"{path}.tmp"
+    try:
+        n_rows = writer(chunks, temp_path, format)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return n_rows
+
+
+def _rows(chunk: Chunk) -> Iterator[tuple]:
+    return zip(
+        *(
+            column.tolist() if isinstance(column, np.ndarray) else column
+            for column in chunk.values()
+        )
+    )
+
+
+def _write_csv(chunks: Iterable[Chunk], path: str, format: str) -> int:
+    n_rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                writer.writerow(chunk)
+            writer.writerows(_rows(chunk))
+            n_rows += len(next(iter(chunk.values()), ()))
+    return n_rows
+
+
+def _write_jsonl(chunks: Iterable[Chunk], path: str, format: str) -> int:
+    n_rows = 0
+    with open(path, "w", encoding="utf-8") as file:
+        for chunk in chunks:
+            names = list(chunk)
+            for row in _rows(chunk):
+                file.write(json.dumps(dict(zip(names, row)), ensure_ascii=False))
+                file.write("\n")
+                n_rows += 1
+    return n_rows
+
+
+def _write_arrow(chunks: Iterable[Chunk], path: str, format: str) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    n_rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table(chunk)
+            if writer is None:
+                if format == "parquet":
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    writer = pa.ipc.new_file(path, table.schema)
+            writer.write_table(table)
+            n_rows += table.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+    return n_rows
+
+
+def ranked_chunks(
+    results: Iterable[RankedResult], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Chunk]:
+    """
+    Split ranked results into chunks of the table query, rank, document, score.
+
+    Parameters:
+    results (Iterable[RankedResult]): Ranked results, e.g. a generator of SparseVectorModel.retrieve calls.
+    chunk_size (int): Maximum number of rows per chunk. One result with more documents is split.
+
+    Returns:
+    Iterator[Chunk]: Chunks with columns "query", "rank", "document" and "score". Rank 1 is the most relevant document. At least one, maybe empty, so the columns are known.
+    """
+    columns: dict[str, list] = {"query": [], "rank": [], "document": [], "score": []}
+    n_chunks = 0
+    for result in results:
+        n = len(result)
+        columns["query"].extend([result.query] * n)
+        columns["rank"].extend(range(1, n + 1))
+        columns["document"].extend(result.names())
+        columns["score"].extend(result.scores.tolist())
+        start = 0
+        while len(columns["query"]) - start >= chunk_size:
+            end = start + chunk_size
+            chunk: Chunk = {name: values[start:end] for name, values in columns.items()}
+            yield chunk
+            start = end
+            n_chunks += 1
+        if start:
+            # drop the written rows once per result, not once per chunk
+            for values in columns.values():
+                del values[:start]
+    if columns["query"] or not n_chunks:
+        last: Chunk = dict(columns)
+        yield last
@@ -0,0 +1,102 @@
+"""
+This module turns result records into text and DataFrames.
+
+It is only needed for display: pandas and inflect are imported on first
+use, and the models never call it on their search paths.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.boolean_query import to_bitmask
+from utils.results import BooleanResult, RankedResult
+
+if TYPE_CHECKING:
+    import inflect
+    from pandas.core.frame import DataFrame
+
+
+@lru_cache(maxsize=None)
+def _inflect_engine() -> "inflect.engine":
+    import inflect
+
+    return inflect.engine()
+
+
+def join_names(names: list[str]) -> str:
+    """
+    Join document names as an English list, e.g. "D1, D2, and D3".
+
+    Parameters:
+    names (list[str]): Document names.
+
+    Returns:
+    str: Joined names.
+    """
+    return _inflect_engine().join(names)
+
+
+def ranked_to_dataframe(
+    result: RankedResult, score_name: str = "Cosine Similarity"
+) -> "DataFrame":
+    """
+    Convert a ranked result to a DataFrame.
+
+    Parameters:
+    result (RankedResult): Ranked documents.
+    score_name (str): Name of the score column.
+
+    Returns:
+    DataFrame: One row per document, most relevant first, with columns "Document" and score_name.
+    """
+    from pandas.core.frame import DataFrame
+
+    return DataFrame({"Document": result.names(), score_name: result.scores})
+
+
+def format_ranked(result: RankedResult, verbose: bool = False) -> str:
+    """
+    Format a ranked result like get_relevant_document_index prints it.
+
+    Parameters:
+    result (RankedResult): Ranked documents.
+    verbose (bool): If True, list all documents as a DataFrame. If False, only the most relevant one.
+
+    Returns:
+    str: Formatted result.
+    """
+    if verbose:
+        return f"Relevant Document:\n{ranked_to_dataframe(result)}"
+    names = result.names()
+    return f"Most Relevant Document: {names[0] if names else None}"
+
+
+def format_boolean(result: BooleanResult) -> str:
+    """
+    Format a boolean result like BooleanModel.search prints it.
+
+    Parameters:
+    result (BooleanResult): Matching documents.
+
+    Returns:
+    str: Formatted result, with the bitmask of the documents (bit i is document i).
+    """
+    mask = documents = None
+    if result.valid:
+        mask = to_bitmask(result.doc_ids, len(result.doc_names))
+        documents = join_names(result.names())
+
+    return "\n".join(
+        (
+            f"Your query: {result.query}",
+            f"Boolean Expression: {result.expression}",
+            f"Result: {mask}",
+            f"Result Query: {documents}",
+        )
+    )
@@ -0,0 +1,367 @@
+"""
+This module contains the inverted index class, a sparse term-document matrix
+stored in compressed sparse row (CSR) layout.
+"""
+
+from array import array
+from collections import Counter
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+from utils.metrics import current_metrics
+from utils.positions import PositionalPostings, ranges
+from utils.term_dictionary import TermDictionary
+from utils.vocabulary import Vocabulary
+
+if TYPE_CHECKING:
+    from pandas.core.frame import DataFrame
+
+
+class InvertedIndex:
+    """
+    Sparse term-document matrix with one CSR row per term.
+
+    The postings of term id ``t`` are ``indices[indptr[t]:indptr[t + 1]]``
+    (document ids in increasing order) with their term frequencies in
+    ``data[indptr[t]:indptr[t + 1]]``. Memory grows with the number of
+    non-zero entries instead of terms x documents.
+
+    Attributes:
+    vocabulary (Vocabulary | TermDictionary): Term to term id, in first-seen order. A TermDictionary if loaded with load_index.
+    doc_names (list[str]): Name of each document.
+    indptr (np.ndarray): Row pointer, length n_terms + 1.
+    indices (np.ndarray): Document id of each posting.
+    data (np.ndarray): Term frequency of each posting.
+    doc_lengths (np.ndarray): Number of tokens in each document.
+    positions (PositionalPostings | None): Word positions of each posting, None if the index is not positional.
+    max_tfs (np.ndarray | None): Highest term frequency of each document, precomputed by save_index. None unless loaded.
+    idf (np.ndarray | None): log10(N / DF) of each term, 0 for terms in no document, precomputed by save_index. None unless loaded.
+    norms (dict[str, np.ndarray]): TF-IDF L2 norm of each document for each TF function, with this idf, precomputed by save_index. Empty unless loaded.
+    """
+
+    def __init__(
+        self,
+        vocabulary: Vocabulary | TermDictionary,
+        doc_names: list[str],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        data: np.ndarray,
+        doc_lengths: np.ndarray,
+        positions: PositionalPostings | None = None,
+        max_tfs: np.ndarray | None = None,
+        idf: np.ndarray | None = None,
+        norms: dict[str, np.ndarray] | None = None,
+    ) -> None:
+        self.vocabulary = vocabulary
+        self.doc_names = doc_names
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.doc_lengths = doc_lengths
+        self.positions = positions
+        self.max_tfs = max_tfs
+        self.idf = idf
+        self.norms = norms or {}
+
+    @classmethod
+    def from_tokens(
+        cls, tokens: Iterable[list[str]], prefix: str = "D", positional: bool = False
+    ) -> "InvertedIndex":
+        """
+        Build inverted index from preprocessed documents.
+
+        Parameters:
+        tokens (Iterable[list[str]]): list of words in each document. May be a generator, documents are consumed one at a time.
+        prefix (str): Prefix of document names, e.g. "D" gives D1, D2, ...
+        positional (bool): If True, also keep the position of every word, see term_positions.
+
+        Returns:
+        InvertedIndex: Inverted index of the documents.
+        """
+        metrics = current_metrics()
+        start = perf_counter()
+        builder = IndexBuilder(positional)
+        for sentence in tokens:
+            builder.add_document(sentence)
+        index = builder.build(prefix)
+        if metrics is not None:
+            # includes preprocessing when tokens is a generator
+            metrics.add_time("index.build", perf_counter() - start)
+            metrics.increment("index.documents", index.n_docs)
+            metrics.increment("index.postings", index.nnz)
+        return index
+
+    @property
+    def terms(self) -> list[str]:
+        return self.vocabulary.terms
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_names)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.indices)
+
+    def freeze(self) -> "InvertedIndex":
+        """
+        Make the arrays read-only, so an index shared by threads cannot be
+        changed by mistake. Memory-mapped indexes are read-only already.
+
+        Returns:
+        InvertedIndex: This index.
+        """
+        arrays = [
+            self.indptr,
+            self.indices,
+            self.data,
+            self.doc_lengths,
+            *self.norms.values(),
+        ]
+        if self.positions is not None:
+            arrays += [self.positions.buffer, self.positions.offsets]
+        if self.max_tfs is not None:
+            arrays.append(self.max_tfs)
+        if self.idf is not None:
+            arrays.append(self.idf)
+        for array in arrays:
+            array.flags.writeable = False
+        return self
+
+    def term_id(self, term: str) -> int | None:
+        """
+        Get term id of a term.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        int | None: Term id, or None if the term is not in the vocabulary.
+        """
+        return self.vocabulary.get(term)
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get postings of a term.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document ids and term frequencies. Both are empty if the term is not in the vocabulary.
+        """
+        term_id = self.term_id(term)
+        if term_id is None:
+            return self.indices[:0], self.data[:0]
+        start, end = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def term_positions(
+        self, term: str, mask: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get every position of a term.
+
+        Parameters:
+        term (str): Term to look up.
+        mask (np.ndarray | None): Postings to decode, a boolean array over the postings returned by postings(term). Default is all of them.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document id of each occurrence and its word position, sorted by document then position.
+
+        Raises:
+        ValueError: If the index is not positional.
+        """
+        if self.positions is None:
+            raise ValueError(
+                "The index has no positions, build it with positional=True"
+            )
+        term_id = self.term_id(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        posting_ids = np.arange(self.indptr[term_id], self.indptr[term_id + 1])
+        if mask is not None:
+            posting_ids = posting_ids[mask]
+        counts = self.data[posting_ids]
+        doc_ids = np.repeat(self.indices[posting_ids].astype(np.int64), counts)
+        return doc_ids, self.positions.take(posting_ids, counts)
+
+    def row_ids(self) -> np.ndarray:
+        """
+        Get term id of each posting, i.e. the COO row of each non-zero entry.
+
+        Returns:
+        np.ndarray: Term id of each posting.
+        """
+        return np.repeat(np.arange(self.n_terms, dtype=np.int32), np.diff(self.indptr))
+
+    def document_frequency(self) -> np.ndarray:
+        """
+        Get number of documents containing each term.
+
+        Returns:
+        np.ndarray: Document frequency of each term.
+        """
+        return np.diff(self.indptr)
+
+    def collection_frequency(self) -> np.ndarray:
+        """
+        Get total number of occurrences of each term.
+
+        Returns:
+        np.ndarray: Collection frequency of each term.
+        """
+        return np.bincount(
+            self.row_ids(), weights=self.data, minlength=self.n_terms
+        ).astype(np.int64)
+
+    def to_dataframe(self, binary: bool = False) -> "DataFrame":
+        """
+        Export inverted index as a dense term x document DataFrame.
+
+        Parameters:
+        binary (bool): If True, fill 1 when the term exists in the document instead of its frequency.
+
+        Returns:
+        DataFrame: Dense term-document matrix. Only use it for small corpora.
+        """
+        from pandas.core.frame import DataFrame
+
+        dense = np.zeros((self.n_terms, self.n_docs), dtype=np.int64)
+        dense[self.row_ids(), self.indices] = 1 if binary else self.data
+        return DataFrame(dense, index=self.terms, columns=self.doc_names)
+
+
+class IndexBuilder:
+    """
+    Build an InvertedIndex one document at a time.
+
+    Postings are appended to compact int arrays (12 bytes per term and
+    document pair), so memory does not hold the documents themselves.
+    A positional builder also appends the positions of each posting, 4
+    bytes per word, compressed when the index is built.
+
+    Attributes:
+    positions (array | None): Positions of each posting in the order they were added, None if not positional.
+    """
+
+    def __init__(self, positional: bool = False) -> None:
+        self.vocabulary = Vocabulary()
+        self.rows = array("i")
+        self.cols = array("i")
+        self.values = array("i")
+        self.doc_lengths = array("i")
+        self.positions = array("i") if positional else None
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    def add_document(self, words: list[str]) -> int:
+        """
+        Add one preprocessed document.
+
+        Parameters:
+        words (list[str]): list of words in the document.
+
+        Returns:
+        int: Document id.
+        """
+        doc_id = self.n_docs
+        add = self.vocabulary.add
+        if self.positions is not None:
+            occurrences: dict[str, list[int]] = {}
+            for position, word in enumerate(words):
+                occurrences.setdefault(word, []).append(position)
+            for word, positions in occurrences.items():
+                self.rows.append(add(word))
+                self.cols.append(doc_id)
+                self.values.append(len(positions))
+                self.positions.extend(positions)
+        else:
+            for word, count in Counter(words).items():
+                self.rows.append(add(word))
+                self.cols.append(doc_id)
+                self.values.append(count)
+        self.doc_lengths.append(len(words))
+        return doc_id
+
+    def merge(self, other: "IndexBuilder") -> None:
+        """
+        Append the documents of another builder after the documents of this
+        one. New terms get ids in the order they were first seen in other,
+        so merging shards in order gives the same index as adding their
+        documents one by one.
+
+        Parameters:
+        other (IndexBuilder): Builder of the following documents.
+
+        Returns:
+        None
+        """
+        if (self.positions is None) != (other.positions is None):
+            raise ValueError(
+                "Cannot merge a positional builder with a non-positional one"
+            )
+        mapping = np.array(self.vocabulary.update(other.vocabulary), dtype=np.int32)
+        rows = mapping[np.frombuffer(other.rows, dtype=np.int32)]
+        cols = np.frombuffer(other.cols, dtype=np.int32) + np.int32(self.n_docs)
+
+        self.rows.frombytes(rows.tobytes())
+        self.cols.frombytes(cols.tobytes())
+        self.values.extend(other.values)
+        self.doc_lengths.extend(other.doc_lengths)
+        if self.positions is not None and other.positions is not None:
+            self.positions.extend(other.positions)
+
+    def build(self, prefix: str = "D") -> InvertedIndex:
+        """
+        Build the inverted index of the added documents.
+
+        Parameters:
+        prefix (str): Prefix of document names, e.g. "D" gives D1, D2, ...
+
+        Returns:
+        InvertedIndex: Inverted index of the documents.
+        """
+        n_terms = len(self.vocabulary)
+        rows = np.frombuffer(self.rows, dtype=np.int32)
+
+        # documents are added in order, a stable sort keeps doc ids increasing
+        order = np.argsort(rows, kind="stable")
+
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_terms), out=indptr[1:])
+
+        values = np.frombuffer(self.values, dtype=np.int32)
+        positions = None
+        if self.positions is not None:
+            # move the positions of each posting along with it
+            flat = np.frombuffer(self.positions, dtype=np.int32)
+            starts = np.cumsum(values, dtype=np.int64) - values
+            counts = values[order]
+            positions = PositionalPostings.from_groups(
+                flat[ranges(starts[order], counts)], counts
+            )
+
+        return InvertedIndex(
+            vocabulary=Vocabulary(self.vocabulary),
+            doc_names=[f"{prefix}{i+1}" for i in range(self.n_docs)],
+            indptr=indptr,
+            indices=np.frombuffer(self.cols, dtype=np.int32)[order],
+            data=values[order],
+            doc_lengths=np.frombuffer(self.doc_lengths, dtype=np.int32).copy(),
+            positions=positions,
+        )
@@ -0,0 +1,133 @@
+"""
+This module contains the opt-in instrumentation of preprocessing, indexing
+and search.
+
+Instrumented code asks for the active Metrics with current_metrics and only
+measures when there is one, so when nothing is collecting the cost is one
+context variable lookup per call, not per token or posting:
+
+    with collect() as metrics:
+        model.search("stadion lapangan")
+    metrics.report()
+
+Timers are inclusive, e.g. "index.build" includes the "preprocess" time of
+the documents it consumes. Metrics are per context, so threads and asyncio
+tasks each see the Metrics they started collecting with.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+Callback = Callable[[str, str, float], None]
+
+_current: ContextVar["Metrics | None"] = ContextVar("PyIRTools_metrics", default=None)
+
+
+class Metrics:
+    """
+    Timers and counters of the instrumented stages.
+
+    Attributes:
+    timers (dict[str, float]): Seconds spent in each timed stage.
+    calls (dict[str, int]): Number of times each timed stage ran.
+    counters (dict[str, int]): Value of each counter, e.g. "search.postings".
+    callbacks (list[Callable[[str, str, float], None]]): Called with ("timer" or "counter", name, value) on every record.
+    """
+
+    def __init__(self, callbacks: list[Callback] | None = None) -> None:
+        self.timers: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self.counters: dict[str, int] = {}
+        self.callbacks: list[Callback] = list(callbacks or ())
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        Record the time of one run of a stage.
+
+        Parameters:
+        name (str): Stage name.
+        seconds (float): Time spent.
+
+        Returns:
+        None
+        """
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for callback in self.callbacks:
+            callback("timer", name, seconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter.
+
+        Parameters:
+        name (str): Counter name.
+        value (int): Amount added.
+
+        Returns:
+        None
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+        for callback in self.callbacks:
+            callback("counter", name, value)
+
+    def report(self) -> dict[str, dict]:
+        """
+        Get the recorded timers and counters.
+
+        Returns:
+        dict[str, dict]: "timers" with "seconds" and "calls" of each stage, slowest first, and "counters".
+        """
+        timers = sorted(self.timers, key=self.timers.__getitem__, reverse=True)
+        return {
+            "timers": {
+                name: {"seconds": self.timers[name], "calls": self.calls[name]}
+                for name in timers
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def reset(self) -> None:
+        """
+        Clear every timer and counter.
+
+        Returns:
+        None
+        """
+        self.timers.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+
+def current_metrics() -> Metrics | None:
+    """
+    Get the Metrics collecting in this context.
+
+    Returns:
+    Metrics | None: Active Metrics, None when instrumentation is off.
+    """
+    return _current.get()
+
+
+@contextmanager
+def collect(
+    metrics: Metrics | None = None, callbacks: list[Callback] | None = None
+) -> Iterator[Metrics]:
+    """
+    Collect metrics of the code run inside the with block.
+
+    Parameters:
+    metrics (Metrics | None): Metrics to add to, e.g. to accumulate over several blocks. Default is a new Metrics.
+    callbacks (list[Callable[[str, str, float], None]] | None): Callbacks of a new Metrics.
+
+    Returns:
+    Iterator[Metrics]: The active Metrics.
+    """
+    if metrics is None:
+        metrics = Metrics(callbacks)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
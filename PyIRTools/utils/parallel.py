@@ -0,0 +1,105 @@
+"""
+This module contains the multi-process index construction used by the
+workers option of the models.
+
+Documents are split into shards of consecutive documents. Each worker
+process preprocesses a shard and builds a partial IndexBuilder, and the
+partial builders are merged in shard order, so document ids, term ids and
+postings are the same as with a single process.
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.preprocess import Preprocess
+from utils.inverted_index import IndexBuilder, InvertedIndex
+
+SHARD_SIZE = 1000
+
+_worker_preprocess: Preprocess | None = None
+
+
+def _init_worker(
+    stopword_lang: str, cache_size: int | None, ngram_range: tuple[int, int]
+) -> None:
+    global _worker_preprocess
+    _worker_preprocess = Preprocess(
+        stopword_lang, cache_size=cache_size, ngram_range=ngram_range
+    )
+
+
+def _build_shard(documents: list[str], positional: bool) -> IndexBuilder:
+    assert _worker_preprocess is not None
+    builder = IndexBuilder(positional)
+    for words in _worker_preprocess.iter_preprocess(documents):
+        builder.add_document(words)
+    return builder
+
+
+def iter_shards(documents: Iterable[str], shard_size: int) -> Iterator[list[str]]:
+    """
+    Split documents into lists of consecutive documents.
+
+    Parameters:
+    documents (Iterable[str]): Documents.
+    shard_size (int): Number of documents in each shard.
+
+    Returns:
+    Iterator[list[str]]: Shards, in order.
+    """
+    iterator = iter(documents)
+    while shard := list(islice(iterator, shard_size)):
+        yield shard
+
+
+def build_index_parallel(
+    documents: Iterable[str],
+    preprocess: Preprocess,
+    workers: int,
+    prefix: str = "D",
+    shard_size: int = SHARD_SIZE,
+    positional: bool = False,
+) -> InvertedIndex:
+    """
+    Preprocess documents and build their inverted index with a process pool.
+
+    Parameters:
+    documents (Iterable[str]): Documents, consumed a few shards at a time.
+    preprocess (Preprocess): Preprocess whose settings are used in the workers.
+    workers (int): Number of worker processes.
+    prefix (str): Prefix of document names, e.g. "D" gives D1, D2, ...
+    shard_size (int): Number of documents sent to a worker at once.
+    positional (bool): If True, also keep the position of every word.
+
+    Returns:
+    InvertedIndex: Inverted index of the documents, identical to a single process build.
+    """
+    builder = IndexBuilder(positional)
+    pending: deque[Future] = deque()
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            preprocess.stopword_lang,
+            preprocess.stem_cache.maxsize,
+            preprocess.ngram_range,
+        ),
+    ) as executor:
+        for shard in iter_shards(documents, shard_size):
+            pending.append(executor.submit(_build_shard, shard, positional))
+            # keep a bounded number of shards in flight, merged in order
+            if len(pending) >= 2 * workers:
+                builder.merge(pending.popleft().result())
+        while pending:
+            builder.merge(pending.popleft().result())
+
+    return builder.build(prefix)
@@ -0,0 +1,189 @@
+"""
+This module contains the token pipeline used by Preprocess.
+
+A pipeline chains a tokenizer, a normalizer, a stopword set, a stemmer and
+an optional n-gram expansion. compile fuses the stages into one function
+that makes a single pass over the tokens of a document. When timing is on,
+the compiled function also measures the time spent in each stage.
+"""
+
+from time import perf_counter
+from typing import Callable, Iterable
+
+STAGES = ("tokenizer", "normalizer", "stopwords", "stemmer", "ngrams")
+
+
+def expand_ngrams(
+    words: list[str], ngram_range: tuple[int, int], separator: str = " "
+) -> list[str]:
+    """
+    Add the n-grams of a list of words.
+
+    Parameters:
+    words (list[str]): Words of a document.
+    ngram_range (tuple[int, int]): Smallest and largest n. Unigrams are kept only if the smallest n is 1.
+    separator (str): String between the words of an n-gram.
+
+    Returns:
+    list[str]: N-grams, shortest first.
+    """
+    low, high = ngram_range
+    result = list(words) if low <= 1 else []
+    for n in range(max(low, 2), high + 1):
+        result.extend(
+            separator.join(words[i : i + n]) for i in range(len(words) - n + 1)
+        )
+    return result
+
+
+class Pipeline:
+    """
+    Configurable chain of preprocessing stages, run in one pass per token.
+
+    Attributes:
+    tokenizer (Callable[[str], list[str]]): Splits a document into tokens.
+    normalizer (Callable[[str], str] | None): Applied to each token, e.g. str.lower.
+    stopwords (frozenset[str]): Tokens removed after normalization.
+    stemmer (Callable[[str], str] | None): Applied to each remaining token. Tokens stemmed to "" are removed.
+    ngram_range (tuple[int, int]): Smallest and largest n of the n-grams. (1, 1) keeps single words.
+    timed (bool): If True, measure the time spent in each stage.
+    timings (dict[str, float]): Seconds spent in each stage.
+    counts (dict[str, int]): Tokens given to each stage.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Callable[[str], list[str]],
+        normalizer: Callable[[str], str] | None = str.lower,
+        stopwords: Iterable[str] = (),
+        stemmer: Callable[[str], str] | None = None,
+        ngram_range: tuple[int, int] = (1, 1),
+        timed: bool = False,
+    ) -> None:
+        if not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError("ngram_range must be (low, high) with 1 <= low <= high")
+        self.tokenizer = tokenizer
+        self.normalizer = normalizer
+        self.stopwords = frozenset(stopwords)
+        self.stemmer = stemmer
+        self.ngram_range = ngram_range
+        self.timed = timed
+        self.timings = dict.fromkeys(STAGES, 0.0)
+        self.counts = dict.fromkeys(STAGES, 0)
+        self._run = self.compile()
+
+    def __call__(self, document: str) -> list[str]:
+        return self._run(document)
+
+    def compile(self) -> Callable[[str], list[str]]:
+        """
+        Fuse the stages into one function. Called again after changing a
+        stage.
+
+        Returns:
+        Callable[[str], list[str]]: Function preprocessing one document.
+        """
+        if self.timed:
+            self._run = self._compile_timed()
+            return self._run
+
+        tokenizer = self.tokenizer
+        normalizer = self.normalizer or (lambda token: token)
+        stopwords = self.stopwords
+        stemmer = self.stemmer or (lambda token: token)
+        ngram_range = self.ngram_range
+
+        def run(document: str) -> list[str]:
+            words: list[str] = []
+            append = words.append
+            for token in tokenizer(document):
+                token = normalizer(token)
+                if token in stopwords:
+                    continue
+                token = stemmer(token)
+                if token:
+                    append(token)
+            if ngram_range != (1, 1):
+                return expand_ngrams(words, ngram_range)
+            return words
+
+        self._run = run
+        return run
+
+    def _compile_timed(self) -> Callable[[str], list[str]]:
+        tokenizer = self.tokenizer
+        normalizer = self.normalizer or (lambda token: token)
+        stopwords = self.stopwords
+        stemmer = self.stemmer or (lambda token: token)
+        ngram_range = self.ngram_range
+        timings, counts = self.timings, self.counts
+
+        def run(document: str) -> list[str]:
+            start = perf_counter()
+            tokens = tokenizer(document)
+            tokenized = perf_counter()
+            timings["tokenizer"] += tokenized - start
+            counts["tokenizer"] += 1
+
+            normalize_time = stopword_time = stem_time = 0.0
+            n_kept = 0
+            words: list[str] = []
+            for token in tokens:
+                t0 = perf_counter()
+                token = normalizer(token)
+                t1 = perf_counter()
+                drop = token in stopwords
+                t2 = perf_counter()
+                normalize_time += t1 - t0
+                stopword_time += t2 - t1
+                if drop:
+                    continue
+                n_kept += 1
+                token = stemmer(token)
+                stem_time += perf_counter() - t2
+                if token:
+                    words.append(token)
+
+            timings["normalizer"] += normalize_time
+            timings["stopwords"] += stopword_time
+            timings["stemmer"] += stem_time
+            counts["normalizer"] += len(tokens)
+            counts["stopwords"] += len(tokens)
+            counts["stemmer"] += n_kept
+
+            if ngram_range != (1, 1):
+                start = perf_counter()
+                counts["ngrams"] += len(words)
+                words = expand_ngrams(words, ngram_range)
+                timings["ngrams"] += perf_counter() - start
+            return words
+
+        return run
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """
+        Get time spent in each stage since the last reset.
+
+        Returns:
+        dict[str, dict[str, float]]: For each stage, "seconds", "calls" (documents for the tokenizer, tokens for the other stages) and "share" of the total time.
+        """
+        total = sum(self.timings.values())
+        return {
+            stage: {
+                "seconds": self.timings[stage],
+                "calls": self.counts[stage],
+                "share": self.timings[stage] / total if total else 0.0,
+            }
+            for stage in STAGES
+        }
+
+    def reset_timings(self) -> None:
+        """
+        Reset the timings and counts of every stage.
+
+        Returns:
+        None
+        """
+        for stage in STAGES:
+            self.timings[stage] = 0.0
+            self.counts[stage] = 0
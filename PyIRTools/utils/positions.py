@@ -0,0 +1,125 @@
+"""
+This module contains the positional postings of an inverted index.
+
+The positions of a term in a document are the word offsets where it occurs
+in the preprocessed document, i.e. after stopword removal, so "sepak bola"
+in the documents and in a phrase query line up the same way. They are kept
+per posting, in the order of the CSR arrays of the index, as varint encoded
+gaps restarting at every posting, so any posting decodes alone.
+"""
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.postings import decode_varint, encode_varint, varint_sizes
+
+
+def ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Concatenate the integer ranges [start, start + length).
+
+    Parameters:
+    starts (np.ndarray): First value of each range.
+    lengths (np.ndarray): Length of each range.
+
+    Returns:
+    np.ndarray: Values of all ranges, in order.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    before = np.cumsum(lengths) - lengths
+    return np.repeat(np.asarray(starts, dtype=np.int64) - before, lengths) + np.arange(
+        total
+    )
+
+
+class PositionalPostings:
+    """
+    Delta and varint compressed positions of every posting of an index.
+
+    The positions of posting i, the entry i of the CSR indices, are
+    buffer[offsets[i]:offsets[i + 1]]. Their number is the term frequency of
+    the posting, which the index already stores.
+
+    Attributes:
+    buffer (np.ndarray): Varint encoded gaps between positions, uint8.
+    offsets (np.ndarray): Byte offset of each posting, plus the buffer length. uint32 unless the buffer is 4 GiB or more.
+    """
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray) -> None:
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def from_groups(
+        cls, positions: np.ndarray, counts: np.ndarray
+    ) -> "PositionalPostings":
+        """
+        Compress the positions of consecutive postings.
+
+        Parameters:
+        positions (np.ndarray): Increasing positions of each posting, one posting after the other.
+        counts (np.ndarray): Number of positions of each posting, at least 1.
+
+        Returns:
+        PositionalPostings: Compressed positions.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        starts = np.cumsum(counts) - counts
+
+        # gaps restart at the first position of each posting
+        gaps = np.diff(positions, prepend=0)
+        gaps[starts[counts > 0]] = positions[starts[counts > 0]]
+
+        owners = np.repeat(np.arange(len(counts)), counts)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(owners, weights=varint_sizes(gaps), minlength=len(counts)),
+            out=offsets[1:],
+        )
+        # one offset per posting, as much as the postings themselves if int64
+        if offsets[-1] < 1 << 32:
+            offsets = offsets.astype(np.uint32)
+        return cls(encode_varint(gaps), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + self.offsets.nbytes
+
+    def take(self, posting_ids: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """
+        Decode the positions of some postings. Only their bytes are read.
+
+        Parameters:
+        posting_ids (np.ndarray): Postings, entries of the CSR indices.
+        counts (np.ndarray): Term frequency of each of these postings.
+
+        Returns:
+        np.ndarray: Increasing positions of each posting, one posting after the other.
+        """
+        posting_ids = np.asarray(posting_ids, dtype=np.int64)
+        counts = np.asarray(counts, dtype=np.int64)
+        if not len(posting_ids):
+            return np.zeros(0, dtype=np.int64)
+
+        starts = self.offsets[posting_ids].astype(np.int64)
+        ends = self.offsets[posting_ids + 1].astype(np.int64)
+        gaps = decode_varint(self.buffer[ranges(starts, ends - starts)])
+
+        # a running sum over all postings, minus its value before each posting
+        positions = np.cumsum(gaps)
+        before = np.concatenate(([0], positions))[np.cumsum(counts) - counts]
+        return positions - np.repeat(before, counts)
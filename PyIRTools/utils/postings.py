@@ -0,0 +1,561 @@
+"""
+This module contains sorted postings lists and the postings evaluator for
+boolean queries.
+
+A postings list is a sorted array of document ids. CompressedPostings stores
+it as varint encoded gaps in blocks of BLOCK_SIZE entries, with a skip table
+holding the first document id and byte offset of each block, so an
+intersection only decodes the blocks that may contain a candidate.
+
+Phrase and NEAR queries first intersect the postings of their words, then
+decode the word positions of the remaining documents only. An occurrence is
+the key document << POSITION_BITS | position, so the occurrences of all
+candidate documents are merged at once with sorted array operations.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.boolean_query import Node, Term, Phrase, Near, Not, And, Or
+
+BLOCK_SIZE = 128
+POSITION_BITS = 32
+
+# use postings lists when a query touches less than 1 / 32 of the documents
+POSTINGS_DENSITY = 1 / 32
+
+
+def varint_sizes(values: np.ndarray) -> np.ndarray:
+    """
+    Get the number of bytes of each value encoded with encode_varint.
+
+    Parameters:
+    values (np.ndarray): Non-negative integers.
+
+    Returns:
+    np.ndarray: Encoded size of each value, 1 to 10 bytes.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        n_bytes += values >= (np.uint64(1) << np.uint64(shift))
+    return n_bytes
+
+
+def encode_varint(values: np.ndarray) -> np.ndarray:
+    """
+    Encode non-negative integers as little endian base 128 varints.
+
+    Parameters:
+    values (np.ndarray): Non-negative integers.
+
+    Returns:
+    np.ndarray: Encoded bytes, 7 bits per byte, high bit set on all but the last byte of a value.
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    n_bytes = varint_sizes(values)
+
+    starts = np.cumsum(n_bytes) - n_bytes
+    position = np.arange(n_bytes.sum()) - np.repeat(starts, n_bytes)
+    repeated = np.repeat(values, n_bytes)
+
+    encoded = (repeated >> (np.uint64(7) * position.astype(np.uint64))) & np.uint64(
+        0x7F
+    )
+    encoded[position < np.repeat(n_bytes, n_bytes) - 1] |= np.uint64(0x80)
+    return encoded.astype(np.uint8)
+
+
+def decode_varint(buffer: np.ndarray) -> np.ndarray:
+    """
+    Decode varints encoded with encode_varint.
+
+    Parameters:
+    buffer (np.ndarray): Encoded bytes.
+
+    Returns:
+    np.ndarray: Decoded integers.
+    """
+    buffer = np.asarray(buffer, dtype=np.uint8)
+    if len(buffer) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    ends = np.flatnonzero(buffer < 0x80)
+    starts = np.concatenate((np.zeros(1, dtype=ends.dtype), ends[:-1] + 1))
+    position = np.arange(len(buffer)) - np.repeat(starts, ends - starts + 1)
+
+    payload = (buffer & 0x7F).astype(np.uint64) << (
+        np.uint64(7) * position.astype(np.uint64)
+    )
+    return np.add.reduceat(payload, starts).astype(np.int64)
+
+
+class CompressedPostings:
+    """
+    Delta and varint compressed postings list with one skip entry per block.
+
+    Attributes:
+    buffer (np.ndarray): Varint encoded gaps.
+    count (int): Number of document ids.
+    block_first (np.ndarray): First document id of each block.
+    block_offsets (np.ndarray): Byte offset of each block, plus the buffer length.
+    """
+
+    __slots__ = ("buffer", "count", "block_first", "block_offsets")
+
+    def __init__(
+        self,
+        buffer: np.ndarray,
+        count: int,
+        block_first: np.ndarray,
+        block_offsets: np.ndarray,
+    ) -> None:
+        self.buffer = buffer
+        self.count = count
+        self.block_first = block_first
+        self.block_offsets = block_offsets
+
+    @classmethod
+    def from_array(cls, doc_ids: np.ndarray) -> "CompressedPostings":
+        """
+        Compress sorted document ids.
+
+        Parameters:
+        doc_ids (np.ndarray): Sorted, unique document ids.
+
+        Returns:
+        CompressedPostings: Compressed postings list.
+        """
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        block_first = doc_ids[::BLOCK_SIZE].copy()
+
+        # gaps restart at the first id of each block, so a block decodes alone
+        gaps = np.diff(doc_ids, prepend=0)
+        gaps[::BLOCK_SIZE] = 0
+
+        blocks = [
+            encode_varint(gaps[i : i + BLOCK_SIZE])
+            for i in range(0, len(gaps), BLOCK_SIZE)
+        ]
+        block_offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+        np.cumsum([len(block) for block in blocks], out=block_offsets[1:])
+
+        buffer = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.uint8)
+        return cls(buffer, len(doc_ids), block_first, block_offsets)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return self.buffer.nbytes + self.block_first.nbytes + self.block_offsets.nbytes
+
+    def decode_block(self, block: int) -> np.ndarray:
+        """
+        Decode one block of document ids.
+
+        Parameters:
+        block (int): Block number.
+
+        Returns:
+        np.ndarray: Document ids in the block.
+        """
+        start, end = self.block_offsets[block], self.block_offsets[block + 1]
+        return self.block_first[block] + np.cumsum(
+            decode_varint(self.buffer[start:end])
+        )
+
+    def to_array(self) -> np.ndarray:
+        """
+        Decode all document ids.
+
+        Returns:
+        np.ndarray: Sorted document ids.
+        """
+        if not self.count:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(
+            [self.decode_block(b) for b in range(len(self.block_first))]
+        )
+
+    def intersect(self, candidates: np.ndarray) -> np.ndarray:
+        """
+        Keep the candidates that are in this postings list. Only blocks
+        that may contain a candidate are decoded.
+
+        Parameters:
+        candidates (np.ndarray): Sorted document ids.
+
+        Returns:
+        np.ndarray: Sorted document ids in both.
+        """
+        if not self.count or not len(candidates):
+            return np.zeros(0, dtype=np.int64)
+
+        blocks = np.searchsorted(self.block_first, candidates, side="right") - 1
+        blocks = np.unique(blocks[blocks >= 0])
+        decoded = np.concatenate([self.decode_block(b) for b in blocks])
+        return intersect_sorted(candidates, decoded)
+
+
+Postings = np.ndarray | CompressedPostings
+Positions = Callable[[str, np.ndarray], tuple[np.ndarray, np.ndarray]]
+
+
+def to_array(postings: Postings) -> np.ndarray:
+    """
+    Get sorted document ids of a postings list.
+
+    Parameters:
+    postings (Postings): Postings list.
+
+    Returns:
+    np.ndarray: Sorted document ids.
+    """
+    if isinstance(postings, CompressedPostings):
+        return postings.to_array()
+    return np.asarray(postings)
+
+
+def intersect_sorted(candidates: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+    """
+    Intersect a short sorted array with a longer one by binary search, so
+    the cost is O(len(candidates) * log(len(doc_ids))).
+
+    Parameters:
+    candidates (np.ndarray): Sorted document ids, usually the shorter one.
+    doc_ids (np.ndarray): Sorted document ids.
+
+    Returns:
+    np.ndarray: Sorted document ids in both.
+    """
+    if not len(candidates) or not len(doc_ids):
+        return np.zeros(0, dtype=np.int64)
+    position = np.searchsorted(doc_ids, candidates)
+    found = position < len(doc_ids)
+    found[found] = doc_ids[position[found]] == candidates[found]
+    return np.asarray(candidates[found], dtype=np.int64)
+
+
+def intersect(candidates: np.ndarray, postings: Postings) -> np.ndarray:
+    """
+    Keep the candidates that are in a postings list.
+
+    Parameters:
+    candidates (np.ndarray): Sorted document ids.
+    postings (Postings): Postings list.
+
+    Returns:
+    np.ndarray: Sorted document ids in both.
+    """
+    if isinstance(postings, CompressedPostings):
+        return postings.intersect(candidates)
+    return intersect_sorted(candidates, postings)
+
+
+def difference(candidates: np.ndarray, doc_ids: np.ndarray) -> np.ndarray:
+    """
+    Remove document ids from the candidates.
+
+    Parameters:
+    candidates (np.ndarray): Sorted document ids.
+    doc_ids (np.ndarray): Sorted document ids to be removed.
+
+    Returns:
+    np.ndarray: Sorted document ids only in candidates.
+    """
+    if not len(candidates) or not len(doc_ids):
+        return np.asarray(candidates, dtype=np.int64)
+    return candidates[~np.isin(candidates, doc_ids, assume_unique=True)]
+
+
+def union(postings: list[np.ndarray]) -> np.ndarray:
+    """
+    Union sorted arrays.
+
+    Parameters:
+    postings (list[np.ndarray]): Sorted document ids.
+
+    Returns:
+    np.ndarray: Sorted, unique document ids in any of them.
+    """
+    postings = [p for p in postings if len(p)]
+    if len(postings) <= 1:
+        return np.asarray(postings[0] if postings else [], dtype=np.int64)
+    # one sort of all ids in numpy beats a merge one Python int at a time
+    return np.unique(np.concatenate(postings).astype(np.int64, copy=False))
+
+
+class PostingsEvaluator:
+    """
+    Evaluate boolean query AST over sorted postings lists.
+
+    AND children are intersected rarest first and NOT children inside an
+    AND are subtracted, so the work depends on the rarest term instead of
+    the number of documents. OR children are merged. Phrase and NEAR
+    children of an AND only decode the positions of the documents left by
+    the children before them.
+
+    Attributes:
+    get_postings (Callable[[str], Postings]): Function returning the postings of a term.
+    n_docs (int): Number of documents, used for NOT outside of AND.
+    universe (np.ndarray | None): Sorted ids of all documents. Default is 0 to n_docs - 1.
+    get_positions (Callable[[str, np.ndarray], tuple[np.ndarray, np.ndarray]] | None): Function returning the document ids and positions of a term in the given sorted documents. Needed for phrases and NEAR.
+    stopwords (frozenset[str]): Words dropped from phrases, like they were from the documents.
+    n_positions (int): Number of positions decoded so far.
+    """
+
+    def __init__(
+        self,
+        get_postings: Callable[[str], Postings],
+        n_docs: int,
+        universe: np.ndarray | None = None,
+        get_positions: Positions | None = None,
+        stopwords: frozenset[str] = frozenset(),
+    ) -> None:
+        self.get_postings = get_postings
+        self.n_docs = n_docs
+        self.universe = np.arange(n_docs) if universe is None else universe
+        self.get_positions = get_positions
+        self.stopwords = stopwords
+        self.n_positions = 0
+        self._cache: dict[str, Postings] = {}
+
+    def postings(self, word: str) -> Postings:
+        if word not in self._cache:
+            self._cache[word] = self.get_postings(word)
+        return self._cache[word]
+
+    def n_postings(self) -> int:
+        """
+        Count the postings looked up so far, each term counted once.
+
+        Returns:
+        int: Total length of the postings of the looked up terms.
+        """
+        return sum(len(postings) for postings in self._cache.values())
+
+    def positions(self, word: str, doc_ids: np.ndarray) -> np.ndarray:
+        """
+        Get the occurrences of a word in some documents.
+
+        Parameters:
+        word (str): Query word.
+        doc_ids (np.ndarray): Sorted document ids.
+
+        Returns:
+        np.ndarray: Sorted keys doc_id << POSITION_BITS | position of each occurrence.
+        """
+        if self.get_positions is None:
+            raise ValueError("Phrase and NEAR queries need a positional index")
+        docs, positions = self.get_positions(word, doc_ids)
+        self.n_positions += len(positions)
+        return (np.asarray(docs, dtype=np.int64) << POSITION_BITS) | positions
+
+    def words(self, node: Term | Phrase) -> list[str]:
+        """
+        Get the words of a term or phrase, without the stopwords of a phrase.
+
+        Parameters:
+        node (Term | Phrase): AST node.
+
+        Returns:
+        list[str]: Words, in order.
+        """
+        if isinstance(node, Term):
+            return [node.word]
+        return [word for word in node.words if word not in self.stopwords]
+
+    def documents(
+        self, words: list[str], candidates: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Intersect the postings of words, rarest first.
+
+        Parameters:
+        words (list[str]): Query words.
+        candidates (np.ndarray | None): Sorted document ids the result is limited to. Default is every document.
+
+        Returns:
+        np.ndarray: Sorted ids of the documents containing every word.
+        """
+        postings = sorted((self.postings(word) for word in set(words)), key=len)
+        if candidates is None:
+            if not postings:
+                return np.zeros(0, dtype=np.int64)
+            result = to_array(postings.pop(0))
+        else:
+            result = np.asarray(candidates, dtype=np.int64)
+        for doc_ids in postings:
+            if not len(result):
+                break
+            result = intersect(result, doc_ids)
+        return result
+
+    def occurrences(self, node: Term | Phrase, candidates: np.ndarray) -> np.ndarray:
+        """
+        Find the occurrences of a term or phrase in some documents.
+
+        Parameters:
+        node (Term | Phrase): AST node.
+        candidates (np.ndarray): Sorted ids of the documents containing all its words.
+
+        Returns:
+        np.ndarray: Sorted keys doc_id << POSITION_BITS | position of the first word of each occurrence.
+        """
+        keys = np.zeros(0, dtype=np.int64)
+        for offset, word in enumerate(self.words(node)):
+            if offset and not len(keys):
+                break
+            found = self.positions(word, candidates)
+            # the occurrence of word offset starts offset positions before it
+            found = found[(found & ((1 << POSITION_BITS) - 1)) >= offset] - offset
+            keys = found if not offset else intersect_sorted(keys, found)
+            candidates = np.unique(keys >> POSITION_BITS)
+        return keys
+
+    def evaluate_positional(
+        self, node: Phrase | Near, candidates: np.ndarray | None = None
+    ) -> np.ndarray:
+        """
+        Evaluate a phrase or NEAR node, decoding positions only in the
+        documents containing all of its words.
+
+        Parameters:
+        node (Phrase | Near): AST node.
+        candidates (np.ndarray | None): Sorted document ids the result is limited to. Default is every document.
+
+        Returns:
+        np.ndarray: Sorted document ids of the matching documents.
+        """
+        if isinstance(node, Phrase):
+            words = self.words(node)
+            if not words:
+                return np.zeros(0, dtype=np.int64)
+            keys = self.occurrences(node, self.documents(words, candidates))
+            return np.unique(keys >> POSITION_BITS)
+
+        left, right = self.words(node.left), self.words(node.right)
+        if not left or not right:
+            return np.zeros(0, dtype=np.int64)
+        candidates = self.documents(left + right, candidates)
+        starts = self.occurrences(node.left, candidates)
+        others = self.occurrences(node.right, candidates)
+
+        # spans [start, start + length - 1] at most distance apart
+        doc_starts = (starts >> POSITION_BITS) << POSITION_BITS
+        low = np.maximum(starts - (len(right) - 1 + node.distance), doc_starts)
+        high = starts + (len(left) - 1 + node.distance)
+        count = np.searchsorted(others, high, side="right") - np.searchsorted(
+            others, low
+        )
+        # a term is not near itself at the same position
+        needed = 2 if node.left == node.right else 1
+        return np.unique(starts[count >= needed] >> POSITION_BITS)
+
+    def cost(self, node: Node) -> int:
+        """
+        Estimate number of postings touched to evaluate a node.
+
+        Parameters:
+        node (Node): AST node.
+
+        Returns:
+        int: Estimated cost.
+        """
+        if isinstance(node, Term):
+            return len(self.postings(node.word))
+        if isinstance(node, Phrase):
+            return min(
+                (len(self.postings(word)) for word in self.words(node)), default=0
+            )
+        if isinstance(node, Near):
+            words = self.words(node.left) + self.words(node.right)
+            return min((len(self.postings(word)) for word in words), default=0)
+        if isinstance(node, Not):
+            return self.n_docs
+        if isinstance(node, And):
+            positive = [
+                self.cost(child)
+                for child in node.children
+                if not isinstance(child, Not)
+            ]
+            return min(positive) if positive else self.n_docs
+        if isinstance(node, Or):
+            return sum(self.cost(child) for child in node.children)
+        raise TypeError(f"Unknown node: {node!r}")
+
+    def evaluate(self, node: Node) -> np.ndarray:
+        """
+        Evaluate a node.
+
+        Parameters:
+        node (Node): AST node.
+
+        Returns:
+        np.ndarray: Sorted document ids of the matching documents.
+        """
+        if isinstance(node, Term):
+            return to_array(self.postings(node.word))
+        if isinstance(node, (Phrase, Near)):
+            return self.evaluate_positional(node)
+        if isinstance(node, Not):
+            return difference(self.universe, self.evaluate(node.child))
+        if isinstance(node, Or):
+            return union([self.evaluate(child) for child in node.children])
+        if isinstance(node, And):
+            return self.evaluate_and(node)
+        raise TypeError(f"Unknown node: {node!r}")
+
+    def evaluate_and(self, node: And) -> np.ndarray:
+        positive = sorted(
+            (child for child in node.children if not isinstance(child, Not)),
+            key=self.cost,
+        )
+        negative = [child.child for child in node.children if isinstance(child, Not)]
+
+        if positive:
+            result = self.evaluate(positive[0])
+        else:
+            result = self.universe
+
+        for child in positive[1:]:
+            if not len(result):
+                return result
+            if isinstance(child, Term):
+                result = intersect(result, self.postings(child.word))
+            elif isinstance(child, (Phrase, Near)):
+                result = self.evaluate_positional(child, result)
+            else:
+                result = intersect_sorted(result, self.evaluate(child))
+
+        for child in negative:
+            if not len(result):
+                return result
+            result = difference(result, self.evaluate(child))
+
+        return result
+
+
+def choose_strategy(evaluator: PostingsEvaluator, node: Node) -> str:
+    """
+    Choose between bitset and postings evaluation from the document
+    frequencies of the query terms.
+
+    Parameters:
+    evaluator (PostingsEvaluator): Evaluator of the query.
+    node (Node): Root of the AST.
+
+    Returns:
+    str: "postings" if the query is selective enough, else "bitset".
+    """
+    if evaluator.cost(node) <= evaluator.n_docs * POSTINGS_DENSITY:
+        return "postings"
+    return "bitset"
@@ -1,21 +1,105 @@
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-import pandas as pd
+from collections import Counter
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, Iterator
 
 import sys
 import os
 
 dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.append(dir_path)
-from pandas.core.frame import DataFrame
+from utils.metrics import Metrics, current_metrics
+from utils.pipeline import STAGES, Pipeline
+from utils.resources import get_stemmer, get_stopwords, get_tokenizer
+from utils.stem_cache import StemCache
+from utils.vocabulary import Vocabulary
+from utils.inverted_index import InvertedIndex
+
+if TYPE_CHECKING:
+    from pandas.core.frame import DataFrame
 
 
 class Preprocess:
-    def __init__(self, stopword_lang: str) -> None:
-        self.stopwords_list = stopwords.words(stopword_lang)
-        self.factory = StemmerFactory()
-        self.stemmer = self.factory.create_stemmer()
+    """
+    Preprocess text and query for Information Retrieval System.
+
+    Stopword sets, tokenizer and stemmer are shared by all instances in
+    the process, see utils.resources. Each instance has its own stem cache.
+    Documents go through a Pipeline: tokenizer, lowercase, stopwords, stem
+    cache and optional n-grams, in one pass per token.
+
+    Attributes:
+    stopword_lang (str): Stopword language.
+    cache_size (int | None): Maximum number of words in the stem cache. None means unbounded.
+    cache_path (str | None): JSON file of the stem cache. Loaded if it exists, written by save_stem_cache.
+    ngram_range (tuple[int, int]): Smallest and largest n of the indexed n-grams, e.g. (1, 2) adds word pairs.
+    timed (bool): If True, the pipeline measures the time of each stage, see timings.
+
+    Inside utils.metrics.collect, documents go through a timed copy of the
+    pipeline and the time of each stage, the number of tokens and the stem
+    cache hits and misses are added to the metrics.
+    """
+
+    def __init__(
+        self,
+        stopword_lang: str,
+        cache_size: int | None = 100_000,
+        cache_path: str | None = None,
+        ngram_range: tuple[int, int] = (1, 1),
+        timed: bool = False,
+    ) -> None:
+        self.stopword_lang = stopword_lang
+        self.stopwords = get_stopwords(stopword_lang)
+        self.stemmer = get_stemmer()
+
+        self.stem_cache = StemCache(self.stemmer.stem, cache_size, cache_path)
+
+        self.pipeline = Pipeline(
+            tokenizer=get_tokenizer(),
+            normalizer=str.lower,
+            stopwords=self.stopwords,
+            stemmer=self.stem_cache.stem,
+            ngram_range=ngram_range,
+            timed=timed,
+        )
+        self._timed_pipeline: Pipeline | None = None
+
+    @property
+    def ngram_range(self) -> tuple[int, int]:
+        return self.pipeline.ngram_range
+
+    def timings(self) -> dict[str, dict[str, float]]:
+        """
+        Get time spent in each preprocessing stage. Only measured when
+        timed is True.
+
+        Returns:
+        dict[str, dict[str, float]]: Seconds, calls and share of the total time of each stage.
+        """
+        return self.pipeline.report()
+
+    def stem(self, word: str) -> str:
+        """
+        Stem a word through the stem cache.
+
+        Parameters:
+        word (str): Word to be stemmed.
+
+        Returns:
+        str: Stemmed word.
+        """
+        return self.stem_cache.stem(word)
+
+    def save_stem_cache(self, path: str | None = None) -> str:
+        """
+        Save the stem cache so the next run starts warm.
+
+        Parameters:
+        path (str | None): JSON file. Default is cache_path.
+
+        Returns:
+        str: Path of the saved file.
+        """
+        return self.stem_cache.save(path)
 
     def preprocess_text(self, text: str) -> list[list[str]]:
         """
@@ -27,50 +111,133 @@ class Preprocess:
         Returns:
         list[list[str]]: list of list of words in each sentence.
         """
-        list_sentences = text.lower().split(".")
+        return list(self.iter_preprocess(text.split(".")))
 
-        # tokenize each sentence
-        tokens = [word_tokenize(sentence) for sentence in list_sentences]
+    def preprocess_document(self, document: str) -> list[str]:
+        """
+        Preprocess one document by tokenizing, removing stopwords, and
+        stemming, in a single pass over its tokens.
 
-        # remove stopwords
-        for i in range(len(tokens)):
-            tokens[i] = [word for word in tokens[i] if word not in self.stopwords_list]
+        Parameters:
+        document (str): document to be preprocessed.
 
-        # stemming
-        for i in range(len(tokens)):
-            tokens[i] = [self.stemmer.stem(word) for word in tokens[i]]
+        Returns:
+        list[str]: list of words in the document, followed by its n-grams if ngram_range is set.
+        """
+        metrics = current_metrics()
+        if metrics is not None:
+            return list(self._instrumented([document], metrics))[0]
+        return self.pipeline(document)
 
-        # remove empty string in list
-        for i in range(len(tokens)):
-            tokens[i] = [word for word in tokens[i] if word]
+    def iter_preprocess(self, documents: Iterable[str]) -> Iterator[list[str]]:
+        """
+        Preprocess documents one at a time. Empty documents are skipped.
 
-        # remove empty list
-        tokens = [sentence for sentence in tokens if sentence]
-        return tokens
+        Parameters:
+        documents (Iterable[str]): documents to be preprocessed.
 
-    def preprocess_query(self, query: str) -> list[str]:
+        Returns:
+        Iterator[list[str]]: list of words in each document.
         """
-        Preprocess query by tokenizing, removing stopwords, and stemming.
+        metrics = current_metrics()
+        if metrics is not None:
+            yield from filter(None, self._instrumented(documents, metrics))
+            return
+
+        pipeline = self.pipeline
+        for document in documents:
+            words = pipeline(document)
+            if words:
+                yield words
+
+    def _instrumented(
+        self, documents: Iterable[str], metrics: Metrics
+    ) -> Iterator[list[str]]:
+        pipeline = self.pipeline
+        if not pipeline.timed:
+            if self._timed_pipeline is None:
+                self._timed_pipeline = Pipeline(
+                    pipeline.tokenizer,
+                    pipeline.normalizer,
+                    pipeline.stopwords,
+                    pipeline.stemmer,
+                    pipeline.ngram_range,
+                    timed=True,
+                )
+            pipeline = self._timed_pipeline
+
+        timings, counts = dict(pipeline.timings), dict(pipeline.counts)
+        hits, misses = self.stem_cache.hits, self.stem_cache.misses
+        n_documents = n_words = 0
+        seconds = 0.0
+        try:
+            for document in documents:
+                start = perf_counter()
+                words = pipeline(document)
+                seconds += perf_counter() - start
+                n_documents += 1
+                n_words += len(words)
+                yield words
+        finally:
+            metrics.add_time("preprocess", seconds)
+            for stage in STAGES:
+                if pipeline.counts[stage] > counts[stage]:
+                    metrics.add_time(
+                        f"preprocess.{stage}", pipeline.timings[stage] - timings[stage]
+                    )
+            metrics.increment("preprocess.documents", n_documents)
+            metrics.increment(
+                "preprocess.tokens",
+                pipeline.counts["normalizer"] - counts["normalizer"],
+            )
+            metrics.increment("preprocess.words", n_words)
+            metrics.increment("stem_cache.hits", self.stem_cache.hits - hits)
+            metrics.increment("stem_cache.misses", self.stem_cache.misses - misses)
+
+    def read_sentences(self, path: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+        """
+        Read a text file sentence by sentence, split on "." like
+        preprocess_text, without loading the whole file.
 
         Parameters:
-        query (str): query to be preprocessed.
+        path (str): path of the text file.
+        chunk_size (int): number of characters read at once.
 
         Returns:
-        list[str]: list of words in query.
+        Iterator[str]: sentences in the file.
+        """
+        with open(path, encoding="utf-8") as file:
+            rest = ""
+            while chunk := file.read(chunk_size):
+                *sentences, rest = (rest + chunk).split(".")
+                yield from sentences
+            yield rest
+
+    def preprocess_stream(self, source: str | Iterable[str]) -> Iterator[list[str]]:
         """
-        # tokenize each sentence
-        list_query = word_tokenize(query.lower())
+        Preprocess a file or an iterable of documents one document at a time.
+
+        Parameters:
+        source (str | Iterable[str]): path of a text file, split into sentences like preprocess_text, or an iterable with one document per item.
 
-        # remove stopwords
-        list_query = [word for word in list_query if word not in self.stopwords_list]
+        Returns:
+        Iterator[list[str]]: list of words in each document.
+        """
+        if isinstance(source, str):
+            source = self.read_sentences(source)
+        return self.iter_preprocess(source)
 
-        # stemming
-        list_query = [self.stemmer.stem(word) for word in list_query]
+    def preprocess_query(self, query: str) -> list[str]:
+        """
+        Preprocess query by tokenizing, removing stopwords, and stemming.
 
-        # remove empty list
-        list_query = [sentence for sentence in list_query if sentence]
+        Parameters:
+        query (str): query to be preprocessed.
 
-        return list_query
+        Returns:
+        list[str]: list of words in query.
+        """
+        return self.preprocess_document(query)
 
     def remove_duplicate(self, tokens: list[list[str]]) -> list[str]:
         """
@@ -82,14 +249,9 @@ class Preprocess:
         Returns:
         list[str]: list of words without duplicate.
         """
-        word_corpus = []
-        for sentence in tokens:
-            for word in sentence:
-                if word not in word_corpus:
-                    word_corpus.append(word)
-        return word_corpus
+        return Vocabulary(word for sentence in tokens for word in sentence).terms
 
-    def count_query(self, word_list: list[str]) -> DataFrame:
+    def count_query(self, word_list: list[str]) -> "DataFrame":
         """
         Count word in query.
 
@@ -99,14 +261,13 @@ class Preprocess:
         Returns:
         DataFrame: DataFrame contain word count in query.
         """
-        # remove duplicate
-        word_count = dict.fromkeys(word_list, 0)
-        for word in word_list:
-            word_count[word] = word_list.count(word)
+        import pandas as pd
+
+        word_count = Counter(word_list)
 
         return pd.DataFrame(word_count, index=["Query"]).T
 
-    def count_word(self, word_list: list[list[str]]) -> DataFrame:
+    def count_word(self, word_list: list[list[str]]) -> "DataFrame":
         """
         Count word in each sentence.
 
@@ -116,21 +277,8 @@ class Preprocess:
         Returns:
         DataFrame: DataFrame contain word count in each sentence.
         """
-        length = len(word_list)
-
-        # remove duplicate
-        word_corpus = self.remove_duplicate(word_list)
-        sentences_code = [f"D{i+1}" for i in range(length)]
-        word_count = dict.fromkeys(sentences_code, {})
-        for keys in word_count:
-            word_count[keys] = dict.fromkeys(word_corpus, 0)
-        for i in range(length):
-            for word in word_list[i]:
-                word_count[sentences_code[i]][word] += 1
-
-        # convert to dataframe
-        df = pd.DataFrame(word_count).fillna(0)
-        return df
+        # count through the sparse index, the dense table is only built at the end
+        return InvertedIndex.from_tokens(word_list).to_dataframe()
 
 
 # Example
@@ -0,0 +1,81 @@
+"""
+This module contains the process-wide stopword sets, tokenizer and stemmer
+shared by every Preprocess.
+
+NLTK and Sastrawi are imported and their data loaded on first use only, so
+importing PyIRTools stays fast and creating another Preprocess is cheap.
+"""
+
+from functools import lru_cache, partial
+from typing import Callable, Iterable
+
+
+@lru_cache(maxsize=None)
+def get_stopwords(stopword_lang: str) -> frozenset[str]:
+    """
+    Get the NLTK stopwords of a language, loaded once per process.
+
+    Parameters:
+    stopword_lang (str): Stopword language, e.g. "indonesian".
+
+    Returns:
+    frozenset[str]: Stopwords.
+    """
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words(stopword_lang))
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer() -> Callable[[str], list[str]]:
+    """
+    Get the NLTK word tokenizer.
+
+    Documents are already split into sentences on ".", so the tokenizer
+    keeps each text as one line. This skips loading the Punkt sentence
+    model, the slowest part of the first query.
+
+    Returns:
+    Callable[[str], list[str]]: Function splitting a text into tokens.
+    """
+    from nltk.tokenize import word_tokenize
+
+    return partial(word_tokenize, preserve_line=True)
+
+
+class RootWords:
+    """
+    Root word dictionary of the Sastrawi stemmer, implementing its
+    DictionaryInterface. Sastrawi's ArrayDictionary scans a list on every
+    lookup, a frozenset takes O(1).
+
+    Attributes:
+    words (frozenset[str]): Root words.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words = frozenset(word for word in words if word.strip())
+
+    def contains(self, word: str) -> bool:
+        return word in self.words
+
+    def count(self) -> int:
+        return len(self.words)
+
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    """
+    Get the Sastrawi stemmer, created once per process.
+
+    The stemmer has no result cache of its own, unlike the one of
+    StemmerFactory.create_stemmer, whose cache is unbounded. Preprocess
+    caches stems in a StemCache.
+
+    Returns:
+    Stemmer: Sastrawi stemmer. Shared, its dictionary is read only.
+    """
+    from Sastrawi.Stemmer.Stemmer import Stemmer
+    from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+
+    return Stemmer(RootWords(StemmerFactory().get_words()))
@@ -0,0 +1,212 @@
+"""
+This module contains the query result cache of the models.
+
+Entries are keyed by a normalized query, e.g. its stemmed terms, and stored
+for one version of the index: the first lookup or store with another
+version drops every entry, so changing the documents invalidates the cache
+without the models having to clear it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.metrics import current_metrics
+
+ARRAY_OVERHEAD = sys.getsizeof(np.zeros(0))
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a cached key or value.
+
+    Parameters:
+    value (Any): numpy array, or tuple of arrays, strings and numbers.
+
+    Returns:
+    int: Size in bytes. Data shared with other objects is counted too.
+    """
+    if isinstance(value, np.ndarray):
+        return ARRAY_OVERHEAD + value.nbytes
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Least recently used cache of query results, bounded in entries and
+    bytes, with an optional time to live.
+
+    Attributes:
+    maxsize (int | None): Maximum number of entries. None means unbounded.
+    max_bytes (int | None): Maximum estimated size of keys and values. None means unbounded.
+    ttl (float | None): Seconds an entry stays valid. None means until evicted.
+    name (str): Prefix of the metrics counters, e.g. "cache.hits".
+    clock (Callable[[], float]): Time source of the ttl.
+    hits (int): Number of lookups found in the cache.
+    misses (int): Number of lookups not found, or found expired.
+    evictions (int): Number of entries dropped to stay within the bounds.
+    nbytes (int): Estimated size of the cached keys and values.
+
+    Threads may share a cache, a lock guards every lookup and store. Cached
+    numpy arrays are made read-only, since every hit returns the same ones.
+    """
+
+    def __init__(
+        self,
+        maxsize: int | None = 1024,
+        max_bytes: int | None = 64 * 1024 * 1024,
+        ttl: float | None = None,
+        name: str = "cache",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.name = name
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._version: Hashable = None
+        self._lock = threading.Lock()
+        # key -> (value, size, expiry time)
+        self._cache: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _check_version(self, version: Hashable) -> None:
+        # called with the lock held
+        if version != self._version:
+            self._cache.clear()
+            self.nbytes = 0
+            self._version = version
+
+    def get(self, key: Hashable, version: Hashable = None) -> Any | None:
+        """
+        Get the cached result of a query.
+
+        Parameters:
+        key (Hashable): Normalized query.
+        version (Hashable): Version of the index the result is wanted for.
+
+        Returns:
+        Any | None: Cached result, None if there is none for this version or it expired.
+        """
+        with self._lock:
+            self._check_version(version)
+            entry = self._cache.get(key)
+            if entry is not None and entry[2] <= self.clock():
+                del self._cache[key]
+                self.nbytes -= entry[1]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache.move_to_end(key)
+
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.increment(
+                f"{self.name}.misses" if entry is None else f"{self.name}.hits"
+            )
+        return None if entry is None else entry[0]
+
+    def put(self, key: Hashable, value: Any, version: Hashable = None) -> None:
+        """
+        Cache the result of a query, evicting the least recently used
+        entries beyond the bounds. A result larger than max_bytes alone is
+        not cached.
+
+        Parameters:
+        key (Hashable): Normalized query.
+        value (Any): Result, not None. numpy arrays, alone or in a tuple, are made read-only.
+        version (Hashable): Version of the index the result was computed on.
+
+        Returns:
+        None
+        """
+        size = estimate_size(key) + estimate_size(value)
+        if (self.maxsize is not None and self.maxsize <= 0) or (
+            self.max_bytes is not None and size > self.max_bytes
+        ):
+            return
+        for array in value if isinstance(value, tuple) else (value,):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+        expiry = float("inf") if self.ttl is None else self.clock() + self.ttl
+        evicted = 0
+        with self._lock:
+            self._check_version(version)
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[1]
+            self._cache[key] = (value, size, expiry)
+            self.nbytes += size
+
+            while (self.maxsize is not None and len(self._cache) > self.maxsize) or (
+                self.max_bytes is not None and self.nbytes > self.max_bytes
+            ):
+                self.nbytes -= self._cache.popitem(last=False)[1][1]
+                evicted += 1
+            self.evictions += evicted
+
+        metrics = current_metrics()
+        if metrics is not None and evicted:
+            metrics.increment(f"{self.name}.evictions", evicted)
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Get fraction of lookups found in the cache.
+
+        Returns:
+        float: Hit rate, 0 if there was no lookup.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Get the counters of the cache.
+
+        Returns:
+        dict[str, int | float]: "hits", "misses", "hit_rate", "evictions", "entries" and "nbytes".
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "entries": len(self._cache),
+            "nbytes": self.nbytes,
+        }
+
+    def clear(self) -> None:
+        """
+        Remove all cached results and reset the counters.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            self._cache.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
@@ -0,0 +1,101 @@
+"""
+This module contains the result records returned by the models.
+
+Results hold document ids and scores as numpy arrays, with a reference to
+the document names of the index they came from. Nothing is formatted or
+printed here; utils.formatting turns results into text or DataFrames.
+"""
+
+import numpy as np
+
+
+class RankedResult:
+    """
+    Documents ranked by score, most relevant first.
+
+    Attributes:
+    query (str): Query the documents were ranked for.
+    doc_ids (np.ndarray): Document ids, most relevant first.
+    scores (np.ndarray): Score of each document.
+    doc_names (list[str]): Names of all documents of the index, doc_names[i] is document i.
+    """
+
+    __slots__ = ("query", "doc_ids", "scores", "doc_names")
+
+    def __init__(
+        self, query: str, doc_ids: np.ndarray, scores: np.ndarray, doc_names: list[str]
+    ) -> None:
+        self.query = query
+        self.doc_ids = doc_ids
+        self.scores = scores
+        self.doc_names = doc_names
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __repr__(self) -> str:
+        return f"RankedResult(query={self.query!r}, documents={len(self)})"
+
+    def names(self) -> list[str]:
+        """
+        Get the names of the ranked documents.
+
+        Returns:
+        list[str]: Document names, most relevant first.
+        """
+        doc_names = self.doc_names
+        return [doc_names[i] for i in self.doc_ids.tolist()]
+
+    def items(self) -> list[tuple[str, float]]:
+        """
+        Get the names and scores of the ranked documents.
+
+        Returns:
+        list[tuple[str, float]]: Document names and scores, most relevant first.
+        """
+        return list(zip(self.names(), self.scores.tolist()))
+
+
+class BooleanResult:
+    """
+    Documents matching a boolean query.
+
+    Attributes:
+    query (str): Query as evaluated, lowercased.
+    expression (str): Parsed boolean expression, or the query itself if it is invalid.
+    doc_ids (np.ndarray): Sorted ids of the matching documents, empty if the query is invalid.
+    doc_names (list[str]): Names of all documents of the index, doc_names[i] is document i.
+    valid (bool): False if the query could not be parsed.
+    """
+
+    __slots__ = ("query", "expression", "doc_ids", "doc_names", "valid")
+
+    def __init__(
+        self,
+        query: str,
+        expression: str,
+        doc_ids: np.ndarray,
+        doc_names: list[str],
+        valid: bool = True,
+    ) -> None:
+        self.query = query
+        self.expression = expression
+        self.doc_ids = doc_ids
+        self.doc_names = doc_names
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def __repr__(self) -> str:
+        return f"BooleanResult(query={self.query!r}, documents={len(self)})"
+
+    def names(self) -> list[str]:
+        """
+        Get the names of the matching documents.
+
+        Returns:
+        list[str]: Document names, in document id order.
+        """
+        doc_names = self.doc_names
+        return [doc_names[i] for i in self.doc_ids.tolist()]
@@ -0,0 +1,784 @@
+"""
+This module contains the segmented index used to add, delete and update
+documents without rebuilding the whole index.
+
+Every batch of added documents becomes a new immutable segment (an
+InvertedIndex with its own vocabulary). Deleted documents are only marked
+with a tombstone in their segment. Document frequencies and the statistics
+needed for TF-IDF document norms are kept up to date incrementally, and
+merge_segments compacts all segments into one, optionally in a background
+thread.
+"""
+
+import re
+import threading
+from typing import Callable, Iterable
+
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.inverted_index import InvertedIndex
+from utils.positions import PositionalPostings, ranges
+from utils.term_dictionary import TermDictionary
+from utils.vocabulary import Vocabulary
+from utils.weighting import TF_FUNCTIONS
+
+
+def _reserve(array: np.ndarray, size: int) -> np.ndarray:
+    # grow by doubling, so appending one document is amortized O(1)
+    if len(array) >= size:
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class Segment:
+    """
+    One immutable part of a SegmentedIndex.
+
+    Attributes:
+    index (InvertedIndex): Postings of the segment, with local term and document ids.
+    doc_ids (np.ndarray): Document id of each local document.
+    term_ids (np.ndarray): Global term id of each local term.
+    live (np.ndarray): False for deleted local documents.
+    serial (int): Unique number of the segment.
+    """
+
+    __slots__ = ("index", "doc_ids", "term_ids", "live", "n_live", "serial", "_forward")
+
+    def __init__(
+        self,
+        index: InvertedIndex,
+        doc_ids: np.ndarray,
+        term_ids: np.ndarray,
+        serial: int,
+    ) -> None:
+        self.index = index
+        self.doc_ids = doc_ids
+        self.term_ids = term_ids
+        self.live = np.ones(index.n_docs, dtype=bool)
+        self.n_live = index.n_docs
+        self.serial = serial
+        self._forward: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+
+    def forward(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the terms of each local document (forward index).
+
+        Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Pointer per local document, global term ids and term frequencies.
+        """
+        if self._forward is None:
+            index = self.index
+            order = np.argsort(index.indices, kind="stable")
+            pointer = np.zeros(index.n_docs + 1, dtype=np.int64)
+            np.cumsum(
+                np.bincount(index.indices, minlength=index.n_docs), out=pointer[1:]
+            )
+            self._forward = (
+                pointer,
+                self.term_ids[index.row_ids()[order]],
+                index.data[order],
+            )
+        return self._forward
+
+    def max_tfs(self) -> np.ndarray:
+        """
+        Get the highest term frequency of each local document.
+
+        Returns:
+        np.ndarray: Highest term frequency, 0 for empty documents.
+        """
+        pointer, _, tfs = self.forward()
+        max_tfs = np.zeros(len(self.doc_ids), dtype=np.int64)
+        non_empty = np.diff(pointer) > 0
+        if non_empty.any():
+            max_tfs[non_empty] = np.maximum.reduceat(tfs, pointer[:-1][non_empty])
+        return max_tfs
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get postings of a term in the live documents of the segment.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document ids and term frequencies.
+        """
+        docs, tfs = self.index.postings(term)
+        if self.n_live < len(self.live):
+            keep = self.live[docs]
+            docs, tfs = docs[keep], tfs[keep]
+        return self.doc_ids[docs], tfs
+
+    def positions(
+        self, term: str, doc_ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get positions of a term in the live documents of the segment.
+
+        Parameters:
+        term (str): Term to look up.
+        doc_ids (np.ndarray | None): Sorted document ids to decode the positions of. Default is every document.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document id of each occurrence and its word position.
+        """
+        docs, _ = self.index.postings(term)
+        mask = self.live[docs] if self.n_live < len(self.live) else None
+        if doc_ids is not None:
+            found = np.isin(self.doc_ids[docs], doc_ids, assume_unique=True)
+            mask = found if mask is None else mask & found
+        docs, positions = self.index.term_positions(term, mask)
+        return self.doc_ids[docs], positions
+
+
+class NormStatistics:
+    """
+    Sums giving the TF-IDF norm of each document for one TF function.
+
+    With L = log10(N), w the weighted TF and g = log10(DF) of each term,
+    the squared norm of a document is L^2 A - 2 L B + C where A = sum w^2,
+    B = sum w^2 g and C = sum w^2 g^2. Only B and C depend on DF, they are
+    corrected for the terms whose DF changed before the next use.
+
+    Attributes:
+    tf_function (Callable[[np.ndarray, np.ndarray], np.ndarray]): TF function, see utils.weighting.TF_FUNCTIONS.
+    log_df (np.ndarray): log10(DF) of each term as applied to B and C.
+    dirty_terms (set[int]): Terms whose DF may differ from log_df.
+    """
+
+    __slots__ = (
+        "tf_function",
+        "squares",
+        "weighted",
+        "weighted_squares",
+        "log_df",
+        "dirty_terms",
+    )
+
+    def __init__(
+        self, tf_function: Callable[[np.ndarray, np.ndarray], np.ndarray]
+    ) -> None:
+        self.tf_function = tf_function
+        self.squares = np.zeros(0)
+        self.weighted = np.zeros(0)
+        self.weighted_squares = np.zeros(0)
+        self.log_df = np.zeros(0)
+        self.dirty_terms: set[int] = set()
+
+    def reserve(self, n_ids: int, n_terms: int) -> None:
+        self.squares = _reserve(self.squares, n_ids)
+        self.weighted = _reserve(self.weighted, n_ids)
+        self.weighted_squares = _reserve(self.weighted_squares, n_ids)
+        self.log_df = _reserve(self.log_df, n_terms)
+
+    def add(
+        self,
+        doc_ids: np.ndarray,
+        local_docs: np.ndarray,
+        terms: np.ndarray,
+        tfs: np.ndarray,
+        max_tfs: np.ndarray,
+    ) -> None:
+        """
+        Set the sums of new documents from their forward index.
+
+        Parameters:
+        doc_ids (np.ndarray): Id of each new document.
+        local_docs (np.ndarray): Position in doc_ids of each entry.
+        terms (np.ndarray): Global term id of each entry.
+        tfs (np.ndarray): Term frequency of each entry.
+        max_tfs (np.ndarray): Highest term frequency in the document of each entry.
+
+        Returns:
+        None
+        """
+        w2 = self.tf_function(tfs, max_tfs) ** 2
+        log_df = self.log_df[terms]
+        n = len(doc_ids)
+        self.squares[doc_ids] = np.bincount(local_docs, weights=w2, minlength=n)
+        self.weighted[doc_ids] = np.bincount(
+            local_docs, weights=w2 * log_df, minlength=n
+        )
+        self.weighted_squares[doc_ids] = np.bincount(
+            local_docs, weights=w2 * log_df**2, minlength=n
+        )
+
+    def norms(self, doc_ids: np.ndarray, n_docs: int) -> np.ndarray:
+        log_n = np.log10(n_docs) if n_docs else 0.0
+        squared = (
+            log_n**2 * self.squares[doc_ids]
+            - 2 * log_n * self.weighted[doc_ids]
+            + self.weighted_squares[doc_ids]
+        )
+        return np.sqrt(np.maximum(squared, 0))
+
+
+class SegmentedIndex:
+    """
+    Inverted index made of segments, supporting incremental changes.
+
+    Document ids are stable: an updated document keeps its id and name, and
+    merging segments does not renumber documents.
+
+    Attributes:
+    prefix (str): Prefix of document names.
+    positional (bool): If True, segments keep word positions, see term_positions.
+    vocabulary (Vocabulary): Global term ids.
+    doc_names (list[str]): Name of each document id, deleted ones included.
+    segments (list[Segment]): Segments, oldest first.
+    n_docs (int): Number of live documents.
+    version (int): Incremented on every change of the documents.
+    """
+
+    def __init__(self, prefix: str = "D", positional: bool = False) -> None:
+        self.prefix = prefix
+        self.positional = positional
+        self.vocabulary = Vocabulary()
+        self.doc_names: list[str] = []
+        self.segments: list[Segment] = []
+        self.n_docs = 0
+        self.version = 0
+
+        self._lock = threading.RLock()
+        self._next_serial = 0
+        self._next_name = 1
+        self._by_serial: dict[int, Segment] = {}
+        self._ids_by_name: dict[str, int] = {}
+
+        # per document id
+        self._live = np.zeros(0, dtype=bool)
+        self._doc_lengths = np.zeros(0, dtype=np.int64)
+        self._max_tfs = np.zeros(0, dtype=np.int64)
+        self._segment_of = np.zeros(0, dtype=np.int64)
+        self._local_of = np.zeros(0, dtype=np.int64)
+
+        # per global term id
+        self._df = np.zeros(0, dtype=np.int64)
+
+        self._total_length = 0
+
+        # one per TF function, created on first use
+        self._norm_statistics: dict[str, NormStatistics] = {}
+
+        self._compact: tuple[int, InvertedIndex] | None = None
+        # index loaded with precomputed statistics, valid until the first change
+        self._stored: tuple[int, InvertedIndex] | None = None
+        # error of the last background merge, raised by the next call
+        self._merge_error: Exception | None = None
+
+    @classmethod
+    def from_index(cls, index: InvertedIndex, prefix: str = "D") -> "SegmentedIndex":
+        """
+        Create segmented index with one segment holding an existing index.
+
+        Parameters:
+        index (InvertedIndex): Inverted index of the documents.
+        prefix (str): Prefix of the names of documents added later.
+
+        Returns:
+        SegmentedIndex: Segmented index.
+        """
+        segmented = cls(prefix, positional=index.positions is not None)
+        segmented.doc_names.extend(index.doc_names)
+        segmented._ids_by_name = {name: i for i, name in enumerate(index.doc_names)}
+
+        # new documents must not reuse the number of an existing name
+        pattern = re.compile(rf"{re.escape(prefix)}(\d+)")
+        numbers = [
+            int(m.group(1)) for m in map(pattern.fullmatch, index.doc_names) if m
+        ]
+        segmented._next_name = max(numbers, default=0) + 1
+
+        term_ids = None
+        if isinstance(index.vocabulary, TermDictionary):
+            # keep the memory-mapped dictionary, new terms are added on top
+            segmented.vocabulary = Vocabulary(base=index.vocabulary)
+            term_ids = np.arange(index.n_terms)
+
+        segmented._add_segment(index, np.arange(index.n_docs), term_ids, index.max_tfs)
+        segmented._compact = (segmented.version, index)
+        if index.idf is not None or index.norms:
+            segmented._stored = (segmented.version, index)
+        return segmented
+
+    @property
+    def n_ids(self) -> int:
+        return len(self.doc_names)
+
+    @property
+    def n_terms(self) -> int:
+        return len(self.vocabulary)
+
+    @property
+    def live(self) -> np.ndarray:
+        return self._live[: self.n_ids]
+
+    @property
+    def doc_lengths(self) -> np.ndarray:
+        return self._doc_lengths[: self.n_ids]
+
+    @property
+    def max_tfs(self) -> np.ndarray:
+        return self._max_tfs[: self.n_ids]
+
+    @property
+    def avg_doc_length(self) -> float:
+        return self._total_length / self.n_docs if self.n_docs else 0.0
+
+    def live_ids(self) -> np.ndarray:
+        """
+        Get ids of the live documents.
+
+        Returns:
+        np.ndarray: Sorted document ids.
+        """
+        return np.flatnonzero(self.live)
+
+    def doc_id(self, name: str) -> int:
+        """
+        Get id of a live document.
+
+        Parameters:
+        name (str): Document name, e.g. "D3".
+
+        Returns:
+        int: Document id.
+
+        Raises:
+        KeyError: If there is no live document with this name.
+        """
+        doc_id = self._ids_by_name.get(name)
+        if doc_id is None or not self._live[doc_id]:
+            raise KeyError(f"Document {name} does not exist")
+        return doc_id
+
+    def term_id(self, term: str) -> int | None:
+        return self.vocabulary.get(term)
+
+    def document_frequency(self) -> np.ndarray:
+        """
+        Get number of live documents containing each global term id.
+
+        Returns:
+        np.ndarray: Document frequency of each term.
+        """
+        return self._df[: self.n_terms]
+
+    def postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get postings of a term over the live documents of all segments.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Sorted document ids and their term frequencies.
+        """
+        parts = [segment.postings(term) for segment in tuple(self.segments)]
+        parts = [part for part in parts if len(part[0])]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+        if len(parts) == 1:
+            return parts[0]
+
+        doc_ids = np.concatenate([part[0] for part in parts])
+        tfs = np.concatenate([part[1] for part in parts])
+        order = np.argsort(doc_ids, kind="stable")
+        return doc_ids[order], tfs[order]
+
+    def term_positions(
+        self, term: str, doc_ids: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get positions of a term over the live documents of all segments.
+
+        Parameters:
+        term (str): Term to look up.
+        doc_ids (np.ndarray | None): Sorted document ids to decode the positions of. Default is every document.
+
+        Returns:
+        tuple[np.ndarray, np.ndarray]: Document id of each occurrence and its word position, sorted by document then position.
+
+        Raises:
+        ValueError: If the index is not positional.
+        """
+        if not self.positional:
+            raise ValueError(
+                "The index has no positions, build it with positional=True"
+            )
+        parts = [segment.positions(term, doc_ids) for segment in tuple(self.segments)]
+        parts = [part for part in parts if len(part[0])]
+        if not parts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+
+        # a document is in one segment, the positions within it stay in order
+        occurrences = np.concatenate([part[0] for part in parts])
+        positions = np.concatenate([part[1] for part in parts])
+        order = np.argsort(occurrences, kind="stable")
+        return occurrences[order], positions[order]
+
+    def add_documents(self, tokens: Iterable[list[str]]) -> list[int]:
+        """
+        Add documents as a new segment.
+
+        Parameters:
+        tokens (Iterable[list[str]]): list of words in each document.
+
+        Returns:
+        list[int]: Ids of the added documents.
+        """
+        index = InvertedIndex.from_tokens(tokens, positional=self.positional)
+        if not index.n_docs:
+            return []
+
+        with self._lock:
+            doc_ids = np.arange(self.n_ids, self.n_ids + index.n_docs)
+            index.doc_names = [
+                f"{self.prefix}{self._next_name + i}" for i in range(index.n_docs)
+            ]
+            self._next_name += index.n_docs
+            self.doc_names.extend(index.doc_names)
+            self._ids_by_name.update(zip(index.doc_names, doc_ids.tolist()))
+            self._add_segment(index, doc_ids)
+
+        return doc_ids.tolist()
+
+    def delete_documents(self, doc_ids: Iterable[int]) -> None:
+        """
+        Delete documents by marking them with a tombstone.
+
+        Parameters:
+        doc_ids (Iterable[int]): Ids of the documents to be deleted.
+
+        Returns:
+        None
+
+        Raises:
+        KeyError: If a document does not exist, is already deleted or is given twice. Nothing is deleted then.
+        """
+        with self._lock:
+            doc_ids = [int(doc_id) for doc_id in doc_ids]
+            # check the whole batch first, so a failing call changes nothing
+            for doc_id in doc_ids:
+                if not 0 <= doc_id < self.n_ids or not self._live[doc_id]:
+                    raise KeyError(f"Document {doc_id} does not exist")
+            if len(set(doc_ids)) < len(doc_ids):
+                raise KeyError("Documents to be deleted are given more than once")
+
+            for doc_id in doc_ids:
+                segment = self._by_serial[int(self._segment_of[doc_id])]
+                local = int(self._local_of[doc_id])
+                segment.live[local] = False
+                segment.n_live -= 1
+                self._live[doc_id] = False
+                self.n_docs -= 1
+                self._total_length -= int(self._doc_lengths[doc_id])
+
+                pointer, terms, _ = segment.forward()
+                terms = terms[pointer[local] : pointer[local + 1]]
+                self._df[terms] -= 1
+                for statistics in self._norm_statistics.values():
+                    statistics.dirty_terms.update(terms.tolist())
+
+                if not segment.n_live:
+                    self.segments.remove(segment)
+                    del self._by_serial[segment.serial]
+
+            self.version += 1
+
+    def update_document(self, doc_id: int, words: list[str]) -> None:
+        """
+        Replace a document, keeping its id and name.
+
+        Parameters:
+        doc_id (int): Id of the document.
+        words (list[str]): list of words of the new document.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            self.delete_documents([doc_id])
+            index = InvertedIndex.from_tokens([words], positional=self.positional)
+            index.doc_names = [self.doc_names[doc_id]]
+            self._add_segment(index, np.array([doc_id]))
+
+    def _add_segment(
+        self,
+        index: InvertedIndex,
+        doc_ids: np.ndarray,
+        term_ids: np.ndarray | None = None,
+        max_tfs: np.ndarray | None = None,
+    ) -> None:
+        with self._lock:
+            if term_ids is None:
+                term_ids = np.array(self.vocabulary.update(index.terms), dtype=np.int64)
+            segment = Segment(index, doc_ids, term_ids, self._next_serial)
+            self._next_serial += 1
+
+            n_ids, n_terms = self.n_ids, self.n_terms
+            self._live = _reserve(self._live, n_ids)
+            self._doc_lengths = _reserve(self._doc_lengths, n_ids)
+            self._max_tfs = _reserve(self._max_tfs, n_ids)
+            self._segment_of = _reserve(self._segment_of, n_ids)
+            self._local_of = _reserve(self._local_of, n_ids)
+            self._df = _reserve(self._df, n_terms)
+
+            self._live[doc_ids] = True
+            self._doc_lengths[doc_ids] = index.doc_lengths
+            # the forward index behind segment.max_tfs is a copy of the postings
+            self._max_tfs[doc_ids] = segment.max_tfs() if max_tfs is None else max_tfs
+            self._segment_of[doc_ids] = segment.serial
+            self._local_of[doc_ids] = np.arange(index.n_docs)
+            self._df[term_ids] += index.document_frequency()
+            self._total_length += int(index.doc_lengths.sum())
+
+            # norm statistics with the DF already applied to other documents
+            for statistics in self._norm_statistics.values():
+                statistics.reserve(n_ids, n_terms)
+                self._add_norm_statistics(statistics, segment)
+                statistics.dirty_terms.update(term_ids.tolist())
+
+            self.segments.append(segment)
+            self._by_serial[segment.serial] = segment
+            self.n_docs += index.n_docs
+            self.version += 1
+
+    def _add_norm_statistics(
+        self, statistics: NormStatistics, segment: Segment
+    ) -> None:
+        pointer, terms, tfs = segment.forward()
+        local_docs = np.repeat(np.arange(len(segment.doc_ids)), np.diff(pointer))
+        max_tfs = self._max_tfs[segment.doc_ids][local_docs]
+        statistics.add(segment.doc_ids, local_docs, terms, tfs, max_tfs)
+
+    def _get_norm_statistics(self, tf: str) -> NormStatistics:
+        with self._lock:
+            statistics = self._norm_statistics.get(tf)
+            if statistics is None:
+                statistics = NormStatistics(TF_FUNCTIONS[tf])
+                statistics.reserve(self.n_ids, self.n_terms)
+                df = self.document_frequency()
+                present = df > 0
+                statistics.log_df[: self.n_terms][present] = np.log10(df[present])
+                for segment in self.segments:
+                    self._add_norm_statistics(statistics, segment)
+                self._norm_statistics[tf] = statistics
+
+            for term_id in statistics.dirty_terms:
+                df = self._df[term_id]
+                if not df:
+                    continue
+                old, new = statistics.log_df[term_id], np.log10(df)
+                if old == new:
+                    continue
+                doc_ids, tfs = self.postings(self.vocabulary.term(term_id))
+                w2 = statistics.tf_function(tfs, self._max_tfs[doc_ids]) ** 2
+                statistics.weighted[doc_ids] += w2 * (new - old)
+                statistics.weighted_squares[doc_ids] += w2 * (new**2 - old**2)
+                statistics.log_df[term_id] = new
+            statistics.dirty_terms.clear()
+            return statistics
+
+    def tfidf_norms(self, doc_ids: np.ndarray, tf: str = "raw") -> np.ndarray:
+        """
+        Get L2 norms of the TF-IDF vectors of documents, IDF being
+        log10(N / DF) over the live documents.
+
+        Only the documents containing terms whose DF changed since the
+        last call are updated, so the cost follows the size of the changes.
+
+        Parameters:
+        doc_ids (np.ndarray): Document ids.
+        tf (str): TF function, a key of utils.weighting.TF_FUNCTIONS.
+
+        Returns:
+        np.ndarray: Norm of each document.
+        """
+        stored = self.stored_index()
+        if stored is not None and tf in stored.norms:
+            return stored.norms[tf][doc_ids]
+        return self._get_norm_statistics(tf).norms(doc_ids, self.n_docs)
+
+    def stored_index(self) -> InvertedIndex | None:
+        """
+        Get the index this one was created from, if it was loaded with
+        precomputed statistics and the documents have not changed since.
+        Its document ids are the ones of this index.
+
+        Returns:
+        InvertedIndex | None: Loaded index, see InvertedIndex.idf and InvertedIndex.norms.
+        """
+        stored = self._stored
+        if stored is None or stored[0] != self.version:
+            return None
+        return stored[1]
+
+    def compact(self) -> InvertedIndex:
+        """
+        Get one inverted index of the live documents, in document id order,
+        with local document ids. Cached until the documents change.
+
+        Returns:
+        InvertedIndex: Inverted index of the live documents.
+
+        Raises:
+        RuntimeError: If the last background merge failed, once.
+        """
+        with self._lock:
+            self._raise_merge_error()
+            if self._compact is None or self._compact[0] != self.version:
+                segments = list(self.segments)
+                index, _, _, _ = self._merge(
+                    segments, [segment.live for segment in segments]
+                )
+                self._compact = (self.version, index)
+            return self._compact[1]
+
+    def _merge(
+        self, segments: list[Segment], lives: list[np.ndarray]
+    ) -> tuple[InvertedIndex, np.ndarray, np.ndarray, np.ndarray]:
+        # lives are snapshots of the live flags, taken with the lock held
+        rows, docs, data, sources, word_positions = [], [], [], [], []
+        for segment, live in zip(segments, lives):
+            index = segment.index
+            keep = live[index.indices]
+            rows.append(segment.term_ids[index.row_ids()[keep]])
+            docs.append(segment.doc_ids[index.indices[keep]])
+            data.append(index.data[keep])
+            if index.positions is not None:
+                kept = np.flatnonzero(keep)
+                word_positions.append(index.positions.take(kept, index.data[kept]))
+            local = np.flatnonzero(live)
+            sources.append(np.stack((np.full(len(local), segment.serial), local)))
+
+        rows_np = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        docs_np = np.concatenate(docs) if docs else np.zeros(0, dtype=np.int64)
+        data_np = np.concatenate(data) if data else np.zeros(0, dtype=np.int32)
+        sources_np = (
+            np.concatenate(sources, axis=1)
+            if sources
+            else np.zeros((2, 0), dtype=np.int64)
+        )
+
+        # documents in id order, terms in global id order without unused terms
+        source_ids = (
+            np.concatenate([s.doc_ids[live] for s, live in zip(segments, lives)])
+            if segments
+            else np.zeros(0, dtype=np.int64)
+        )
+        doc_order = np.argsort(source_ids, kind="stable")
+        doc_ids = source_ids[doc_order]
+        sources_np = sources_np[:, doc_order]
+        term_ids, rows_np = np.unique(rows_np, return_inverse=True)
+
+        positions = np.searchsorted(doc_ids, docs_np)
+        order = np.lexsort((positions, rows_np))
+        indptr = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_np, minlength=len(term_ids)), out=indptr[1:])
+
+        merged_positions = None
+        if self.positional:
+            # move the positions of each posting along with it
+            flat = (
+                np.concatenate(word_positions)
+                if word_positions
+                else np.zeros(0, dtype=np.int64)
+            )
+            starts = np.cumsum(data_np, dtype=np.int64) - data_np
+            counts = data_np[order]
+            merged_positions = PositionalPostings.from_groups(
+                flat[ranges(starts[order], counts)], counts
+            )
+
+        index = InvertedIndex(
+            vocabulary=Vocabulary(self.vocabulary.term(t) for t in term_ids.tolist()),
+            doc_names=[self.doc_names[d] for d in doc_ids.tolist()],
+            indptr=indptr,
+            indices=positions[order].astype(np.int32),
+            data=data_np[order].astype(np.int32),
+            doc_lengths=self._doc_lengths[doc_ids].astype(np.int32),
+            positions=merged_positions,
+        )
+        return index, doc_ids, term_ids, sources_np
+
+    def merge_segments(self, background: bool = False) -> threading.Thread | None:
+        """
+        Merge all segments into one and drop deleted documents for good.
+        Documents changed while merging are taken into account.
+
+        Parameters:
+        background (bool): If True, merge in a daemon thread and return it. An error of the merge is raised by the next compact or merge_segments call.
+
+        Returns:
+        threading.Thread | None: The merging thread if background is True.
+
+        Raises:
+        RuntimeError: If the last background merge failed, once.
+        """
+        if background:
+            with self._lock:
+                self._raise_merge_error()
+            thread = threading.Thread(target=self._merge_in_background, daemon=True)
+            thread.start()
+            return thread
+
+        with self._lock:
+            self._raise_merge_error()
+            segments = list(self.segments)
+            lives = [segment.live.copy() for segment in segments]
+        if len(segments) <= 1 and all(live.all() for live in lives):
+            return None
+
+        index, doc_ids, term_ids, sources = self._merge(segments, lives)
+
+        with self._lock:
+            segment = Segment(index, doc_ids, term_ids, self._next_serial)
+            self._next_serial += 1
+
+            # documents deleted or updated while merging stay deleted
+            for source in segments:
+                from_source = sources[0] == source.serial
+                segment.live[from_source] = source.live[sources[1][from_source]]
+            segment.n_live = int(segment.live.sum())
+
+            moved = (self._segment_of[doc_ids] == sources[0]) & (
+                self._local_of[doc_ids] == sources[1]
+            )
+            self._segment_of[doc_ids[moved]] = segment.serial
+            self._local_of[doc_ids[moved]] = np.flatnonzero(moved)
+
+            for source in segments:
+                if self._by_serial.pop(source.serial, None) is not None:
+                    self.segments.remove(source)
+            if segment.n_live:
+                self.segments.insert(0, segment)
+                self._by_serial[segment.serial] = segment
+            self._compact = None
+
+        return None
+
+    def _merge_in_background(self) -> None:
+        try:
+            self.merge_segments()
+        except Exception as error:
+            # a thread cannot raise to its caller, keep it for the next call
+            with self._lock:
+                self._merge_error = error
+
+    def _raise_merge_error(self) -> None:
+        # called with the lock held
+        error, self._merge_error = self._merge_error, None
+        if error is not None:
+            raise RuntimeError("The background merge failed") from error
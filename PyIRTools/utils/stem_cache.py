@@ -0,0 +1,154 @@
+"""
+This module contains the bounded stem cache used by Preprocess.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Callable
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+
+class StemCache:
+    """
+    Least recently used cache of stemmed words.
+
+    Attributes:
+    stem_function (Callable[[str], str]): Stemmer called on cache misses.
+    maxsize (int | None): Maximum number of cached words. None means unbounded.
+    path (str | None): JSON file the cache is loaded from and saved to.
+    hits (int): Number of lookups found in the cache.
+    misses (int): Number of lookups that called the stemmer.
+
+    Threads may share a cache: every change is a single OrderedDict call,
+    atomic under the GIL, so no lock is taken per word. The counters are
+    approximate when several threads stem at once.
+    """
+
+    def __init__(
+        self,
+        stem_function: Callable[[str], str],
+        maxsize: int | None = 100_000,
+        path: str | None = None,
+    ) -> None:
+        self.stem_function = stem_function
+        self.maxsize = maxsize
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._cache
+
+    def stem(self, word: str) -> str:
+        """
+        Stem a word, using the cached result when there is one.
+
+        Parameters:
+        word (str): Word to be stemmed.
+
+        Returns:
+        str: Stemmed word.
+        """
+        cache = self._cache
+        try:
+            stemmed = cache[word]
+        except KeyError:
+            self.misses += 1
+            stemmed = self.stem_function(word)
+            self._put(word, stemmed)
+            return stemmed
+
+        self.hits += 1
+        try:
+            cache.move_to_end(word)
+        except KeyError:
+            # evicted by another thread since the lookup
+            pass
+        return stemmed
+
+    def _put(self, word: str, stemmed: str) -> None:
+        if self.maxsize is not None and self.maxsize <= 0:
+            return
+        self._cache[word] = stemmed
+        if self.maxsize is not None and len(self._cache) > self.maxsize:
+            try:
+                self._cache.popitem(last=False)
+            except KeyError:
+                # emptied by other threads evicting at the same time
+                pass
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Get fraction of lookups found in the cache.
+
+        Returns:
+        float: Hit rate, 0 if there was no lookup.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self) -> None:
+        """
+        Remove all cached words and reset the counters.
+
+        Returns:
+        None
+        """
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def save(self, path: str | None = None) -> str:
+        """
+        Save cached words to a JSON file, least recently used first.
+
+        Parameters:
+        path (str | None): JSON file. Default is the path given to the constructor.
+
+        Returns:
+        str: Path of the saved file.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("No path to save the stem cache to")
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # write then rename, so a crash never leaves a truncated cache
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(self._cache, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return path
+
+    def load(self, path: str) -> None:
+        """
+        Load cached words from a JSON file saved with save.
+
+        Parameters:
+        path (str): JSON file.
+
+        Returns:
+        None
+        """
+        with open(path, encoding="utf-8") as file:
+            cached = json.load(file)
+
+        for word, stemmed in cached.items():
+            self._cache.pop(word, None)
+            self._put(word, stemmed)
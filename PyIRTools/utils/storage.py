@@ -0,0 +1,213 @@
+"""
+This module contains functions to save and load an inverted index on disk.
+
+An index is a directory with a JSON header and one .npy file per array. A
+.npy file is a short header followed by the raw array; every array is saved
+little-endian and C-contiguous, so load_index memory-maps it (numpy.memmap)
+without copying or decoding anything. Processes loading the same index share
+one copy of it through the page cache.
+
+- header.json: format version, sizes and document names.
+- term_data.npy, term_block_offsets.npy, term_sorted_ids.npy, term_ranks.npy:
+  front-coded term dictionary, see utils.term_dictionary.
+- indptr.npy, indices.npy, data.npy: CSR postings and term frequencies.
+- doc_lengths.npy: number of tokens in each document.
+- df.npy, idf.npy: document frequency and log10(N / DF) of each term.
+- max_tfs.npy: highest term frequency of each document.
+- norms_raw.npy, norms_log.npy, norms_augmented.npy: TF-IDF L2 norm of each
+  document for each TF function of utils.weighting, so cosine search does
+  not rebuild them from the postings in every process.
+- positions_buffer.npy, positions_offsets.npy: word positions of each
+  posting, only in positional indexes, see utils.positions.
+"""
+
+import json
+import numpy as np
+
+import sys
+import os
+
+dir_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.append(dir_path)
+
+from utils.inverted_index import InvertedIndex
+from utils.positions import PositionalPostings
+from utils.segments import NormStatistics
+from utils.term_dictionary import TermDictionary
+from utils.weighting import TF_FUNCTIONS, TfIdf
+
+FORMAT_NAME = "pyirtools-index"
+FORMAT_VERSION = 3
+HEADER_FILE = "header.json"
+
+
+def document_statistics(
+    index: InvertedIndex,
+) -> tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]:
+    """
+    Compute the statistics stored with an index, or reuse the ones it was
+    loaded with.
+
+    Parameters:
+    index (InvertedIndex): Inverted index.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray, dict[str, np.ndarray]]: Highest term frequency of each document, log10(N / DF) of each term and TF-IDF norms of each document per TF function.
+    """
+    if (
+        index.max_tfs is not None
+        and index.idf is not None
+        and set(index.norms) == set(TF_FUNCTIONS)
+    ):
+        return index.max_tfs, index.idf, index.norms
+
+    df = index.document_frequency()
+    idf = TfIdf().idf(df, index.n_docs)
+    max_tfs = np.zeros(index.n_docs, dtype=np.int64)
+    np.maximum.at(max_tfs, index.indices, index.data)
+
+    # same sums as SegmentedIndex.tfidf_norms, so scores match to the bit
+    doc_ids = np.arange(index.n_docs)
+    row_ids = index.row_ids()
+    norms = {}
+    for tf, tf_function in TF_FUNCTIONS.items():
+        statistics = NormStatistics(tf_function)
+        statistics.reserve(index.n_docs, index.n_terms)
+        present = df > 0
+        statistics.log_df[present] = np.log10(df[present])
+        statistics.add(
+            doc_ids, index.indices, row_ids, index.data, max_tfs[index.indices]
+        )
+        norms[tf] = statistics.norms(doc_ids, index.n_docs)
+    return max_tfs, idf, norms
+
+
+def save_index(index: InvertedIndex, path: str) -> str:
+    """
+    Save inverted index to a directory.
+
+    Parameters:
+    index (InvertedIndex): Inverted index to be saved.
+    path (str): Directory of the index, created if it does not exist.
+
+    Returns:
+    str: Directory of the index.
+    """
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    max_tfs, idf, norms = document_statistics(index)
+
+    if isinstance(index.vocabulary, TermDictionary):
+        dictionary = index.vocabulary
+    else:
+        dictionary = TermDictionary.from_terms(index.terms)
+    arrays = {f"term_{name}": value for name, value in dictionary.to_arrays().items()}
+    arrays["indptr"] = index.indptr
+    arrays["indices"] = index.indices
+    arrays["data"] = index.data
+    arrays["doc_lengths"] = index.doc_lengths
+    arrays["df"] = index.document_frequency()
+    arrays["idf"] = idf
+    arrays["max_tfs"] = max_tfs
+    for tf, tf_norms in norms.items():
+        arrays[f"norms_{tf}"] = tf_norms
+    if index.positions is not None:
+        arrays["positions_buffer"] = index.positions.buffer
+        arrays["positions_offsets"] = index.positions.offsets
+    for name, value in arrays.items():
+        value = np.ascontiguousarray(value)
+        np.save(
+            os.path.join(path, f"{name}.npy"),
+            value.astype(value.dtype.newbyteorder("<"), copy=False),
+        )
+
+    header = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "n_terms": index.n_terms,
+        "n_docs": index.n_docs,
+        "nnz": index.nnz,
+        "positional": index.positions is not None,
+        "doc_names": index.doc_names,
+    }
+    with open(os.path.join(path, HEADER_FILE), "w", encoding="utf-8") as file:
+        json.dump(header, file)
+
+    return path
+
+
+def read_header(path: str) -> dict:
+    """
+    Read and check the header of an index directory.
+
+    Parameters:
+    path (str): Directory of the index.
+
+    Returns:
+    dict: Header of the index.
+    """
+    with open(os.path.join(path, HEADER_FILE), encoding="utf-8") as file:
+        header = json.load(file)
+
+    if header.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a PyIRTools index")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported index version: {header.get('version')}")
+    return header
+
+
+def load_array(path: str, name: str, mmap: bool = True) -> np.ndarray:
+    """
+    Load one array of an index directory.
+
+    Parameters:
+    path (str): Directory of the index.
+    name (str): Array name, e.g. "idf".
+    mmap (bool): If True, memory-map the file read-only instead of reading it.
+
+    Returns:
+    np.ndarray: Loaded array.
+    """
+    return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+
+
+def load_index(path: str, mmap: bool = True) -> InvertedIndex:
+    """
+    Load inverted index from a directory created by save_index.
+
+    Parameters:
+    path (str): Directory of the index.
+    mmap (bool): If True, postings are memory-mapped read-only instead of read into memory.
+
+    Returns:
+    InvertedIndex: Loaded inverted index. Its vocabulary is a TermDictionary, memory-mapped with the postings, and so are the document statistics.
+    """
+    header = read_header(path)
+
+    vocabulary = TermDictionary(
+        *(
+            load_array(path, f"term_{name}", mmap)
+            for name in ("data", "block_offsets", "sorted_ids", "ranks")
+        )
+    )
+
+    positions = None
+    if header.get("positional"):
+        positions = PositionalPostings(
+            load_array(path, "positions_buffer", mmap),
+            load_array(path, "positions_offsets", mmap),
+        )
+
+    return InvertedIndex(
+        vocabulary=vocabulary,
+        doc_names=header["doc_names"],
+        indptr=load_array(path, "indptr", mmap),
+        indices=load_array(path, "indices", mmap),
+        data=load_array(path, "data", mmap),
+        doc_lengths=load_array(path, "doc_lengths", mmap),
+        positions=positions,
+        max_tfs=load_array(path, "max_tfs", mmap),
+        idf=load_array(path, "idf", mmap),
+        norms={tf: load_array(path, f"norms_{tf}", mmap) for tf in TF_FUNCTIONS},
+    )
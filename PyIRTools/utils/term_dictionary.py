@@ -0,0 +1,299 @@
+"""
+This module contains the front-coded term dictionary of saved indexes.
+
+Terms are sorted by their UTF-8 bytes and stored in blocks of BLOCK_SIZE
+terms in one byte buffer. The first term of a block is stored whole, each
+following term as the length of the prefix it shares with the previous
+term and the rest of its bytes. Lookups binary search the first terms of
+the blocks and decode a single block, so the dictionary needs no Python
+object per term and can be memory-mapped from disk as is.
+
+Term ids are kept separate from the sorted order, so the dictionary can
+stand in for the Vocabulary of an index built in first-seen order.
+"""
+
+from typing import Iterable, Iterator
+
+import numpy as np
+
+BLOCK_SIZE = 16
+# recent lookups kept as Python objects, query terms repeat a lot
+CACHE_SIZE = 4096
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: memoryview, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _shared_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _int64_view(array: np.ndarray) -> memoryview:
+    return np.ascontiguousarray(array, dtype=np.int64).data.cast("B").cast("q")
+
+
+class TermDictionary:
+    """
+    Read-only sorted term dictionary in front-coded blocks.
+
+    Supports the lookups of Vocabulary (get, term, in, len, iteration in
+    term id order) and prefix enumeration in sorted order.
+
+    Attributes:
+    data (np.ndarray): Front-coded blocks, uint8.
+    block_offsets (np.ndarray): Start of each block in data.
+    sorted_ids (np.ndarray): Term id of each term in sorted order.
+    ranks (np.ndarray): Position in sorted order of each term id.
+    """
+
+    __slots__ = (
+        "data",
+        "block_offsets",
+        "sorted_ids",
+        "ranks",
+        "_view",
+        "_offsets",
+        "_ids",
+        "_ranks",
+        "_cache",
+    )
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        block_offsets: np.ndarray,
+        sorted_ids: np.ndarray,
+        ranks: np.ndarray,
+    ) -> None:
+        self.data = data
+        self.block_offsets = block_offsets
+        self.sorted_ids = sorted_ids
+        self.ranks = ranks
+        # memoryviews index faster than arrays and work on memory-mapped files
+        self._view: memoryview = np.ascontiguousarray(data, dtype=np.uint8).data
+        self._offsets = _int64_view(block_offsets)
+        self._ids = _int64_view(sorted_ids)
+        self._ranks = _int64_view(ranks)
+        self._cache: dict[str, int | None] = {}
+
+    @classmethod
+    def from_terms(cls, terms: Iterable[str]) -> "TermDictionary":
+        """
+        Build a dictionary of distinct terms.
+
+        Parameters:
+        terms (Iterable[str]): Terms in term id order, without duplicates.
+
+        Returns:
+        TermDictionary: Dictionary giving term i the id i.
+        """
+        encoded = [term.encode("utf-8") for term in terms]
+        order = sorted(range(len(encoded)), key=encoded.__getitem__)
+
+        out = bytearray()
+        block_offsets = []
+        previous = b""
+        for rank, term_id in enumerate(order):
+            term = encoded[term_id]
+            if rank and term == previous:
+                raise ValueError(f"Duplicate term: {term.decode('utf-8')!r}")
+            if rank % BLOCK_SIZE == 0:
+                block_offsets.append(len(out))
+                shared = 0
+            else:
+                shared = _shared_prefix(previous, term)
+                _write_varint(out, shared)
+            _write_varint(out, len(term) - shared)
+            out += term[shared:]
+            previous = term
+
+        sorted_ids = np.array(order, dtype=np.int64)
+        ranks = np.empty(len(order), dtype=np.int64)
+        ranks[sorted_ids] = np.arange(len(order))
+        return cls(
+            np.frombuffer(bytes(out), dtype=np.uint8),
+            np.array(block_offsets, dtype=np.int64),
+            sorted_ids,
+            ranks,
+        )
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Get the buffers of the dictionary, e.g. to save them.
+
+        Returns:
+        dict[str, np.ndarray]: "data", "block_offsets", "sorted_ids" and "ranks", the arguments of TermDictionary.
+        """
+        return {
+            "data": self.data,
+            "block_offsets": self.block_offsets,
+            "sorted_ids": self.sorted_ids,
+            "ranks": self.ranks,
+        }
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.to_arrays().values())
+
+    def __len__(self) -> int:
+        return len(self.sorted_ids)
+
+    def __contains__(self, term: str) -> bool:
+        return self.get(term) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.terms)
+
+    @property
+    def terms(self) -> list[str]:
+        """
+        All terms in term id order. Decodes every term, only use it for
+        exports and small dictionaries.
+        """
+        terms = [""] * len(self)
+        sorted_ids = self.sorted_ids.tolist()
+        for term, rank in self._iter_from(0):
+            terms[sorted_ids[rank]] = term.decode("utf-8")
+        return terms
+
+    def _first_term(self, block: int) -> bytes:
+        view = self._view
+        position = self._offsets[block]
+        length = view[position]
+        if length < 0x80:
+            return bytes(view[position + 1 : position + 1 + length])
+        length, position = _read_varint(view, position)
+        return bytes(view[position : position + length])
+
+    def _decode_block(self, block: int) -> list[bytes]:
+        view = self._view
+        count = min(BLOCK_SIZE, len(self._ids) - block * BLOCK_SIZE)
+        length, position = _read_varint(view, self._offsets[block])
+        term = bytes(view[position : position + length])
+        position += length
+        terms = [term]
+        for _ in range(count - 1):
+            # shared prefix and suffix lengths are almost always one byte
+            shared = view[position]
+            length = view[position + 1]
+            if shared < 0x80 and length < 0x80:
+                position += 2
+            else:
+                shared, position = _read_varint(view, position)
+                length, position = _read_varint(view, position)
+            term = term[:shared] + bytes(view[position : position + length])
+            position += length
+            terms.append(term)
+        return terms
+
+    def _iter_from(self, rank: int) -> Iterator[tuple[bytes, int]]:
+        # terms in sorted order from rank on, with their rank
+        n_blocks = len(self.block_offsets)
+        block = rank // BLOCK_SIZE
+        skip = rank % BLOCK_SIZE
+        while block < n_blocks:
+            for i, term in enumerate(
+                self._decode_block(block)[skip:], block * BLOCK_SIZE + skip
+            ):
+                yield term, i
+            block += 1
+            skip = 0
+
+    def _find_block(self, key: bytes) -> int:
+        # last block whose first term is not above key, -1 if there is none
+        low, high = 0, len(self.block_offsets)
+        while low < high:
+            middle = (low + high) // 2
+            if self._first_term(middle) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def _lower_bound(self, key: bytes) -> int:
+        # rank of the first term not below key
+        block = self._find_block(key)
+        if block < 0:
+            return 0
+        for i, term in enumerate(self._decode_block(block)):
+            if term >= key:
+                return block * BLOCK_SIZE + i
+        return min((block + 1) * BLOCK_SIZE, len(self))
+
+    def get(self, term: str) -> int | None:
+        """
+        Get term id of a term.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        int | None: Term id, or None if the term is not in the dictionary.
+        """
+        cache = self._cache
+        try:
+            return cache[term]
+        except KeyError:
+            pass
+
+        term_id = None
+        key = term.encode("utf-8")
+        block = self._find_block(key)
+        if block >= 0:
+            for i, candidate in enumerate(self._decode_block(block)):
+                if candidate == key:
+                    term_id = self._ids[block * BLOCK_SIZE + i]
+                    break
+
+        if len(cache) >= CACHE_SIZE:
+            cache.clear()
+        cache[term] = term_id
+        return term_id
+
+    def term(self, term_id: int) -> str:
+        """
+        Get term of a term id.
+
+        Parameters:
+        term_id (int): Term id.
+
+        Returns:
+        str: Term.
+        """
+        rank = self._ranks[term_id]
+        return self._decode_block(rank // BLOCK_SIZE)[rank % BLOCK_SIZE].decode("utf-8")
+
+    def with_prefix(self, prefix: str) -> Iterator[tuple[str, int]]:
+        """
+        Enumerate the terms starting with a prefix.
+
+        Parameters:
+        prefix (str): Prefix, "" enumerates every term.
+
+        Returns:
+        Iterator[tuple[str, int]]: Terms and their ids, in sorted order.
+        """
+        key = prefix.encode("utf-8")
+        for term, rank in self._iter_from(self._lower_bound(key)):
+            if not term.startswith(key):
+                return
+            yield term.decode("utf-8"), self._ids[rank]
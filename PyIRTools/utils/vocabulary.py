@@ -0,0 +1,115 @@
+"""
+This module contains the vocabulary class, mapping terms to integer ids.
+"""
+
+from itertools import chain
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from utils.term_dictionary import TermDictionary
+
+
+class Vocabulary:
+    """
+    Term dictionary giving each term an integer id in first-seen order.
+
+    Lookups go through a hash map, so adding or finding a term is O(1)
+    instead of a scan of the term list.
+
+    A vocabulary may extend a read-only TermDictionary, e.g. of a
+    memory-mapped index: the base keeps ids 0 to len(base) - 1 and only
+    terms added later are held as Python strings.
+
+    Attributes:
+    terms (list[str]): Term id to term.
+    base (TermDictionary | None): Dictionary of the first term ids.
+    """
+
+    __slots__ = ("_ids", "_terms", "_offset", "base")
+
+    def __init__(
+        self, terms: Iterable[str] = (), base: "TermDictionary | None" = None
+    ) -> None:
+        self._ids: dict[str, int] = {}
+        self._terms: list[str] = []
+        self._offset = 0 if base is None else len(base)
+        self.base = base
+        self.update(terms)
+
+    def __len__(self) -> int:
+        return self._offset + len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return self.get(term) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        if self.base is None:
+            return iter(self._terms)
+        return chain(self.base, self._terms)
+
+    @property
+    def terms(self) -> list[str]:
+        if self.base is None:
+            return self._terms
+        return self.base.terms + self._terms
+
+    def add(self, term: str) -> int:
+        """
+        Add a term if it is new.
+
+        Parameters:
+        term (str): Term to be added.
+
+        Returns:
+        int: Term id.
+        """
+        term_id = self._ids.get(term)
+        if term_id is None:
+            if self.base is not None:
+                term_id = self.base.get(term)
+                if term_id is not None:
+                    return term_id
+            term_id = self._ids[term] = self._offset + len(self._terms)
+            self._terms.append(term)
+        return term_id
+
+    def update(self, terms: Iterable[str]) -> list[int]:
+        """
+        Add many terms.
+
+        Parameters:
+        terms (Iterable[str]): Terms to be added.
+
+        Returns:
+        list[int]: Term id of each term.
+        """
+        return [self.add(term) for term in terms]
+
+    def get(self, term: str) -> int | None:
+        """
+        Get term id of a term.
+
+        Parameters:
+        term (str): Term to look up.
+
+        Returns:
+        int | None: Term id, or None if the term is not in the vocabulary.
+        """
+        term_id = self._ids.get(term)
+        if term_id is None and self.base is not None:
+            return self.base.get(term)
+        return term_id
+
+    def term(self, term_id: int) -> str:
+        """
+        Get term of a term id.
+
+        Parameters:
+        term_id (int): Term id.
+
+        Returns:
+        str: Term.
+        """
+        if self.base is not None and term_id < self._offset:
+            return self.base.term(term_id)
+        return self._terms[term_id - self._offset]
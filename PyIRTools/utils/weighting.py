@@ -0,0 +1,313 @@
+"""
+This module contains the term weighting schemes used by SparseVectorModel.search.
+
+A weighting scheme gives each posting a document weight and each query term
+a query weight, the score of a document is the sum of their products over
+the query terms. Everything is computed from the term frequencies, document
+lengths and document frequencies stored in the index, and the IDF of all
+terms is computed once per index version, so switching schemes adds no work
+per query.
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+def raw_tf(tfs: np.ndarray, max_tfs: np.ndarray) -> np.ndarray:
+    """
+    Raw term frequency.
+
+    Parameters:
+    tfs (np.ndarray): Term frequencies.
+    max_tfs (np.ndarray): Highest term frequency in the document of each entry.
+
+    Returns:
+    np.ndarray: Weights.
+    """
+    return np.asarray(tfs, dtype=np.float64)
+
+
+def log_tf(tfs: np.ndarray, max_tfs: np.ndarray) -> np.ndarray:
+    """
+    Logarithmic term frequency, 1 + log10(tf).
+
+    Parameters:
+    tfs (np.ndarray): Term frequencies, all positive.
+    max_tfs (np.ndarray): Highest term frequency in the document of each entry.
+
+    Returns:
+    np.ndarray: Weights.
+    """
+    return 1 + np.log10(tfs)
+
+
+def augmented_tf(tfs: np.ndarray, max_tfs: np.ndarray) -> np.ndarray:
+    """
+    Augmented term frequency, 0.5 + 0.5 * tf / max_tf, which keeps long
+    documents from being favored.
+
+    Parameters:
+    tfs (np.ndarray): Term frequencies.
+    max_tfs (np.ndarray): Highest term frequency in the document of each entry.
+
+    Returns:
+    np.ndarray: Weights.
+    """
+    return 0.5 + 0.5 * np.asarray(tfs, dtype=np.float64) / max_tfs
+
+
+TF_FUNCTIONS = {"raw": raw_tf, "log": log_tf, "augmented": augmented_tf}
+
+
+class Weighting(ABC):
+    """
+    Base class of the weighting schemes.
+
+    Attributes:
+    name (str): Name of the scheme in WEIGHTINGS.
+    cosine (bool): If True, the score is the cosine similarity. Document norms are kept by the index for IDF log10(N / DF) and the TF function tf.
+    tf (str): TF function of the document weights, a key of TF_FUNCTIONS.
+    """
+
+    name = ""
+    cosine = False
+    tf = "raw"
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    @abstractmethod
+    def idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        """
+        Calculate IDF of every term.
+
+        Parameters:
+        df (np.ndarray): Document frequency of each term.
+        n_docs (int): Number of documents.
+
+        Returns:
+        np.ndarray: IDF of each term, 0 for terms in no document.
+        """
+
+    def document_weights(
+        self,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        max_tfs: np.ndarray,
+        avg_length: float,
+        idf: float,
+    ) -> np.ndarray:
+        """
+        Calculate the weight of a term in each document of its postings.
+
+        Parameters:
+        tfs (np.ndarray): Term frequency in each document.
+        doc_lengths (np.ndarray): Length of each document.
+        max_tfs (np.ndarray): Highest term frequency of each document.
+        avg_length (float): Average document length.
+        idf (float): IDF of the term.
+
+        Returns:
+        np.ndarray: Weight in each document, before cosine normalization.
+        """
+        return TF_FUNCTIONS[self.tf](tfs, max_tfs) * idf
+
+    def query_weights(self, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        """
+        Calculate the weight of each query term.
+
+        Parameters:
+        counts (np.ndarray): Number of times each term is in the query.
+        idf (np.ndarray): IDF of each term.
+
+        Returns:
+        np.ndarray: Weight of each term, before cosine normalization.
+        """
+        return counts.astype(np.float64)
+
+
+def _log10_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    idf = np.zeros(len(df))
+    present = df > 0
+    idf[present] = np.log10(n_docs / df[present])
+    return idf
+
+
+class TfIdf(Weighting):
+    """
+    Raw TF times log10(N / DF), cosine similarity.
+    """
+
+    name = "tfidf"
+    cosine = True
+    tf = "raw"
+
+    def idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        return _log10_idf(df, n_docs)
+
+    def query_weights(self, counts: np.ndarray, idf: np.ndarray) -> np.ndarray:
+        return TF_FUNCTIONS[self.tf](counts, counts.max(initial=1)) * idf
+
+
+class LogTfIdf(TfIdf):
+    """
+    (1 + log10(TF)) times log10(N / DF), cosine similarity.
+    """
+
+    name = "logtf"
+    tf = "log"
+
+
+class AugmentedTfIdf(TfIdf):
+    """
+    (0.5 + 0.5 * TF / max TF) times log10(N / DF), cosine similarity.
+    """
+
+    name = "augmented"
+    tf = "augmented"
+
+
+class BM25(Weighting):
+    """
+    Okapi BM25.
+
+    Attributes:
+    k1 (float): Term frequency saturation.
+    b (float): Strength of the document length normalization, from 0 to 1.
+    """
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(k1={self.k1}, b={self.b})"
+
+    def idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        # never negative, unlike log((N - DF + 0.5) / (DF + 0.5))
+        idf = np.zeros(len(df))
+        present = df > 0
+        idf[present] = np.log(1 + (n_docs - df[present] + 0.5) / (df[present] + 0.5))
+        return idf
+
+    def saturation(
+        self, tfs: np.ndarray, doc_lengths: np.ndarray, avg_length: float
+    ) -> np.ndarray:
+        tfs = np.asarray(tfs, dtype=np.float64)
+        relative_length = doc_lengths / avg_length if avg_length else np.ones(len(tfs))
+        return (
+            tfs
+            * (self.k1 + 1)
+            / (tfs + self.k1 * (1 - self.b + self.b * relative_length))
+        )
+
+    def document_weights(
+        self,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        max_tfs: np.ndarray,
+        avg_length: float,
+        idf: float,
+    ) -> np.ndarray:
+        return idf * self.saturation(tfs, doc_lengths, avg_length)
+
+
+class BM25Plus(BM25):
+    """
+    BM25+, BM25 with a lower bound delta on the weight of a matching term,
+    so long documents are not scored below documents without the term.
+
+    Attributes:
+    delta (float): Lower bound of the TF part.
+    """
+
+    name = "bm25+"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, delta: float = 1.0) -> None:
+        super().__init__(k1, b)
+        self.delta = delta
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(k1={self.k1}, b={self.b}, delta={self.delta})"
+
+    def idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        idf = np.zeros(len(df))
+        present = df > 0
+        idf[present] = np.log((n_docs + 1) / df[present])
+        return idf
+
+    def document_weights(
+        self,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        max_tfs: np.ndarray,
+        avg_length: float,
+        idf: float,
+    ) -> np.ndarray:
+        return idf * (self.saturation(tfs, doc_lengths, avg_length) + self.delta)
+
+
+class PivotedNormalization(Weighting):
+    """
+    Pivoted document length normalization with double logarithmic TF.
+
+    Attributes:
+    slope (float): Slope of the normalization around the average document length.
+    """
+
+    name = "pivoted"
+
+    def __init__(self, slope: float = 0.2) -> None:
+        self.slope = slope
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(slope={self.slope})"
+
+    def idf(self, df: np.ndarray, n_docs: int) -> np.ndarray:
+        idf = np.zeros(len(df))
+        present = df > 0
+        idf[present] = np.log((n_docs + 1) / df[present])
+        return idf
+
+    def document_weights(
+        self,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        max_tfs: np.ndarray,
+        avg_length: float,
+        idf: float,
+    ) -> np.ndarray:
+        relative_length = doc_lengths / avg_length if avg_length else np.ones(len(tfs))
+        tf = 1 + np.log(1 + np.log(tfs))
+        return idf * tf / (1 - self.slope + self.slope * relative_length)
+
+
+SCHEMES: tuple[type[Weighting], ...] = (
+    TfIdf,
+    LogTfIdf,
+    AugmentedTfIdf,
+    BM25,
+    BM25Plus,
+    PivotedNormalization,
+)
+WEIGHTINGS: dict[str, type[Weighting]] = {scheme.name: scheme for scheme in SCHEMES}
+
+
+def get_weighting(weighting: str | Weighting) -> Weighting:
+    """
+    Get a weighting scheme by name.
+
+    Parameters:
+    weighting (str | Weighting): Name in WEIGHTINGS, or a weighting scheme returned as is.
+
+    Returns:
+    Weighting: Weighting scheme with default parameters.
+    """
+    if isinstance(weighting, Weighting):
+        return weighting
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"weighting must be one of {tuple(WEIGHTINGS)}")
+    return WEIGHTINGS[weighting]()
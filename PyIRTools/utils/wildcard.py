@@ -0,0 +1,244 @@
+"""
+This module contains the wildcard term index used by BooleanModel.
+
+"*" in a query term matches any run of characters. A pattern is expanded to
+the ids of the matching vocabulary terms:
+
+- "sekol*" is a range of the sorted terms, found by binary search. Terms of
+  a TermDictionary base are already sorted and enumerated by its
+  with_prefix, only terms added later are sorted here.
+- "*bola" is a range of the sorted reversed terms.
+- "*ola*", "s*l*h" and other patterns intersect the bigram postings of
+  their fixed parts, with "$" marking the start and end of a term, and
+  check the remaining candidates against the pattern.
+
+So an expansion costs O(log V + matches) for prefixes and suffixes, and
+scales with the rarest bigram of the pattern otherwise, never a scan of
+the vocabulary. The reversed terms and the bigram postings are built on
+the first pattern needing them, and every structure is extended in place
+when terms are added, so a growing vocabulary is never indexed twice.
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import TYPE_CHECKING, Iterable
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from utils.term_dictionary import TermDictionary
+
+WILDCARD = "*"
+BOUNDARY = "$"
+# batches up to this size are inserted one key at a time
+INSORT_LIMIT = 16
+
+
+def is_wildcard(word: str) -> bool:
+    """
+    Check if a query word is a wildcard pattern.
+
+    Parameters:
+    word (str): Query word.
+
+    Returns:
+    bool: True if the word contains "*".
+    """
+    return WILDCARD in word
+
+
+def _prefix_range(keys: list[tuple[str, int]], prefix: str) -> tuple[int, int]:
+    start = bisect_left(keys, (prefix,))
+    # "\U0010ffff" sorts after every character that can follow the prefix
+    return start, bisect_left(keys, (prefix + "\U0010ffff",), start)
+
+
+def _insert_sorted(keys: list[tuple[str, int]], new: list[tuple[str, int]]) -> None:
+    new.sort()
+    if len(new) <= INSORT_LIMIT:
+        for key in new:
+            insort(keys, key)
+        return
+    # one pass over the list, copying the runs between the new keys
+    merged: list[tuple[str, int]] = []
+    start = 0
+    for key in new:
+        end = bisect_left(keys, key, start)
+        merged.extend(keys[start:end])
+        merged.append(key)
+        start = end
+    merged.extend(keys[start:])
+    keys[:] = merged
+
+
+def _bigrams(text: str) -> set[str]:
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+class WildcardIndex:
+    """
+    Index of the vocabulary terms for wildcard expansion.
+
+    Like Vocabulary, it may extend a read-only TermDictionary: the base
+    keeps term ids 0 to len(base) - 1 and answers prefix patterns itself.
+
+    Attributes:
+    n_terms (int): Number of indexed terms, term ids are 0 to n_terms - 1.
+    base (TermDictionary | None): Dictionary of the first term ids.
+
+    Threads may share an index, a lock guards extend and expand.
+    """
+
+    def __init__(
+        self, terms: Iterable[str] = (), base: "TermDictionary | None" = None
+    ) -> None:
+        self.base = base
+        self.n_terms = 0 if base is None else len(base)
+        self._offset = self.n_terms
+        # terms after the base, in term id order and sorted with their ids
+        self._terms: list[str] = []
+        self._sorted: list[tuple[str, int]] = []
+        # built on the first suffix and infix pattern
+        self._reversed: list[tuple[str, int]] | None = None
+        self._bigrams: dict[str, np.ndarray] | None = None
+        self._lock = threading.Lock()
+        self.extend(terms)
+
+    def term(self, term_id: int) -> str:
+        """
+        Get term of a term id.
+
+        Parameters:
+        term_id (int): Term id.
+
+        Returns:
+        str: Term.
+        """
+        if self.base is not None and term_id < self._offset:
+            return self.base.term(term_id)
+        return self._terms[term_id - self._offset]
+
+    def _iter_range(self, start: int) -> Iterable[tuple[int, str]]:
+        # terms from term id start on, with their ids
+        if self.base is not None and start < self._offset:
+            # decodes every base term, once per built structure
+            yield from enumerate(self.base.terms[start:], start)
+        yield from enumerate(
+            self._terms[max(start - self._offset, 0) :], max(start, self._offset)
+        )
+
+    def extend(self, terms: Iterable[str]) -> None:
+        """
+        Add terms with the next term ids, extending the built structures.
+
+        Parameters:
+        terms (Iterable[str]): New terms, not in the index yet.
+
+        Returns:
+        None
+        """
+        with self._lock:
+            start = self.n_terms
+            self._terms.extend(terms)
+            self.n_terms = self._offset + len(self._terms)
+            if self.n_terms == start:
+                return
+            added = list(self._iter_range(start))
+            _insert_sorted(self._sorted, [(term, term_id) for term_id, term in added])
+            if self._reversed is not None:
+                _insert_sorted(
+                    self._reversed, [(term[::-1], term_id) for term_id, term in added]
+                )
+            if self._bigrams is not None:
+                self._add_bigrams(self._bigrams, added)
+
+    @staticmethod
+    def _add_bigrams(
+        bigrams: dict[str, np.ndarray], terms: list[tuple[int, str]]
+    ) -> None:
+        # term ids increase, so appended postings stay sorted
+        lists: dict[str, list[int]] = {}
+        for term_id, term in terms:
+            for bigram in _bigrams(f"{BOUNDARY}{term}{BOUNDARY}"):
+                lists.setdefault(bigram, []).append(term_id)
+        for bigram, ids in lists.items():
+            new = np.array(ids, dtype=np.int64)
+            previous = bigrams.get(bigram)
+            bigrams[bigram] = (
+                new if previous is None else np.concatenate((previous, new))
+            )
+
+    def _prefix(self, prefix: str) -> np.ndarray:
+        start, end = _prefix_range(self._sorted, prefix)
+        ids = [term_id for _, term_id in self._sorted[start:end]]
+        if self.base is not None:
+            ids.extend(term_id for _, term_id in self.base.with_prefix(prefix))
+        return np.sort(np.array(ids, dtype=np.int64))
+
+    def _suffix(self, suffix: str) -> np.ndarray:
+        if self._reversed is None:
+            self._reversed = sorted(
+                (term[::-1], term_id) for term_id, term in self._iter_range(0)
+            )
+        start, end = _prefix_range(self._reversed, suffix[::-1])
+        return np.sort(
+            np.array(
+                [term_id for _, term_id in self._reversed[start:end]], dtype=np.int64
+            )
+        )
+
+    def _bigram_index(self) -> dict[str, np.ndarray]:
+        if self._bigrams is None:
+            self._bigrams = {}
+            self._add_bigrams(self._bigrams, list(self._iter_range(0)))
+        return self._bigrams
+
+    def expand(self, pattern: str) -> np.ndarray:
+        """
+        Get the terms matching a wildcard pattern.
+
+        Parameters:
+        pattern (str): Pattern where "*" matches any characters, e.g. "sekol*".
+
+        Returns:
+        np.ndarray: Sorted ids of the matching terms.
+        """
+        with self._lock:
+            return self._expand(pattern)
+
+    def _expand(self, pattern: str) -> np.ndarray:
+        parts = pattern.split(WILDCARD)
+        if len(parts) == 1:
+            exact = self._prefix(pattern)
+            return exact[[self.term(t) == pattern for t in exact.tolist()]]
+
+        head, tail = parts[0], parts[-1]
+        if len(parts) == 2 and not tail:
+            return self._prefix(head)
+        if len(parts) == 2 and not head:
+            return self._suffix(tail)
+
+        bigrams = _bigrams(f"{BOUNDARY}{head}") | _bigrams(f"{tail}{BOUNDARY}")
+        for part in parts[1:-1]:
+            bigrams |= _bigrams(part)
+        index = self._bigram_index()
+
+        if bigrams:
+            lists = sorted(
+                (index.get(bigram, np.zeros(0, dtype=np.int64)) for bigram in bigrams),
+                key=len,
+            )
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        else:
+            # only "*" and single characters, every term may match
+            candidates = np.arange(self.n_terms, dtype=np.int64)
+
+        matcher = re.compile(".*".join(map(re.escape, parts)), re.DOTALL)
+        return candidates[
+            [matcher.fullmatch(self.term(t)) is not None for t in candidates.tolist()]
+        ]